@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
 application = get_asgi_application()
+
+# imported after the application set up apps
+from units.reaper import start_reaper  # noqa: E402
+
+start_reaper()
@@ -0,0 +1,175 @@
+import hashlib
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+if TYPE_CHECKING:
+    from django.core.cache.backends.base import BaseCache
+    from rest_framework.request import Request
+
+# version namespaces of cached responses: any unit change bumps
+# UNITS_VERSION of not filtered lists, changes of many units or of
+# units which old shop is not known bump UNITS_ALL_VERSION of all unit
+# entries, f'unit:{id}' and get_shop_units_version(shop_id) are bumped
+# for the changed unit and its shop
+UNITS_VERSION = 'units'
+UNITS_ALL_VERSION = 'units-all'
+SHOPS_VERSION = 'shops'
+
+
+def get_shop_units_version(shop_id: int) -> str:
+    return f'shop:{shop_id}:units'
+
+
+def get_cache() -> 'BaseCache':
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_versions(keys: 'Iterable[str]') -> 'List[int]':
+    keys = [f'version:{key}' for key in keys]
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    missing = {
+        # not 1 to never match a version evicted from the cache
+        key: time.time_ns() for key in keys if key not in versions
+    }
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump_versions(*keys: str) -> None:
+    """
+    Invalidate responses cached with any of the version keys, the
+    versions are bumped after commit to not cache not committed data.
+    """
+    def bump() -> None:
+        cache = get_cache()
+        for key in keys:
+            try:
+                cache.incr(f'version:{key}')
+            except ValueError:
+                cache.add(f'version:{key}', time.time_ns(), timeout=None)
+
+    if keys:
+        transaction.on_commit(bump)
+
+
+def bump_unit_versions(units: 'Iterable[Tuple[int, int]]') -> None:
+    """
+    Bump versions of changed units by (unit id, shop id) pairs.
+    """
+    units = list(units)
+    if units:
+        bump_versions(
+            UNITS_VERSION,
+            *[f'unit:{unit_id}' for unit_id, _ in units],
+            *{get_shop_units_version(shop_id) for _, shop_id in units}
+        )
+
+
+class CachedResponseMixin:
+    """
+    Cache list and retrieve responses by normalized query string, the
+    entries are invalidated by version counters of
+    get_list_cache_version_keys (cache_versions by default) for list and
+    of f'{cache_object_version}:{pk}' for retrieve.
+    Clients get ETag and 304 response for unchanged If-None-Match.
+    """
+    cache_versions = ()
+    cache_object_versions = ()
+    cache_object_version = None
+
+    def get_list_cache_version_keys(self) -> 'List[str]':
+        return list(self.cache_versions)
+
+    def get_cache_version_keys(self) -> 'List[str]':
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            return [
+                *self.cache_object_versions,
+                f'{self.cache_object_version}:{self.kwargs[lookup_url_kwarg]}'
+            ]
+        return self.get_list_cache_version_keys()
+
+    def get_cache_key(self, request: 'Request') -> str:
+        query = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        return hashlib.md5(
+            repr((
+                request.get_host(),
+                request.path,
+                query,
+                request.accepted_renderer.format,
+            )).encode()
+        ).hexdigest()
+
+    def get_etag(
+        self, key: str, version_keys: 'List[str]', versions: 'List[int]'
+    ) -> str:
+        # version keys of a list may differ for the same query
+        return quote_etag(
+            hashlib.md5(
+                repr((key, version_keys, versions)).encode()
+            ).hexdigest()
+        )
+
+    def is_not_modified(self, request: 'Request', etag: str) -> bool:
+        return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+    def is_cacheable(self, response: Response) -> bool:
+        return (
+            response.status_code == status.HTTP_200_OK
+            and not response.streaming
+        )
+
+    def get_cached_response(
+        self, handler: 'Callable', request: 'Request', *args, **kwargs
+    ) -> Response:
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        version_keys = self.get_cache_version_keys()
+        etag = self.get_etag(key, version_keys, get_versions(version_keys))
+        if self.is_not_modified(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+
+        cache = get_cache()
+        cache_key = f'response:{key}:{etag}'
+        data = cache.get(cache_key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if not self.is_cacheable(response):
+                return response
+            cache.set(
+                cache_key, response.data, settings.RESPONSE_CACHE_TIMEOUT
+            )
+        else:
+            response = Response(data)
+
+        response['ETag'] = etag
+        return response
+
+    def list(self, request: 'Request', *args, **kwargs) -> Response:
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request: 'Request', *args, **kwargs) -> Response:
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,117 @@
+import json
+import time
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, IO, Dict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+    from django.db.models.query import QuerySet
+
+FORMATS = ('csv', 'ndjson')
+
+
+class ExportCommand(BaseCommand):
+    """
+    Base of export commands, rows of get_queryset are written ordered by
+    pk with export_fields {column: lookup} as csv through
+    COPY ... TO STDOUT or as ndjson from server side cursor, so memory
+    does not depend on the table size. Summary goes to stderr to keep
+    stdout for data.
+    """
+    export_fields: 'Dict[str, str]' = {}
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument(
+            '--format', choices=FORMATS, default='csv'
+        )
+        parser.add_argument(
+            '--output', help='Output file, stdout by default.'
+        )
+        parser.add_argument(
+            '--since-id',
+            type=int,
+            help='Export rows with greater id only (incremental export).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def get_queryset(self, options: dict) -> 'QuerySet':
+        raise NotImplementedError
+
+    def filter_queryset(
+        self, queryset: 'QuerySet', options: dict
+    ) -> 'QuerySet':
+        if options['since_id'] is not None:
+            queryset = queryset.filter(pk__gt=options['since_id'])
+        return queryset
+
+    def get_export_queryset(self, options: dict) -> 'QuerySet':
+        queryset = self.get_queryset(options).using(options['database'])
+        return self.filter_queryset(queryset, options).order_by('pk')
+
+    def write_csv(self, queryset: 'QuerySet', output: 'IO[str]') -> int:
+        values = queryset.values_list(*self.export_fields.values())
+        sql, params = values.query.sql_with_params()
+        output.write(','.join(self.export_fields) + '\n')
+        with connections[queryset.db].cursor() as cursor:
+            cursor.copy_expert(
+                'COPY ({}) TO STDOUT WITH (FORMAT csv)'.format(
+                    cursor.mogrify(sql, params).decode()
+                ),
+                output
+            )
+            return cursor.rowcount
+
+    def write_ndjson(
+        self, queryset: 'QuerySet', output: 'IO[str]', chunk_size: int
+    ) -> int:
+        columns = list(self.export_fields)
+        values = queryset.values_list(*self.export_fields.values())
+        count = 0
+        for row in values.iterator(chunk_size=chunk_size):
+            output.write(
+                json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder)
+                + '\n'
+            )
+            count += 1
+        return count
+
+    def handle(self, *args, **options) -> None:
+        started = time.perf_counter()
+        queryset = self.get_export_queryset(options)
+        # rows inserted during export are left to the next incremental one
+        last_id = queryset.aggregate(last_id=Max('pk'))['last_id']
+        queryset = queryset.filter(pk__lte=last_id or 0)
+        if last_id is None:
+            last_id = options['since_id']
+
+        with ExitStack() as stack:
+            if options['output']:
+                try:
+                    output = stack.enter_context(open(
+                        options['output'], 'w', encoding='utf-8', newline=''
+                    ))
+                except OSError as err:
+                    raise CommandError(err) from err
+            else:
+                output = self.stdout
+                # data is written as is
+                output.ending = ''
+
+            if options['format'] == 'csv':
+                count = self.write_csv(queryset, output)
+            else:
+                count = self.write_ndjson(
+                    queryset, output, options['chunk_size']
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f'Exported {count} rows in {elapsed:.1f}s, last id {last_id}.'
+        )
@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+if TYPE_CHECKING:
+    from django.db.backends.utils import CursorWrapper
+    from django.http import HttpRequest
+
+slow_query_logger = logging.getLogger('api.metrics.slow_queries')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# name: (help, label names) of summaries observed on sampled requests
+SUMMARIES = {
+    'api_db_queries': (
+        'SQL queries per sampled request.', ('view', 'method')
+    ),
+    'api_db_duration_seconds': (
+        'SQL time per sampled request.', ('view', 'method')
+    ),
+    'api_serialize_duration_seconds': (
+        'Serialization time of rows per sampled request.',
+        ('view', 'method')
+    ),
+    'api_render_duration_seconds': (
+        'Response rendering (JSON encoding) time per sampled request.',
+        ('view', 'method')
+    ),
+    'api_response_size_bytes': (
+        'Response body size per sampled request.', ('view', 'method')
+    ),
+}
+
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s|%\(\w+\)s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalized SQL, literals and placeholders are replaced with ? and
+    lists of them (IN, VALUES) are collapsed, so the queries which
+    differ by parameters only have the same fingerprint.
+    """
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint_id(normalized_sql: str) -> str:
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:12]
+
+
+def observe_serialization(request: 'HttpRequest', started: float) -> None:
+    """
+    Adds time since started to serialization time of the request if it
+    is sampled by api.middleware.MetricsMiddleware.
+    """
+    # the attribute is set on django request, not on DRF wrapper
+    request = getattr(request, '_request', request)
+    if hasattr(request, '_metrics_serialize_duration'):
+        request._metrics_serialize_duration += time.perf_counter() - started
+
+
+def escape_label(value: str) -> str:
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_labels(names: 'Tuple[str, ...]', values: tuple) -> str:
+    return ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(names, values)
+    )
+
+
+class MetricsRegistry:
+    """
+    In process metrics of API requests in Prometheus text format, every
+    worker process has its own registry, so each of them is scraped
+    (or counters are summed by the collector).
+    """
+
+    def __init__(self, buckets: 'Tuple[float, ...]' = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self.lock:
+            # (view, method, status) -> count
+            self.requests: 'Dict[tuple, int]' = defaultdict(int)
+            # (view, method) -> [bucket counts..., sum, count]
+            self.durations: 'Dict[tuple, List[float]]' = {}
+            # name -> (view, method) -> [sum, count]
+            self.summaries: 'Dict[str, Dict[tuple, List[float]]]' = {
+                name: defaultdict(lambda: [0.0, 0]) for name in SUMMARIES
+            }
+            # (view, method) -> count
+            self.slow_queries: 'Dict[tuple, int]' = defaultdict(int)
+
+    def observe_request(
+        self, view: str, method: str, status: int, duration: float
+    ) -> None:
+        with self.lock:
+            self.requests[(view, method, str(status))] += 1
+            histogram = self.durations.setdefault(
+                (view, method), [0] * (len(self.buckets) + 2)
+            )
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[index] += 1
+            histogram[-2] += duration
+            histogram[-1] += 1
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        with self.lock:
+            summary = self.summaries[name][labels]
+            summary[0] += value
+            summary[1] += 1
+
+    def observe_slow_query(self, view: str, method: str) -> None:
+        with self.lock:
+            self.slow_queries[(view, method)] += 1
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, help_text: str, metric_type: str) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        with self.lock:
+            header('api_requests_total', 'API requests.', 'counter')
+            for labels, count in sorted(self.requests.items()):
+                lines.append('api_requests_total{%s} %d' % (
+                    format_labels(('view', 'method', 'status'), labels), count
+                ))
+
+            header(
+                'api_request_duration_seconds',
+                'API request duration.',
+                'histogram'
+            )
+            for labels, histogram in sorted(self.durations.items()):
+                label_text = format_labels(('view', 'method'), labels)
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(
+                        'api_request_duration_seconds_bucket'
+                        '{%s,le="%s"} %d' % (label_text, bound, count)
+                    )
+                lines.append(
+                    'api_request_duration_seconds_bucket'
+                    '{%s,le="+Inf"} %d' % (label_text, histogram[-1])
+                )
+                lines.append('api_request_duration_seconds_sum{%s} %s' % (
+                    label_text, repr(histogram[-2])
+                ))
+                lines.append('api_request_duration_seconds_count{%s} %d' % (
+                    label_text, histogram[-1]
+                ))
+
+            for name, (help_text, label_names) in SUMMARIES.items():
+                header(name, help_text, 'summary')
+                for labels, (total, count) in sorted(
+                    self.summaries[name].items()
+                ):
+                    label_text = format_labels(label_names, labels)
+                    lines.append(
+                        f'{name}_sum{{{label_text}}} {repr(float(total))}'
+                    )
+                    lines.append(f'{name}_count{{{label_text}}} {count}')
+
+            header(
+                'api_slow_queries_total',
+                'SQL queries slower than METRICS_SLOW_QUERY_MS.',
+                'counter'
+            )
+            for labels, count in sorted(self.slow_queries.items()):
+                lines.append('api_slow_queries_total{%s} %d' % (
+                    format_labels(('view', 'method'), labels), count
+                ))
+
+        header('api_metrics_sample_rate', 'Sampled requests rate.', 'gauge')
+        lines.append(f'api_metrics_sample_rate {settings.METRICS_SAMPLE_RATE}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting queries and SQL time, queries
+    slower than slow_query_ms are logged with their fingerprint.
+    """
+
+    def __init__(self, view: str = '', method: str = ''):
+        self.view = view
+        self.method = method
+        self.count = 0
+        self.duration = 0.0
+        self.slow_query_ms = settings.METRICS_SLOW_QUERY_MS
+
+    def __call__(
+        self,
+        execute: 'Callable',
+        sql: str,
+        params: tuple,
+        many: bool,
+        context: 'Dict[str, CursorWrapper]'
+    ):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if self.slow_query_ms and duration * 1000 >= self.slow_query_ms:
+                self.log_slow_query(sql, duration)
+
+    def log_slow_query(self, sql: str, duration: float) -> None:
+        registry.observe_slow_query(self.view, self.method)
+        normalized_sql = fingerprint(sql)
+        slow_query_logger.warning(
+            'Slow query %s (%.1fms) in %s %s: %s',
+            fingerprint_id(normalized_sql),
+            duration * 1000,
+            self.method,
+            self.view,
+            normalized_sql,
+            extra={
+                'fingerprint': fingerprint_id(normalized_sql),
+                'duration_ms': duration * 1000,
+                'view': self.view,
+            }
+        )
+
+
+def record_queries(recorder: QueryRecorder) -> ExitStack:
+    """
+    Wraps queries of the database connections of the current thread
+    with recorder until the returned stack is closed.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+    return stack
@@ -0,0 +1,192 @@
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api.metrics import QueryRecorder, record_queries, registry
+
+if TYPE_CHECKING:
+    from django.http import HttpRequest
+    from django.http.response import HttpResponseBase
+    from django.template.response import SimpleTemplateResponse
+
+METRICS_VIEW_NAME = 'metrics'
+
+
+def get_view_name(request: 'HttpRequest') -> str:
+    # url names keep labels cardinality bounded, unlike paths
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return 'unmatched'
+    return resolver_match.view_name
+
+
+class MetricsMiddleware:
+    """
+    Per view request counts and durations and slow queries of all
+    requests, and query counts, SQL time, serialization time (of
+    api.views.ValuesReadMixin rows), render time and response size of
+    the requests sampled with METRICS_SAMPLE_RATE. Sampled responses get
+    Server-Timing header, the metrics are exposed by api.views.metrics.
+    Async views run in executor threads (api.views.AsyncReadMixin), so
+    only durations and sizes of their requests are recorded here, their
+    slow queries are recorded by the view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: 'Callable'):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: 'HttpRequest') -> 'HttpResponseBase':
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        # queries of every request are timed for the slow query log,
+        # the other timings are of sampled requests only
+        request._metrics_recorder = recorder = QueryRecorder(
+            method=request.method
+        )
+        sampled = random.random() < settings.METRICS_SAMPLE_RATE
+        if sampled:
+            request._metrics_serialize_duration = 0.0
+            request._metrics_render_duration = 0.0
+        with record_queries(recorder):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # the body is produced after the response is returned
+            response.streaming_content = self.stream(
+                request,
+                response,
+                response.streaming_content,
+                started,
+                sampled
+            )
+        else:
+            if sampled:
+                self.observe_sample(request, len(response.content))
+            self.observe_request(request, response, started)
+        if sampled:
+            response['Server-Timing'] = self.get_server_timing(
+                request, time.perf_counter() - started
+            )
+        return response
+
+    async def __acall__(
+        self, request: 'HttpRequest'
+    ) -> 'HttpResponseBase':
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        view = get_view_name(request)
+        if (
+            view != METRICS_VIEW_NAME
+            and not response.streaming
+            and random.random() < settings.METRICS_SAMPLE_RATE
+        ):
+            registry.observe(
+                'api_response_size_bytes',
+                (view, request.method),
+                len(response.content)
+            )
+            duration = time.perf_counter() - started
+            response['Server-Timing'] = f'total;dur={duration * 1000:.2f}'
+        self.observe_request(request, response, started)
+        return response
+
+    def process_view(self, request: 'HttpRequest', *args) -> None:
+        recorder = getattr(request, '_metrics_recorder', None)
+        if recorder is not None:
+            recorder.view = get_view_name(request)
+
+    def process_template_response(
+        self, request: 'HttpRequest', response: 'SimpleTemplateResponse'
+    ) -> 'SimpleTemplateResponse':
+        if not hasattr(request, '_metrics_render_duration'):
+            return response
+
+        # rendered right after this hook
+        started = time.perf_counter()
+
+        def rendered(response: 'SimpleTemplateResponse') -> None:
+            request._metrics_render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def stream(
+        self,
+        request: 'HttpRequest',
+        response: 'HttpResponseBase',
+        content: 'Iterable[bytes]',
+        started: float,
+        sampled: bool
+    ) -> 'Iterator[bytes]':
+        size = 0
+        try:
+            with record_queries(request._metrics_recorder):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            if sampled:
+                self.observe_sample(request, size)
+            self.observe_request(request, response, started)
+
+    def observe_request(
+        self,
+        request: 'HttpRequest',
+        response: 'HttpResponseBase',
+        started: float
+    ) -> None:
+        view = get_view_name(request)
+        if view == METRICS_VIEW_NAME:
+            return
+        registry.observe_request(
+            view,
+            request.method,
+            response.status_code,
+            time.perf_counter() - started
+        )
+
+    def observe_sample(self, request: 'HttpRequest', size: int) -> None:
+        view = get_view_name(request)
+        if view == METRICS_VIEW_NAME:
+            return
+        recorder = request._metrics_recorder
+        labels = (view, request.method)
+        registry.observe('api_db_queries', labels, recorder.count)
+        registry.observe('api_db_duration_seconds', labels, recorder.duration)
+        registry.observe(
+            'api_serialize_duration_seconds',
+            labels,
+            request._metrics_serialize_duration
+        )
+        registry.observe(
+            'api_render_duration_seconds',
+            labels,
+            request._metrics_render_duration
+        )
+        registry.observe('api_response_size_bytes', labels, size)
+
+    def get_server_timing(
+        self, request: 'HttpRequest', duration: float
+    ) -> str:
+        recorder = request._metrics_recorder
+        return ', '.join([
+            f'db;dur={recorder.duration * 1000:.2f};'
+            f'desc="{recorder.count} queries"',
+            f'serialize;dur='
+            f'{request._metrics_serialize_duration * 1000:.2f}',
+            f'render;dur={request._metrics_render_duration * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
@@ -0,0 +1,196 @@
+import base64
+import binascii
+import json
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+if TYPE_CHECKING:
+    from django.db.models.query import QuerySet
+    from rest_framework.request import Request
+    from rest_framework.views import APIView
+
+
+class DefaultPagination(PageNumberPagination):
+    """
+    Page number pagination, enabled for all requests by PAGE_SIZE setting
+    or per request by page_size query parameter.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward only keyset pagination over queryset ordering (+ pk as a
+    tiebreaker), the cursor keeps values of the last row of the page so
+    any page is fetched by index range scan instead of OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+    invalid_ordering_message = 'Ordering is not supported by cursor'
+
+    def get_page_size(self, request: 'Request') -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            page_size = api_settings.PAGE_SIZE or self.max_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, queryset: 'QuerySet') -> 'List[str]':
+        ordering = list(queryset.query.order_by)
+        if not ordering and queryset.query.default_ordering:
+            ordering = list(queryset.model._meta.ordering)
+        if any(not isinstance(field, str) for field in ordering):
+            raise NotFound(self.invalid_ordering_message)
+        pk_name = queryset.model._meta.pk.name
+        if not {'pk', pk_name} & {field.lstrip('-') for field in ordering}:
+            # field name instead of pk to be found in values() rows
+            ordering.append(pk_name)
+        return ordering
+
+    def decode_cursor(self, request: 'Request') -> 'Optional[List]':
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, ValueError) as err:
+            raise NotFound(self.invalid_cursor_message) from err
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position: 'List') -> str:
+        return base64.urlsafe_b64encode(
+            json.dumps(position, cls=DjangoJSONEncoder).encode()
+        ).decode()
+
+    def get_position(self, item: Any, ordering: 'List[str]') -> 'List':
+        fields = [field.lstrip('-') for field in ordering]
+        if isinstance(item, dict):
+            return [item[field] for field in fields]
+        return [attrgetter(field.replace('__', '.'))(item) for field in fields]
+
+    def get_position_filter(
+        self, ordering: 'List[str]', position: 'List'
+    ) -> 'Q':
+        # (a, b) > (x, y) -> a > x OR (a = x AND b > y)
+        condition = Q()
+        for idx, order in enumerate(ordering):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': position[idx]})
+            for prev_order, value in zip(ordering[:idx], position):
+                step &= Q(**{prev_order.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def paginate_queryset(
+        self,
+        queryset: 'QuerySet',
+        request: 'Request',
+        view: 'APIView' = None
+    ) -> 'List':
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            if len(position) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(
+                self.get_position_filter(self.ordering, position)
+            )
+
+        page = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_next_link(self) -> 'Optional[str]':
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        position = self.get_position(self.page[-1], self.ordering)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position)
+        )
+
+    def get_first_link(self) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, '')
+
+    def get_paginated_response(self, data: 'List') -> Response:
+        return Response({
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'first': {'type': 'string'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOrPageNumberPagination(BasePagination):
+    """
+    Keyset pagination if cursor query parameter is present (may be empty
+    for the first page), default pagination otherwise.
+    """
+    keyset_pagination_class = KeysetPagination
+    page_pagination_class = DefaultPagination
+
+    def __init__(self) -> None:
+        self.keyset_pagination = self.keyset_pagination_class()
+        self.page_pagination = self.page_pagination_class()
+        self.pagination = self.page_pagination
+
+    def paginate_queryset(
+        self,
+        queryset: 'QuerySet',
+        request: 'Request',
+        view: 'APIView' = None
+    ) -> 'Optional[List]':
+        cursor_param = self.keyset_pagination.cursor_query_param
+        self.pagination = (
+            self.keyset_pagination
+            if cursor_param in request.query_params
+            else self.page_pagination
+        )
+        return self.pagination.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: 'List') -> Response:
+        return self.pagination.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return self.page_pagination.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view: 'APIView') -> 'List':
+        return [
+            *self.page_pagination.get_schema_operation_parameters(view),
+            {
+                'name': self.keyset_pagination.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -0,0 +1,84 @@
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple
+
+from rest_framework import serializers
+
+if TYPE_CHECKING:
+    from django.db.models import Expression
+    from django.db.models.query import QuerySet
+
+# (field name, values() key, to_representation or nested fields)
+ValuesField = Tuple[str, Optional[str], 'Optional[Callable | List]']
+
+
+class ValuesSerializerMixin:
+    """
+    Read path over queryset.values() rows, the representation is built
+    by to_representation of the readable fields (nested serializers
+    included) without model instances, so it is the same as the output
+    of the serializer itself.
+    Sources which are not model fields (properties) are annotated with
+    values_expressions, supported on the top level serializer only.
+    """
+    values_expressions: 'dict[str, Expression]' = {}
+
+    def get_values_fields(
+        self, serializer: 'serializers.Serializer' = None, prefix: str = ''
+    ) -> 'List[ValuesField]':
+        serializer = self if serializer is None else serializer
+        fields = []
+        for field in serializer._readable_fields:
+            path = f'{prefix}{field.source.replace(".", "__")}'
+            if isinstance(field, serializers.BaseSerializer):
+                fields.append((
+                    field.field_name,
+                    None,
+                    self.get_values_fields(field, f'{path}__')
+                ))
+            elif isinstance(field, serializers.ReadOnlyField):
+                fields.append((field.field_name, path, None))
+            else:
+                fields.append(
+                    (field.field_name, path, field.to_representation)
+                )
+        return fields
+
+    def get_values_paths(self, fields: 'List[ValuesField]') -> 'List[str]':
+        paths = []
+        for _, path, represent in fields:
+            if path is None:
+                paths.extend(self.get_values_paths(represent))
+            elif path not in self.values_expressions:
+                paths.append(path)
+        return paths
+
+    def get_values_queryset(self, queryset: 'QuerySet') -> 'QuerySet':
+        # annotations rows are ordered by (search rank) are selected too,
+        # keyset cursors take the positions from rows
+        ordering_annotations = [
+            order.lstrip('-') for order in queryset.query.order_by
+            if isinstance(order, str)
+            and order.lstrip('-') in queryset.query.annotations
+            and order.lstrip('-') not in self.values_expressions
+        ]
+        return queryset.values(
+            *self.get_values_paths(self.get_values_fields()),
+            *ordering_annotations,
+            **self.values_expressions
+        )
+
+    def to_values_representation(self, rows: 'Iterable[dict]') -> 'List[dict]':
+        fields = self.get_values_fields()
+
+        def represent(row: dict, fields: 'List[ValuesField]') -> dict:
+            ret = {}
+            for name, path, to_representation in fields:
+                if path is None:
+                    ret[name] = represent(row, to_representation)
+                    continue
+                value = row[path]
+                if value is not None and to_representation is not None:
+                    value = to_representation(value)
+                ret[name] = value
+            return ret
+
+        return [represent(row, fields) for row in rows]
@@ -71,6 +71,7 @@ MIDDLEWARE = [
         for app in ['debug_toolbar.middleware.DebugToolbarMiddleware']
         if DEBUG
     ],
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -127,6 +128,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        # e.g. django.core.cache.backends.redis.RedisCache
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Catalogue responses cache, see api.cache
+RESPONSE_CACHE_ENABLED = bool(int(os.environ.get('RESPONSE_CACHE_ENABLED', 1)))
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -168,11 +188,55 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Row locking of reservations: off, wait, nowait or skip_locked,
+# nowait and skip_locked fail fast with 409 if a unit is locked
+RESERVATION_LOCK_MODE = os.environ.get('RESERVATION_LOCK_MODE', 'wait')
+
+# Reservations not changed for RESERVATION_TTL seconds are expired and
+# their stock is returned by expire_reservations command or by the
+# in-process reaper run every RESERVATION_REAPER_INTERVAL seconds,
+# 0 turns them off
+RESERVATION_TTL = int(os.environ.get('RESERVATION_TTL', 0))
+RESERVATION_REAPER_INTERVAL = int(
+    os.environ.get('RESERVATION_REAPER_INTERVAL', 0)
+)
+RESERVATION_REAPER_BATCH_SIZE = int(
+    os.environ.get('RESERVATION_REAPER_BATCH_SIZE', 500)
+)
+
+# Units API filters, orders and shows shop name by denormalized
+# Unit.shop_name instead of join to shops (the column is always synced)
+UNIT_SHOP_NAME_DENORMALIZED = bool(
+    int(os.environ.get('UNIT_SHOP_NAME_DENORMALIZED', 1))
+)
+
+# Default page size of all list endpoints, page_size query parameter
+# changes it up to API_MAX_PAGE_SIZE, 0 turns pagination off unless
+# page_size (or cursor for units) is requested
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+# Rows fetched from server side cursor per chunk of ?stream= responses
+API_STREAM_CHUNK_SIZE = int(os.environ.get('API_STREAM_CHUNK_SIZE', 2000))
+# Threads (and so database connections) per process of the async views
+# (/api/async/), 0 runs them in the thread sensitive executor
+API_ASYNC_THREADS = int(os.environ.get('API_ASYNC_THREADS', 16))
+
+# Instrumentation of API requests, see api.middleware.MetricsMiddleware,
+# queries, SQL and render time are recorded for sampled requests only,
+# /metrics requires Authorization: Bearer METRICS_TOKEN and is not found
+# (404) if the token is not set
+METRICS_ENABLED = bool(int(os.environ.get('METRICS_ENABLED', 1)))
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 0.1))
+METRICS_SLOW_QUERY_MS = float(os.environ.get('METRICS_SLOW_QUERY_MS', 200))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.DefaultPagination',
+    'PAGE_SIZE': API_PAGE_SIZE or None,
 }
@@ -25,6 +25,12 @@ DATABASES = {
     }
 }
 
+# Cache is not rolled back with test transactions
+RESPONSE_CACHE_ENABLED = False
+
+# Async views run in the test thread, others do not see test transactions
+API_ASYNC_THREADS = 0
+
 REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {}
 REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = {}
 
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+if TYPE_CHECKING:
+    from rest_framework.response import Response
+
+
+class QueryBudgetMixin:
+    """
+    Query budget assertions of test cases, a budget is the maximum
+    number of queries (session and user lookups of the client
+    included), so it catches N+1 queries when it is checked with
+    growing result set.
+    """
+
+    @contextmanager
+    def assertMaxQueries(
+        self, budget: int, using: str = DEFAULT_DB_ALIAS
+    ) -> 'Iterator[CaptureQueriesContext]':
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context.captured_queries)
+        if executed > budget:
+            self.fail(
+                f'{executed} queries executed, {budget} allowed:\n'
+                + '\n'.join(
+                    f'{number}. {query["sql"]}' for number, query in
+                    enumerate(context.captured_queries, 1)
+                )
+            )
+
+    def assertQueryBudget(
+        self,
+        budget: int,
+        request: 'Callable[[], Response]',
+        grow: 'Callable[[], None]',
+        using: str = DEFAULT_DB_ALIAS
+    ) -> None:
+        """
+        Make request before and after grow of the data it reads, both
+        must be done within the budget and with the same number of
+        queries.
+        """
+        counts = []
+        for step in ('initial', 'grown'):
+            if step == 'grown':
+                grow()
+            with self.assertMaxQueries(budget, using) as context:
+                response = request()
+            self.assertLess(
+                response.status_code, 300, f'{step} request failed'
+            )
+            counts.append(len(context.captured_queries))
+        self.assertEqual(
+            counts[0], counts[1], 'Number of queries depends on data size'
+        )
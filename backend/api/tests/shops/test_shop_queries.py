@@ -0,0 +1,22 @@
+# sourcery skip: snake-case-functions
+from api.tests.queries import QueryBudgetMixin
+from api.tests.shops.base import BaseShopTest
+from api.tests.shops.factories import ShopFactory
+
+
+class TestShopsQueries(QueryBudgetMixin, BaseShopTest):
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def grow(self) -> None:
+        ShopFactory.create_batch(10)
+
+    def test__shops_list__query_budget(self) -> None:
+        self.assertQueryBudget(
+            4, lambda: self.client.get(self.shops_list_url), self.grow
+        )
+
+    def test__shop_detail__query_budget(self) -> None:
+        self.assertQueryBudget(
+            3, lambda: self.client.get(self.shops_detail_url), self.grow
+        )
@@ -1,5 +1,6 @@
 # sourcery skip: snake-case-functions
 from rest_framework import status
+from rest_framework.reverse import reverse
 
 from api.tests.shops.base import BaseShopTest
 
@@ -28,9 +29,46 @@ class TestShopView(BaseShopTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), len(self.shops))
 
+    def test__get_paginated_shops_list_authorised__success(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(f'{self.shops_list_url}?page_size=3&page=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], len(self.shops))
+        self.assertEqual(
+            [i['id'] for i in response.data['results']], [self.shops[3].id]
+        )
+
     def test__get_shops_detail_authorised__success(self) -> None:
         self.client.force_login(self.user)
         response = self.client.get(self.shops_detail_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['id'], self.shops[0].id)
         self.assertEqual(response.data['name'], self.shops[0].name)
+
+
+class TestAsyncShopsView(BaseShopTest):
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test__async_shops__same_as_sync(self) -> None:
+        for url, async_url in [
+            (self.shops_list_url, reverse('async-shop-list')),
+            (
+                f'{self.shops_list_url}?page_size=3',
+                f'{reverse("async-shop-list")}?page_size=3'
+            ),
+            (
+                self.shops_detail_url,
+                reverse('async-shop-detail', args=(self.shops[0].id,))
+            ),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                async_response = self.client.get(async_url)
+                self.assertEqual(
+                    async_response.status_code, status.HTTP_200_OK
+                )
+                self.assertEqual(
+                    async_response.content.replace(b'/async', b''),
+                    response.content
+                )
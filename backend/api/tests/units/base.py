@@ -73,6 +73,13 @@ class BaseReservedUnitsTest(APITestCase):
             'reserved-unit-clear'
         )
 
+        cls.reserved_units_bulk_url = reverse_lazy(
+            'reserved-unit-bulk'
+        )
+
         cls.reserved_units_search_url = reverse_lazy(
             'reserved-search-list', args=(cls.user.username,)
         )
+        cls.reserved_units_search_query_url = reverse_lazy(
+            'reserved-search-query-list'
+        )
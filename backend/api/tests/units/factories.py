@@ -1,3 +1,5 @@
+from string import ascii_lowercase
+
 import factory
 
 from api.tests.shops.factories import ShopFactory
@@ -6,12 +8,20 @@ from api.tests.users.factories import UserFactory
 from units.models import ReservedUnit, Unit
 
 
+def get_unit_name(n: int) -> str:
+    # code of the same length, so a name is not a prefix (typeahead
+    # search) match of another one
+    return 'Unit ' + ''.join(
+        ascii_lowercase[n // 26 ** i % 26] for i in range(3, -1, -1)
+    )
+
+
 class UnitFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Unit
 
     shop = factory.SubFactory(ShopFactory)
-    name = factory.Faker('sentence', nb_words=2)
+    name = factory.Sequence(get_unit_name)
     weight = factory.Faker(
         'pydecimal', min_value=1, max_value=50, right_digits=2
     )
@@ -0,0 +1,171 @@
+# sourcery skip: snake-case-functions
+import asyncio
+import threading
+
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse, reverse_lazy
+
+from api.cache import get_cache
+from api.tests.units.base import BaseReservedUnitsTest, BaseUnitsTest
+from api.tests.units.factories import UnitFactory
+from api.tests.users.factories import UserFactory
+from api.views import get_async_views_executor
+
+
+class TestAsyncUnitsView(BaseUnitsTest):
+    async_units_list_url = reverse_lazy('async-unit-list')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def assertSameResponse(self, query: str) -> None:
+        response = self.client.get(f'{self.units_list_url}{query}')
+        async_response = self.client.get(f'{self.async_units_list_url}{query}')
+        self.assertEqual(async_response.status_code, response.status_code)
+        self.assertEqual(
+            async_response.content.replace(b'/async', b''), response.content
+        )
+
+    def test__async_units_list__same_as_sync(self) -> None:
+        for query in [
+            '',
+            f'?shop__name={self.units[0].shop.name}',
+            f'?search={self.units[0].name}&ordering=-price',
+            '?price_for_kg__gte=1',
+            '?page_size=2&page=2',
+            '?page_size=2&page=9',
+            '?page_size=2&cursor=',
+            '?cursor=invalid',
+        ]:
+            with self.subTest(query=query):
+                self.assertSameResponse(query)
+
+    def test__async_unit_detail__same_as_sync(self) -> None:
+        response = self.client.get(self.units_detail_url)
+        async_response = self.client.get(
+            reverse('async-unit-detail', args=(self.units[0].id,))
+        )
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.content, response.content)
+
+        response = self.client.get(reverse('async-unit-detail', args=(0,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test__async_units_list_unauthorised__forbidden(self) -> None:
+        self.client.logout()
+        response = self.client.get(self.async_units_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test__async_units_list_unsafe_method__not_allowed(self) -> None:
+        response = self.client.post(self.async_units_list_url)
+        self.assertEqual(
+            response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    def test__async_units_list_stream__bad_request(self) -> None:
+        response = self.client.get(f'{self.async_units_list_url}?stream=1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test__async_units_list_cached__not_modified(self) -> None:
+        get_cache().clear()
+        response = self.client.get(self.async_units_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(2):
+            cached_response = self.client.get(self.async_units_list_url)
+        self.assertEqual(cached_response.content, response.content)
+
+        response = self.client.get(
+            self.async_units_list_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test__async_units_list_asgi__success(self) -> None:
+        response = await self.async_client.get(
+            f'{self.async_units_list_url}?page_size=3'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], len(self.units))
+        self.assertEqual(len(response.json()['results']), 3)
+
+        response = await self.async_client.get(
+            reverse('async-unit-detail', args=(self.units[0].id,))
+        )
+        self.assertEqual(response.json()['id'], self.units[0].id)
+
+
+class TestAsyncReservedUnitsView(BaseReservedUnitsTest):
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test__async_reserved_units__same_as_sync(self) -> None:
+        for url, async_url in [
+            (
+                self.reserved_units_list_url,
+                reverse('async-reserved-unit-list')
+            ),
+            (
+                f'{self.reserved_units_list_url}?ordering=-unit__price',
+                f'{reverse("async-reserved-unit-list")}?ordering=-unit__price'
+            ),
+            (
+                self.reserved_unit_detail_url,
+                reverse(
+                    'async-reserved-unit-detail',
+                    args=(self.reserved_units[0].id,)
+                )
+            ),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                async_response = self.client.get(async_url)
+                self.assertEqual(
+                    async_response.status_code, status.HTTP_200_OK
+                )
+                self.assertEqual(async_response.content, response.content)
+
+    def test__async_other_user_reserved_unit__not_found(self) -> None:
+        response = self.client.get(
+            reverse(
+                'async-reserved-unit-detail',
+                args=(self.other_reserved_unit.id,)
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(API_ASYNC_THREADS=2)
+class TestAsyncUnitsViewExecutor(TransactionTestCase):
+    threads = 2
+
+    def setUp(self) -> None:
+        self.units = [UnitFactory() for _ in range(3)]
+        self.async_client.force_login(UserFactory())
+        self.addCleanup(self.close_executor_connections)
+
+    def close_executor_connections(self) -> None:
+        # every thread of the executor closes its connection
+        barrier = threading.Barrier(self.threads)
+
+        def close() -> None:
+            barrier.wait()
+            connections.close_all()
+
+        executor = get_async_views_executor(self.threads)
+        for future in [
+            executor.submit(close) for _ in range(self.threads)
+        ]:
+            future.result()
+
+    async def test__async_units_list_concurrently__success(self) -> None:
+        responses = await asyncio.gather(*[
+            self.async_client.get(reverse('async-unit-list'))
+            for _ in range(self.threads * 2)
+        ])
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()['count'], len(self.units))
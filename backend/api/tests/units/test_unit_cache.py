@@ -0,0 +1,182 @@
+# sourcery skip: snake-case-functions
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.cache import get_cache
+from api.tests.shops.factories import ShopFactory
+from api.tests.units.base import BaseUnitsTest
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from units.models import Unit
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class TestUnitsCache(BaseUnitsTest):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client.force_login(self.user)
+
+    def test__cached_units_list__success(self) -> None:
+        response = self.client.get(self.units_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as context:
+            cached_response = self.client.get(self.units_list_url)
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.json(), response.json())
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+        self.assertFalse(
+            [
+                query for query in context.captured_queries
+                if 'units_unit' in query['sql']
+            ]
+        )
+
+    def test__units_list_if_none_match__not_modified(self) -> None:
+        response = self.client.get(self.units_detail_url)
+
+        response = self.client.get(
+            self.units_detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test__units_list_query_order__same_entry(self) -> None:
+        response = self.client.get(
+            f'{self.units_list_url}?name={self.units[0].name}&ordering=price'
+        )
+
+        other_response = self.client.get(
+            f'{self.units_list_url}?ordering=price&name={self.units[0].name}'
+        )
+        self.assertEqual(response['ETag'], other_response['ETag'])
+
+    def test__units_changed__invalidated(self) -> None:
+        list_response = self.client.get(self.units_list_url)
+        detail_response = self.client.get(self.units_detail_url)
+
+        unit = self.units[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            unit.price += 1
+            unit.save(update_fields=('price',))
+
+        response = self.client.get(
+            self.units_detail_url, HTTP_IF_NONE_MATCH=detail_response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['price'], str(unit.price))
+        response = self.client.get(self.units_list_url)
+        self.assertNotEqual(response['ETag'], list_response['ETag'])
+
+    def test__other_unit_changed__detail_not_invalidated(self) -> None:
+        response = self.client.get(self.units_detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservedUnitFactory(unit=self.units[1], amount=1)
+
+        cached_response = self.client.get(self.units_detail_url)
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+
+    def test__unit_reserved__invalidated(self) -> None:
+        response = self.client.get(self.units_detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservedUnitFactory(unit=self.units[0], amount=1)
+
+        response = self.client.get(
+            self.units_detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['amount'],
+            Unit.objects.get(id=self.units[0].id).amount
+        )
+
+    def test__units_mass_update__invalidated(self) -> None:
+        response = self.client.get(self.units_detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Unit.objects.filter(id=self.units[0].id).update(amount=0)
+
+        response = self.client.get(
+            self.units_detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['amount'], 0)
+
+    def test__shop_renamed__units_invalidated(self) -> None:
+        response = self.client.get(self.units_list_url)
+
+        shop = self.units[0].shop
+        with self.captureOnCommitCallbacks(execute=True):
+            shop.name = f'{shop.name} renamed'
+            shop.save(update_fields=('name',))
+
+        response = self.client.get(
+            self.units_list_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test__other_shop_unit_reserved__shop_list_not_invalidated(
+        self
+    ) -> None:
+        shop_url = f'{self.units_list_url}?shop__name={self.units[2].shop}'
+        response = self.client.get(shop_url)
+        list_response = self.client.get(self.units_list_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservedUnitFactory(unit=self.units[0], amount=1)
+
+        cached_response = self.client.get(
+            shop_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(
+            cached_response.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        # not filtered lists show all shops
+        response = self.client.get(
+            self.units_list_url, HTTP_IF_NONE_MATCH=list_response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test__shop_unit_reserved__shop_list_invalidated(self) -> None:
+        shop_url = f'{self.units_list_url}?shop__name={self.units[2].shop}'
+        response = self.client.get(shop_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservedUnitFactory(unit=self.units[2], amount=1)
+
+        response = self.client.get(
+            shop_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test__unit_moved__old_shop_list_invalidated(self) -> None:
+        shop_url = f'{self.units_list_url}?shop__name={self.units[2].shop}'
+        response = self.client.get(shop_url)
+        self.assertEqual(response.data['count'], 1)
+
+        unit = Unit.objects.get(id=self.units[2].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            unit.shop = self.units[0].shop
+            unit.save(update_fields=('shop',))
+
+        response = self.client.get(
+            shop_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+
+    def test__shop_created__missing_shop_list_invalidated(self) -> None:
+        shop_url = f'{self.units_list_url}?shop__name=New shop'
+        response = self.client.get(shop_url)
+        self.assertEqual(response.data['count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UnitFactory(shop=ShopFactory(name='New shop'))
+
+        response = self.client.get(
+            shop_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
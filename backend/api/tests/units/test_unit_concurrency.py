@@ -0,0 +1,338 @@
+# sourcery skip: snake-case-functions
+from datetime import timedelta
+from decimal import Decimal
+from threading import Barrier, Event, Thread
+from typing import Callable, List
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+from units.models import ReservedUnit, Unit
+from units.reaper import ReservationReaper
+from units.utils import UnitsUtil
+
+
+class TestReservedUnitsConcurrency(TransactionTestCase):
+    threads_count = 24
+
+    def run_concurrently(self, target: Callable, args_list: List) -> List:
+        barrier = Barrier(len(args_list))
+        results = []
+
+        def worker(*args) -> None:
+            try:
+                barrier.wait()
+                results.append(target(*args))
+            finally:
+                connection.close()
+
+        threads = [Thread(target=worker, args=args) for args in args_list]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def get_client(self, user: 'UserFactory') -> APIClient:
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test__post_reserved_units_concurrently__no_oversell(self) -> None:
+        unit = UnitFactory(amount=10)
+        users = [UserFactory() for _ in range(self.threads_count)]
+
+        def reserve(user: 'UserFactory') -> int:
+            return self.get_client(user).post(
+                reverse('reserved-unit-list'),
+                data={'user_id': user.id, 'unit_id': unit.id},
+                format='json'
+            ).status_code
+
+        results = self.run_concurrently(reserve, [(user,) for user in users])
+
+        self.assertEqual(results.count(status.HTTP_201_CREATED), 10)
+        self.assertEqual(
+            results.count(status.HTTP_400_BAD_REQUEST),
+            self.threads_count - 10
+        )
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 0)
+        self.assertEqual(ReservedUnit.objects.filter(unit=unit).count(), 10)
+
+    def test__post_sharded_reserved_units_concurrently__no_oversell(
+        self
+    ) -> None:
+        unit = UnitFactory(amount=10)
+        UnitsUtil().shard_stock([unit.id], 4)
+        users = [UserFactory() for _ in range(self.threads_count)]
+
+        def reserve(user: 'UserFactory') -> int:
+            return self.get_client(user).post(
+                reverse('reserved-unit-list'),
+                data={'user_id': user.id, 'unit_id': unit.id},
+                format='json'
+            ).status_code
+
+        def reshard() -> int:
+            return UnitsUtil().shard_stock([unit.id], 3)
+
+        results = self.run_concurrently(
+            lambda target, *args: target(*args),
+            [(reserve, user) for user in users] + [(reshard,)]
+        )
+
+        self.assertEqual(results.count(status.HTTP_201_CREATED), 10)
+        self.assertEqual(
+            results.count(status.HTTP_400_BAD_REQUEST),
+            self.threads_count - 10
+        )
+        self.assertEqual(ReservedUnit.objects.filter(unit=unit).count(), 10)
+        self.assertEqual(UnitsUtil().get_stock([unit.id]), {unit.id: 0})
+        UnitsUtil().fold_sharded_stock()
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 0)
+
+    def test__patch_reserved_unit_concurrently__consistent_amount(
+        self
+    ) -> None:
+        reserved_unit = ReservedUnitFactory(amount=1, unit__amount=100)
+        client = self.get_client(reserved_unit.user)
+        initial_total = reserved_unit.amount + reserved_unit.unit.amount
+
+        def patch(amount: int) -> int:
+            return client.patch(
+                reverse('reserved-unit-detail', args=(reserved_unit.id,)),
+                data={'amount': amount},
+                format='json'
+            ).status_code
+
+        results = self.run_concurrently(
+            patch, [(i + 1,) for i in range(self.threads_count)]
+        )
+
+        self.assertEqual(
+            results, [status.HTTP_200_OK] * self.threads_count
+        )
+        reserved_unit.refresh_from_db(fields=('amount',))
+        reserved_unit.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(
+            reserved_unit.amount + reserved_unit.unit.amount, initial_total
+        )
+
+    def test__buy_reserved_units_concurrently__charged_once(self) -> None:
+        user = UserFactory()
+        reserved_units = [
+            ReservedUnitFactory(user=user) for _ in range(3)
+        ]
+        total = sum(reserved_unit.total for reserved_unit in reserved_units)
+        user.app_account.amount = total * 2
+        user.app_account.save(update_fields=('amount',))
+        client = self.get_client(user)
+
+        def buy() -> Decimal:
+            return client.post(reverse('reserved-unit-buy')).data['total']
+
+        results = self.run_concurrently(
+            buy, [() for _ in range(self.threads_count)]
+        )
+
+        self.assertEqual(sorted(results)[-1], total)
+        self.assertEqual(len([i for i in results if i]), 1)
+        user.app_account.refresh_from_db(fields=('amount',))
+        self.assertEqual(user.app_account.amount, total)
+
+    def test__reserved_unit_created_while_buying_or_clearing__kept(
+        self
+    ) -> None:
+        for url_name, method in (
+            ('reserved-unit-buy', 'post'), ('reserved-unit-clear', 'delete')
+        ):
+            with self.subTest(url_name=url_name):
+                user = UserFactory()
+                reserved_unit = ReservedUnitFactory(
+                    user=user, amount=1, unit__price=Decimal('5.00')
+                )
+                stock = Unit.objects.get(id=reserved_unit.unit_id).amount
+                user.app_account.amount = Decimal('100.00')
+                user.app_account.save(update_fields=('amount',))
+                unit = UnitFactory(amount=10, price=Decimal('20.00'))
+                client = self.get_client(user)
+                lock_reserved_units = UnitsUtil.lock_reserved_units
+
+                def reserve() -> int:
+                    return client.post(
+                        reverse('reserved-unit-list'),
+                        data={
+                            'user_id': user.id,
+                            'unit_id': unit.id,
+                            'amount': 2,
+                        },
+                        format='json'
+                    ).status_code
+
+                def lock_and_reserve(*args) -> 'List[int]':
+                    # committed after the lock, before the changes
+                    locked_ids = lock_reserved_units(*args)
+                    self.assertEqual(
+                        self.run_concurrently(reserve, [()]),
+                        [status.HTTP_201_CREATED]
+                    )
+                    return locked_ids
+
+                with mock.patch.object(
+                    UnitsUtil,
+                    'lock_reserved_units',
+                    autospec=True,
+                    side_effect=lock_and_reserve
+                ):
+                    response = getattr(client, method)(reverse(url_name))
+                self.assertLess(response.status_code, 300)
+
+                self.assertEqual(
+                    list(
+                        user.reserved_units.values_list('unit_id', 'amount')
+                    ),
+                    [(unit.id, 2)]
+                )
+                unit.refresh_from_db(fields=('amount',))
+                self.assertEqual(unit.amount, 8)
+                user.app_account.refresh_from_db(fields=('amount',))
+                reserved_unit.unit.refresh_from_db(fields=('amount',))
+                if method == 'post':
+                    self.assertEqual(response.data['total'], Decimal('5.00'))
+                    self.assertEqual(
+                        user.app_account.amount, Decimal('95.00')
+                    )
+                else:
+                    self.assertEqual(reserved_unit.unit.amount, stock + 1)
+                    self.assertEqual(
+                        user.app_account.amount, Decimal('100.00')
+                    )
+
+    def test__post_reserved_unit_locked_nowait__conflict(self) -> None:
+        unit = UnitFactory(amount=10)
+        user = UserFactory()
+
+        def reserve() -> int:
+            return self.get_client(user).post(
+                reverse('reserved-unit-list'),
+                data={'user_id': user.id, 'unit_id': unit.id},
+                format='json'
+            ).status_code
+
+        for mode in ('nowait', 'skip_locked'):
+            with self.subTest(mode=mode), override_settings(
+                RESERVATION_LOCK_MODE=mode
+            ), transaction.atomic():
+                list(Unit.objects.select_for_update().filter(id=unit.id))
+                results = self.run_concurrently(reserve, [()])
+                self.assertEqual(results, [status.HTTP_409_CONFLICT])
+
+    def test__clear_reserved_units_concurrently__consistent_amount(
+        self
+    ) -> None:
+        units = [UnitFactory(amount=50) for _ in range(3)]
+        users = [UserFactory() for _ in range(self.threads_count // 2)]
+        for user in users:
+            for unit in units:
+                ReservedUnitFactory(user=user, unit=unit, amount=2)
+        initial_total = 50 * len(units)
+
+        def clear(user: 'UserFactory') -> int:
+            return self.get_client(user).delete(
+                reverse('reserved-unit-clear')
+            ).status_code
+
+        def reserve(user: 'UserFactory') -> int:
+            return self.get_client(user).patch(
+                reverse(
+                    'reserved-unit-detail',
+                    args=(user.reserved_units.get(unit=units[0]).id,)
+                ),
+                data={'amount': 3},
+                format='json'
+            ).status_code
+
+        self.run_concurrently(
+            lambda target, user: target(user),
+            [
+                (clear if idx % 2 else reserve, user)
+                for idx, user in enumerate(users)
+            ]
+        )
+
+        reserved_total = sum(
+            ReservedUnit.objects.filter(unit__in=units)
+            .values_list('amount', flat=True)
+        )
+        units_total = sum(
+            Unit.objects.filter(id__in=[unit.id for unit in units])
+            .values_list('amount', flat=True)
+        )
+        self.assertEqual(reserved_total + units_total, initial_total)
+        self.assertFalse(
+            ReservedUnit.objects.filter(user__in=users[1::2]).exists()
+        )
+
+    def test__parallel_reapers__stock_returned_once(self) -> None:
+        units = [UnitFactory(amount=100) for _ in range(3)]
+        for user in [UserFactory() for _ in range(30)]:
+            for unit in units:
+                ReservedUnitFactory(user=user, unit=unit, amount=1)
+        ReservedUnit.objects.update(
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+
+        results = self.run_concurrently(
+            lambda: ReservationReaper(3600, batch_size=7).run_once(),
+            [() for _ in range(4)]
+        )
+
+        self.assertEqual(sum(expired for expired, _ in results), 90)
+        self.assertFalse(ReservedUnit.objects.exists())
+        self.assertEqual(
+            list(
+                Unit.objects.filter(id__in=[unit.id for unit in units])
+                .values_list('amount', flat=True)
+            ),
+            [100] * 3
+        )
+
+    def test__reaper_locked_reservation__skipped(self) -> None:
+        locked, expired = ReservedUnitFactory.create_batch(2)
+        ReservedUnit.objects.update(
+            updated_at=timezone.now() - timedelta(hours=2)
+        )
+        locked_event, reaped_event = Event(), Event()
+
+        def lock() -> None:
+            with transaction.atomic():
+                list(
+                    ReservedUnit.objects.filter(id=locked.id)
+                    .select_for_update()
+                )
+                locked_event.set()
+                reaped_event.wait(10)
+
+        thread = Thread(target=lambda: (lock(), connection.close()))
+        thread.start()
+        locked_event.wait(10)
+        try:
+            result = ReservationReaper(3600).run_once()
+        finally:
+            reaped_event.set()
+            thread.join()
+
+        self.assertEqual(result, (1, 1))
+        self.assertEqual(
+            list(ReservedUnit.objects.values_list('id', flat=True)),
+            [locked.id]
+        )
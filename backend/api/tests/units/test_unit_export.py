@@ -0,0 +1,92 @@
+# sourcery skip: snake-case-functions
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from units.models import Unit
+
+
+class TestExportUnitsCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.units = [UnitFactory() for _ in range(4)]
+        cls.reserved_units = [
+            ReservedUnitFactory(unit=unit) for unit in cls.units[:2]
+        ]
+
+    def call(self, name: str, *args, **kwargs) -> 'tuple[str, str]':
+        stdout, stderr = StringIO(), StringIO()
+        call_command(name, *args, stdout=stdout, stderr=stderr, **kwargs)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test__export_units_csv__success(self) -> None:
+        stdout, stderr = self.call('export_units')
+
+        rows = list(csv.DictReader(StringIO(stdout)))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            sorted(unit.id for unit in self.units)
+        )
+        unit = Unit.objects.get(id=rows[0]['id'])
+        self.assertEqual(rows[0]['shop'], unit.shop.name)
+        self.assertEqual(rows[0]['price'], str(unit.price))
+        self.assertEqual(rows[0]['price_for_kg'], str(unit.price_for_kg))
+        self.assertIn('Exported 4 rows', stderr)
+        self.assertIn(f'last id {max(unit.id for unit in self.units)}', stderr)
+
+    def test__export_units_ndjson_to_file__success(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'units.ndjson')
+            self.call('export_units', format='ndjson', output=path)
+            with open(path, encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+
+        self.assertEqual(len(rows), len(self.units))
+        unit = Unit.objects.get(id=rows[0]['id'])
+        self.assertEqual(rows[0]['weight'], str(unit.weight))
+        self.assertEqual(rows[0]['amount'], unit.amount)
+
+    def test__export_units_since_id_and_shop__success(self) -> None:
+        units = sorted(self.units, key=lambda unit: unit.id)
+        stdout, _ = self.call(
+            'export_units',
+            '--shop', units[2].shop.name,
+            '--shop', units[0].shop.name,
+            since_id=units[0].id
+        )
+        rows = list(csv.DictReader(StringIO(stdout)))
+        self.assertEqual([int(row['id']) for row in rows], [units[2].id])
+
+    def test__export_nothing_since_id__success(self) -> None:
+        last_id = max(unit.id for unit in self.units)
+        stdout, stderr = self.call('export_units', since_id=last_id)
+        self.assertEqual(stdout.splitlines()[1:], [])
+        self.assertIn('Exported 0 rows', stderr)
+        self.assertIn(f'last id {last_id}', stderr)
+
+    def test__export_reserved_units__success(self) -> None:
+        reserved_unit = self.reserved_units[1]
+        stdout, _ = self.call(
+            'export_reserved_units',
+            format='ndjson',
+            user=[reserved_unit.user.username]
+        )
+        self.assertEqual(
+            [json.loads(line) for line in stdout.splitlines()],
+            [{
+                'id': reserved_unit.id,
+                'user_id': reserved_unit.user_id,
+                'user': reserved_unit.user.username,
+                'unit_id': reserved_unit.unit_id,
+                'shop': reserved_unit.unit.shop.name,
+                'unit': reserved_unit.unit.name,
+                'amount': reserved_unit.amount,
+            }]
+        )
@@ -0,0 +1,161 @@
+# sourcery skip: snake-case-functions
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from typing import Iterable
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from api.cache import UNITS_ALL_VERSION, UNITS_VERSION
+from api.tests.shops.factories import ShopFactory
+from api.tests.units.factories import UnitFactory
+from shops.models import Shop
+from units.importer import UnitsImporter
+from units.models import Unit
+
+
+class TestImportUnitsCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.shop = ShopFactory(name='Market')
+        cls.unit = UnitFactory(
+            shop=cls.shop,
+            name='Apple',
+            weight=Decimal('1.50'),
+            price=Decimal('3.00'),
+            amount=5
+        )
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def call(self, *args, **kwargs) -> 'tuple[str, str]':
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_units', *args, stdout=stdout, stderr=stderr, **kwargs
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test__import_csv__success(self) -> None:
+        path = self.write(
+            'units.csv',
+            'shop,name,weight,price,amount\n'
+            'MARKET,apple,1.5,4.50,7\n'
+            'Market,Pear,2,3.33,1\n'
+            'Farm,"Milk, 3%",1,1.25,\n'
+        )
+        stdout, stderr = self.call(path, batch_size=2)
+
+        self.assertIn('2 inserted', stdout)
+        self.assertIn('1 updated', stdout)
+        self.assertIn('1 shops created', stdout)
+        self.assertEqual(stderr, '')
+
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.price, Decimal('4.50'))
+        self.assertEqual(self.unit.amount, 7)
+        self.assertEqual(self.unit.price_for_kg, Decimal('3.00'))
+
+        pear = Unit.objects.get(name='Pear')
+        self.assertEqual(pear.shop, self.shop)
+        self.assertEqual(pear.price_for_kg, Decimal('1.67'))
+        milk = Unit.objects.get(name='Milk, 3%')
+        self.assertEqual(milk.shop.name, 'Farm')
+        self.assertEqual(milk.amount, 1)
+
+    def test__import_ndjson_rejected_rows__success(self) -> None:
+        path = self.write(
+            'units.ndjson',
+            '\n'.join([
+                json.dumps({'shop': 'Farm', 'name': 'Egg', 'price': '0.2'}),
+                json.dumps({'shop': 'Farm', 'name': 'Egg', 'price': '0.3'}),
+                json.dumps({'shop': 'Farm', 'name': '', 'price': '1'}),
+                json.dumps({'shop': 'Farm', 'name': 'Ham', 'price': '1.001'}),
+                json.dumps({'shop': 'Farm', 'name': 'Ham', 'price': -1}),
+                json.dumps(
+                    {'shop': 'Farm', 'name': 'Ham', 'price': 1, 'amount': 'x'}
+                ),
+                '{invalid',
+                '[]',
+            ])
+        )
+        rejects = os.path.join(self.dir.name, 'rejects.ndjson')
+        stdout, stderr = self.call(path, rejects=rejects)
+
+        self.assertIn('1 inserted', stdout)
+        self.assertIn('6 rejected', stdout)
+        # last row of the same unit wins
+        self.assertEqual(
+            Unit.objects.get(name='Egg').price, Decimal('0.30')
+        )
+        with open(rejects, encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual([line['line'] for line in lines], [3, 4, 5, 6, 7, 8])
+        self.assertIn('name', lines[0]['errors'])
+        self.assertIn('price', lines[1]['errors'])
+        self.assertIn('amount', lines[3]['errors'])
+        self.assertIn(f'{path}:3:', stderr)
+
+    def test__import_unknown_format__error(self) -> None:
+        path = self.write('units.xml', '')
+        with self.assertRaises(CommandError):
+            self.call(path)
+
+    def test__import_existing_shop_case_insensitive__success(self) -> None:
+        path = self.write('units.csv', 'shop,name,price\nmarket,Plum,1\n')
+        self.call(path)
+        self.assertEqual(Shop.objects.filter(name='market').count(), 1)
+        self.assertEqual(Unit.objects.get(name='Plum').shop, self.shop)
+
+    def test__import_shop_created_concurrently__not_counted(self) -> None:
+        importer = UnitsImporter()
+        lookup_shops = importer.lookup_shops
+        lookups = []
+
+        def lookup_and_create(names: 'Iterable[str]') -> None:
+            lookup_shops(list(names))
+            if not lookups:
+                # created by a concurrent import after the first lookup
+                ShopFactory(name='Corner')
+            lookups.append(names)
+
+        with mock.patch.object(
+            importer, 'lookup_shops', side_effect=lookup_and_create
+        ):
+            importer.resolve_shops(['corner', 'Depot', 'MARKET'])
+
+        self.assertEqual(importer.created_shops, 1)
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(importer.shops, {
+            'corner': Shop.objects.get(name='Corner').id,
+            'depot': Shop.objects.get(name='Depot').id,
+            'market': self.shop.id,
+        })
+
+    def test__import_failed_batch__versions_bumped(self) -> None:
+        def rows() -> 'Iterable[tuple]':
+            yield 1, {
+                'shop': 'Market', 'name': 'Plum', 'weight': '1', 'price': '2'
+            }
+            raise OSError('Connection reset')
+
+        importer = UnitsImporter(batch_size=1)
+        with mock.patch('units.importer.bump_versions') as bump_versions:
+            with self.assertRaises(OSError):
+                importer.run(rows())
+
+        self.assertEqual(importer.imported, 1)
+        bump_versions.assert_called_once_with(UNITS_VERSION, UNITS_ALL_VERSION)
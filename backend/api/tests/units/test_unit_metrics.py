@@ -0,0 +1,137 @@
+# sourcery skip: snake-case-functions
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse, reverse_lazy
+
+from api.metrics import fingerprint, registry
+from api.tests.units.base import BaseUnitsTest
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0, METRICS_TOKEN='secret')
+class TestUnitsMetrics(BaseUnitsTest):
+    metrics_url = reverse_lazy('metrics')
+
+    def setUp(self) -> None:
+        registry.clear()
+        self.client.force_login(self.user)
+
+    def get_metrics(self) -> str:
+        response = self.client.get(
+            self.metrics_url, HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def test__sampled_request__server_timing(self) -> None:
+        response = self.client.get(self.units_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="[1-9]\d* queries", '
+            r'serialize;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test__not_sampled_request__counted(self) -> None:
+        response = self.client.get(self.units_list_url)
+        self.assertNotIn('Server-Timing', response)
+
+        metrics = self.get_metrics()
+        self.assertIn(
+            'api_requests_total{view="unit-list",method="GET",status="200"} 1',
+            metrics
+        )
+        self.assertNotIn('api_db_queries_count{', metrics)
+
+    def test__metrics__success(self) -> None:
+        response = self.client.get(self.units_list_url)
+        self.client.get(f'{self.units_list_url}?stream=ndjson').getvalue()
+
+        metrics = self.get_metrics()
+        labels = '{view="unit-list",method="GET"}'
+        self.assertIn(
+            'api_requests_total{view="unit-list",method="GET",status="200"} 2',
+            metrics
+        )
+        self.assertIn(f'api_request_duration_seconds_count{labels} 2', metrics)
+        self.assertIn(f'api_db_queries_count{labels} 2', metrics)
+        self.assertIn(
+            f'api_serialize_duration_seconds_count{labels} 2', metrics
+        )
+        self.assertNotIn(
+            f'api_serialize_duration_seconds_sum{labels} 0.0\n', metrics
+        )
+        self.assertIn(f'api_response_size_bytes_count{labels} 2', metrics)
+        self.assertNotIn('view="metrics"', metrics)
+        self.assertGreater(len(response.content), 0)
+
+    def test__metrics_token__unauthorized(self) -> None:
+        response = self.client.get(self.metrics_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(
+            self.metrics_url, HTTP_AUTHORIZATION='Bearer other'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test__metrics_without_token__not_found(self) -> None:
+        response = self.client.get(self.metrics_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_SLOW_QUERY_MS=0.000001)
+    def test__slow_query__logged(self) -> None:
+        with self.assertLogs('api.metrics.slow_queries', 'WARNING') as logs:
+            self.client.get(self.units_detail_url)
+
+        self.assertIn('in GET unit-detail', logs.output[0])
+        normalized_sql = logs.output[-1].split(': ')[-1]
+        self.assertNotIn(str(self.units[0].id), normalized_sql)
+        metrics = self.get_metrics()
+        self.assertIn(
+            'api_slow_queries_total{view="unit-detail",method="GET"}', metrics
+        )
+
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0, METRICS_SLOW_QUERY_MS=0.000001)
+    def test__not_sampled_slow_query__logged(self) -> None:
+        for url, view in [
+            (self.units_detail_url, 'unit-detail'),
+            (
+                reverse('async-unit-detail', args=(self.units[0].id,)),
+                'async-unit-detail'
+            ),
+        ]:
+            with self.subTest(view=view):
+                with self.assertLogs(
+                    'api.metrics.slow_queries', 'WARNING'
+                ) as logs:
+                    response = self.client.get(url)
+
+                self.assertNotIn('Server-Timing', response)
+                self.assertIn(f'in GET {view}', logs.output[0])
+                self.assertIn(
+                    f'api_slow_queries_total{{view="{view}",method="GET"}}',
+                    self.get_metrics()
+                )
+                self.assertNotIn('api_db_queries_count{', self.get_metrics())
+
+
+class TestFingerprint(SimpleTestCase):
+    def test_literals_replaced(self) -> None:
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM \"units_unit\" WHERE name = 'it''s'\n"
+                '  AND price > 10.5 AND id IN (%s, %s, %s) LIMIT 21'
+            ),
+            'SELECT * FROM "units_unit" WHERE name = ? '
+            'AND price > ? AND id IN (...) LIMIT ?'
+        )
+
+    def test_values_collapsed(self) -> None:
+        self.assertEqual(
+            fingerprint('INSERT INTO t1 (a, b) VALUES (%s, %s), (%s, %s)'),
+            fingerprint('INSERT INTO t1 (a, b) VALUES (%s, %s)')
+        )
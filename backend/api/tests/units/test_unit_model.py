@@ -1,8 +1,15 @@
 # sourcery skip: snake-case-functions
+from decimal import Decimal
+
 from django.test import TestCase
+from django.db.models import F
 from django.db.utils import IntegrityError
+from rest_framework.exceptions import ValidationError
 
 from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+from units.models import ReservedUnit, Unit
+from units.utils import AMOUNT_ERROR_MESSAGE
 
 
 class TestUnitModel(TestCase):
@@ -26,6 +33,31 @@ class TestUnitModel(TestCase):
     def test_unit_str_representation(self) -> None:
         self.assertEqual(str(self.unit), f'{self.unit.name} [{self.unit.shop}]')
 
+    def test_price_for_kg_stored_on_save(self) -> None:
+        self.unit.price = Decimal('10.00')
+        self.unit.weight = Decimal('4.00')
+        self.unit.save(update_fields=('price', 'weight'))
+        self.unit.refresh_from_db(fields=('price_for_kg',))
+        self.assertEqual(self.unit.price_for_kg, Decimal('2.50'))
+
+    def test_price_for_kg_stored_on_queryset_update(self) -> None:
+        Unit.objects.filter(id=self.unit.id).update(
+            price=Decimal('7.00'), weight=Decimal('2.00')
+        )
+        self.unit.refresh_from_db(fields=('price_for_kg',))
+        self.assertEqual(self.unit.price_for_kg, Decimal('3.50'))
+
+        Unit.objects.filter(id=self.unit.id).update(price=F('price') * 2)
+        self.unit.refresh_from_db(fields=('price_for_kg',))
+        self.assertEqual(self.unit.price_for_kg, Decimal('7.00'))
+
+    def test_price_for_kg_stored_on_bulk_update(self) -> None:
+        self.unit.price = Decimal('1.00')
+        self.unit.weight = Decimal('3.00')
+        Unit.objects.bulk_update([self.unit], fields=('price', 'weight'))
+        self.unit.refresh_from_db(fields=('price_for_kg',))
+        self.assertEqual(self.unit.price_for_kg, Decimal('0.33'))
+
 
 class TestReservedUnitModel(TestCase):
 
@@ -49,3 +81,67 @@ class TestReservedUnitModel(TestCase):
             str(self.reserved_unit),
             f'{self.reserved_unit.unit} ({self.reserved_unit.user})'
         )
+
+    def test_reserved_unit_save_takes_unit_amount(self) -> None:
+        unit = UnitFactory(amount=10)
+        reserved_unit = ReservedUnit(user=UserFactory(), unit=unit, amount=4)
+        # savepoint, conditional update of unit, insert and release
+        with self.assertNumQueries(4):
+            reserved_unit.save()
+        self.assertEqual(unit.amount, 6)
+
+        reserved_unit = ReservedUnit.objects.get(id=reserved_unit.id)
+        reserved_unit.amount = 1
+        reserved_unit.save(update_fields=('amount',))
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 9)
+
+        reserved_unit.delete()
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 10)
+
+    def test_reserved_unit_save_exceed_unit_amount(self) -> None:
+        unit = UnitFactory(amount=3)
+        reserved_unit = ReservedUnit(user=UserFactory(), unit=unit, amount=5)
+
+        with self.assertRaises(ValidationError) as err:
+            reserved_unit.save()
+
+        self.assertEqual(
+            err.exception.detail['amount'][0], f'{AMOUNT_ERROR_MESSAGE} 2'
+        )
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 3)
+        self.assertFalse(ReservedUnit.objects.filter(unit=unit).exists())
+
+    def test_reserved_unit_deferred_amount_save_takes_delta(self) -> None:
+        unit = UnitFactory(amount=10)
+        reserved_unit = ReservedUnit(user=UserFactory(), unit=unit, amount=4)
+        reserved_unit.save()
+
+        reserved_unit = ReservedUnit.objects.only('id', 'unit').get(
+            id=reserved_unit.id
+        )
+        reserved_unit.amount = 5
+        reserved_unit.save(update_fields=('amount',))
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 5)
+
+    def test_reserved_unit_failed_save_keeps_stored_amount(self) -> None:
+        unit = UnitFactory(amount=10)
+        other = ReservedUnitFactory(unit=unit, amount=1)
+        unit.refresh_from_db(fields=('amount',))
+        reserved_unit = ReservedUnit(user=other.user, unit=unit, amount=4)
+
+        with self.assertRaises(IntegrityError):
+            reserved_unit.save()
+        self.assertEqual(reserved_unit.stored_amount, 0)
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 9)
+
+        # retried for another user the whole amount is taken
+        reserved_unit.user = UserFactory()
+        reserved_unit.save()
+        unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(unit.amount, 5)
+        self.assertEqual(reserved_unit.stored_amount, 4)
@@ -0,0 +1,100 @@
+# sourcery skip: snake-case-functions
+from decimal import Decimal
+
+from api.tests.queries import QueryBudgetMixin
+from api.tests.units.base import BaseReservedUnitsTest, BaseUnitsTest
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+
+
+class TestUnitsQueries(QueryBudgetMixin, BaseUnitsTest):
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def grow(self) -> None:
+        UnitFactory.create_batch(10)
+
+    def test__units_list__query_budget(self) -> None:
+        self.assertQueryBudget(
+            4, lambda: self.client.get(self.units_list_url), self.grow
+        )
+
+    def test__units_list_page__query_budget(self) -> None:
+        self.assertQueryBudget(
+            4,
+            lambda: self.client.get(f'{self.units_list_url}?page_size=2'),
+            self.grow
+        )
+
+    def test__units_list_cursor__query_budget(self) -> None:
+        self.assertQueryBudget(
+            3,
+            lambda: self.client.get(f'{self.units_list_url}?cursor='),
+            self.grow
+        )
+
+    def test__unit_detail__query_budget(self) -> None:
+        self.assertQueryBudget(
+            3, lambda: self.client.get(self.units_detail_url), self.grow
+        )
+
+
+class TestReservedUnitsQueries(QueryBudgetMixin, BaseReservedUnitsTest):
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def grow(self) -> None:
+        # each in its own shop
+        reserved_units = ReservedUnitFactory.create_batch(10, user=self.user)
+        account = self.user.app_account
+        account.amount += Decimal(
+            sum(reserved_unit.total for reserved_unit in reserved_units)
+        )
+        account.save(update_fields=('amount',))
+
+    def test__reserved_units_list__query_budget(self) -> None:
+        self.assertQueryBudget(
+            4,
+            lambda: self.client.get(self.reserved_units_list_url),
+            self.grow
+        )
+
+    def test__reserved_unit_detail__query_budget(self) -> None:
+        self.assertQueryBudget(
+            3,
+            lambda: self.client.get(self.reserved_unit_detail_url),
+            self.grow
+        )
+
+    def test__buy_reserved_units__query_budget(self) -> None:
+        self.assertQueryBudget(
+            10,
+            lambda: self.client.post(self.reserved_units_bye_url),
+            self.grow
+        )
+
+    def test__clear_reserved_units__query_budget(self) -> None:
+        self.assertQueryBudget(
+            13,
+            lambda: self.client.delete(self.reserved_units_clear_url),
+            self.grow
+        )
+
+    def test__reserved_units_search__query_budget(self) -> None:
+        self.client.force_login(UserFactory(is_staff=True))
+        self.assertQueryBudget(
+            4,
+            lambda: self.client.get(self.reserved_units_search_url),
+            self.grow
+        )
+
+    def test__reserved_units_search_page__query_budget(self) -> None:
+        self.client.force_login(UserFactory(is_staff=True))
+        self.assertQueryBudget(
+            4,
+            lambda: self.client.get(
+                f'{self.reserved_units_search_query_url}'
+                f'?email={self.user.email}&page_size=5'
+            ),
+            self.grow
+        )
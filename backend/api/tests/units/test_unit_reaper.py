@@ -0,0 +1,97 @@
+# sourcery skip: snake-case-functions
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from units.models import ReservedUnit, Unit
+from units.reaper import ReservationReaper
+from units.utils import UnitsUtil
+
+
+class TestReservationReaper(TestCase):
+    ttl = 3600
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.unit = UnitFactory(amount=20)
+        cls.expired = ReservedUnitFactory.create_batch(
+            5, unit=cls.unit, amount=2
+        )
+        cls.fresh = ReservedUnitFactory(unit=cls.unit, amount=3)
+        ReservedUnit.objects.filter(
+            id__in=[reserved_unit.id for reserved_unit in cls.expired]
+        ).update(updated_at=timezone.now() - timedelta(seconds=cls.ttl + 1))
+
+    def test_expired_reservations_stock_returned(self) -> None:
+        with self.assertNumQueries(6):
+            expired, updated = UnitsUtil().expire_reservations(
+                timezone.now() - timedelta(seconds=self.ttl), 100
+            )
+
+        self.assertEqual((expired, updated), (5, 1))
+        self.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.unit.amount, 7 + 5 * 2)
+        self.assertEqual(
+            list(ReservedUnit.objects.values_list('id', flat=True)),
+            [self.fresh.id]
+        )
+
+    def test_expired_by_batches(self) -> None:
+        reaper = ReservationReaper(self.ttl, batch_size=2)
+        self.assertEqual(reaper.run_once(), (5, 3))
+        self.assertEqual(reaper.batches, 3)
+        self.assertEqual(reaper.run_once(), (0, 0))
+
+        reaper = ReservationReaper(0, batch_size=2, max_batches=0)
+        self.assertEqual(reaper.run_once(), (0, 0))
+
+    def test_max_batches(self) -> None:
+        reaper = ReservationReaper(self.ttl, batch_size=2, max_batches=1)
+        self.assertEqual(reaper.run_once(), (2, 1))
+        self.assertEqual(ReservedUnit.objects.count(), 4)
+
+    def test_changed_reservation_refreshed(self) -> None:
+        reserved_unit = ReservedUnit.objects.get(id=self.expired[0].id)
+        reserved_unit.amount = 1
+        reserved_unit.save()
+
+        ReservationReaper(self.ttl).run_once()
+        self.assertTrue(
+            ReservedUnit.objects.filter(id=reserved_unit.id).exists()
+        )
+        self.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.unit.amount, 7 + 1 + 4 * 2)
+
+    def test_deleted_unit_skipped(self) -> None:
+        other = ReservedUnitFactory(amount=1)
+        ReservedUnit.objects.filter(id=other.id).update(
+            updated_at=timezone.now() - timedelta(seconds=self.ttl + 1)
+        )
+        Unit.objects.filter(id=other.unit_id).update(amount=0)
+
+        self.assertEqual(ReservationReaper(self.ttl).run_once(), (6, 2))
+        self.assertEqual(
+            Unit.objects.get(id=other.unit_id).amount, 1
+        )
+
+    def test_command(self) -> None:
+        stdout = StringIO()
+        call_command(
+            'expire_reservations',
+            ttl=self.ttl,
+            batch_size=4,
+            stdout=stdout
+        )
+        self.assertEqual(
+            stdout.getvalue().strip(),
+            'Expired 5 reservations in 2 batches, '
+            'returned stock to 2 units.'
+        )
+
+    def test_command_without_ttl_fails(self) -> None:
+        with self.assertRaisesMessage(CommandError, 'TTL is not set'):
+            call_command('expire_reservations', ttl=0)
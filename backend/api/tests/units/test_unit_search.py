@@ -0,0 +1,117 @@
+# sourcery skip: snake-case-functions
+from decimal import Decimal
+
+from django.db import connection
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+
+from api.tests.shops.factories import ShopFactory
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+from units.filters import FullTextSearchFilter
+from units.models import Unit
+
+
+class TestUnitsSearch(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = UserFactory()
+        shop = ShopFactory()
+        cls.units = {
+            name: UnitFactory(shop=shop, name=name, price=Decimal(price))
+            for name, price in (
+                ('Green apple', '1.00'),
+                ('Apple juice, apple', '2.00'),
+                ('Pineapple', '3.00'),
+                ('Applesauce', '4.00'),
+            )
+        }
+        ReservedUnitFactory(user=cls.user, unit=cls.units['Green apple'])
+        ReservedUnitFactory(user=cls.user, unit=cls.units['Pineapple'])
+        cls.units_list_url = reverse_lazy('unit-list')
+        cls.reserved_units_list_url = reverse_lazy('reserved-unit-list')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def search(self, url: str, query: str) -> 'list[str]':
+        response = self.client.get(url, {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (item['unit'] if 'unit' in item else item)['name']
+            for item in response.data['results']
+        ]
+
+    def test__search_units_by_prefix__ranked(self) -> None:
+        names = self.search(self.units_list_url, 'APP')
+        self.assertEqual(names[0], 'Apple juice, apple')
+        self.assertCountEqual(
+            names, ['Apple juice, apple', 'Green apple', 'Applesauce']
+        )
+
+    def test__search_units_cursor_paginated__ranked(self) -> None:
+        expected = self.search(self.units_list_url, 'app')
+
+        names = []
+        response = self.client.get(
+            self.units_list_url,
+            {'search': 'app', 'cursor': '', 'page_size': 1}
+        )
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [item['name'] for item in response.data['results']]
+            self.assertNotIn('search_rank', response.data['results'][0])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(names, expected)
+
+    def test__search_units_inside_word__not_found(self) -> None:
+        # words are matched by prefix only (GIN index of the text search),
+        # not by substring as of icontains
+        self.assertNotIn(
+            'Pineapple', self.search(self.units_list_url, 'apple')
+        )
+
+    def test__search_units_by_several_terms__success(self) -> None:
+        self.assertEqual(
+            self.search(self.units_list_url, 'gre app'), ['Green apple']
+        )
+        self.assertEqual(self.search(self.units_list_url, 'gre ju'), [])
+
+    def test__search_units_ordering_requested__not_ranked(self) -> None:
+        response = self.client.get(
+            self.units_list_url, {'search': 'app', 'ordering': '-price'}
+        )
+        self.assertEqual(
+            [item['name'] for item in response.data['results']],
+            ['Applesauce', 'Apple juice, apple', 'Green apple']
+        )
+
+    def test__search_units_by_price__success(self) -> None:
+        self.assertEqual(
+            self.search(self.units_list_url, '3.00'), ['Pineapple']
+        )
+
+    def test__search_units_without_words__empty(self) -> None:
+        self.assertEqual(self.search(self.units_list_url, "'&|"), [])
+
+    def test__search_reserved_units_by_unit_name__success(self) -> None:
+        self.assertEqual(
+            self.search(self.reserved_units_list_url, 'pine'), ['Pineapple']
+        )
+
+    def test__search_units__index_used(self) -> None:
+        search_filter = FullTextSearchFilter()
+        queryset = Unit.objects.alias(
+            search_vector=search_filter.get_search_vector(['name'])
+        ).filter(
+            search_vector=search_filter.get_search_query('app')
+        ).order_by()  # an index of the ordering may be scanned instead
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        self.assertIn('units_unit_name_search_idx', plan)
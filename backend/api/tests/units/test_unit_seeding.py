@@ -0,0 +1,150 @@
+# sourcery skip: snake-case-functions
+from collections import Counter
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from units.models import ReservedUnit, Unit, calculate_price_for_kg
+from shops.models import Shop
+from units.seeding import CatalogueSeeder
+from users.models import AppAccount, User
+
+
+class TestCatalogueSeeding(TestCase):
+
+    def test_seed_catalogue(self) -> None:
+        existing = UnitFactory()
+        out = StringIO()
+        call_command(
+            'seed_catalogue',
+            '--shops', '10',
+            '--units', '2000',
+            '--users', '50',
+            '--reservations', '500',
+            '--seed', '7',
+            '--batch-size', '300',
+            stdout=out
+        )
+
+        self.assertRegex(
+            out.getvalue(),
+            r'^Seeded 10 shops, 2000 units, 50 users, \d+ reservations'
+        )
+        units = Unit.objects.exclude(id=existing.id).select_related('shop')
+        self.assertEqual(units.count(), 2000)
+        for unit in units:
+            self.assertGreaterEqual(unit.weight, Decimal('0.01'))
+            self.assertGreaterEqual(unit.price, Decimal('0.01'))
+            self.assertEqual(
+                unit.price_for_kg,
+                calculate_price_for_kg(unit.price, unit.weight)
+            )
+            self.assertEqual(unit.shop_name, unit.shop.name)
+            self.assertEqual(unit.stock_shards, 0)
+
+        # few shops have most of the units
+        shop_units = Counter(units.values_list('shop_id', flat=True))
+        self.assertGreater(
+            sum(count for _, count in shop_units.most_common(3)), 1000
+        )
+        self.assertEqual(
+            AppAccount.objects.filter(user__username__startswith='user7_')
+            .count(),
+            50
+        )
+        reservations = ReservedUnit.objects.count()
+        self.assertGreater(reservations, 250)
+        self.assertLessEqual(reservations, 500)
+
+        # id sequences are reset
+        reserved_unit = ReservedUnitFactory()
+        self.assertGreater(reserved_unit.unit_id, max(
+            Unit.objects.exclude(id=reserved_unit.unit_id)
+            .values_list('id', flat=True)
+        ))
+        self.assertTrue(hasattr(
+            User.objects.get(id=reserved_unit.user_id), 'app_account'
+        ))
+
+    def test_same_seed_same_rows(self) -> None:
+        def generate(seed: int) -> list:
+            seeder = CatalogueSeeder(seed)
+            seeder.shop_ids = range(1, 6)
+            shop_names = [name for name, in seeder.generate_shops(5)]
+            units = list(seeder.generate_units(100, shop_names))
+            seeder.user_ids, seeder.unit_ids = range(1, 11), range(1, 101)
+            reservations = [
+                row[:3] for row in seeder.generate_reservations(50)
+            ]
+            return [shop_names, units, reservations]
+
+        self.assertEqual(generate(1), generate(1))
+        self.assertNotEqual(generate(1), generate(2))
+
+    def test_reserved_amounts_taken_from_stock(self) -> None:
+        seeder = CatalogueSeeder(5)
+        seeder.run(shops=3, units=200, users=20, reservations=300)
+
+        generated = CatalogueSeeder(5)
+        generated.shop_ids = seeder.shop_ids
+        shop_names = [name for name, in generated.generate_shops(3)]
+        stock = [row[3] for row in generated.generate_units(200, shop_names)]
+        reserved = dict(
+            ReservedUnit.objects.values('unit_id')
+            .annotate(total=Sum('amount'))
+            .values_list('unit_id', 'total')
+        )
+        self.assertGreater(seeder.reservations, 100)
+        units = Unit.objects.order_by('id').values_list('id', 'amount')
+        self.assertGreaterEqual(min(amount for _, amount in units), 0)
+        self.assertEqual(
+            [amount + reserved.get(unit_id, 0) for unit_id, amount in units],
+            stock
+        )
+
+    def test_same_seed_again(self) -> None:
+        call_command(
+            'seed_catalogue', '--shops', '1', '--units', '0', '--users', '1',
+            '--seed', '4', stdout=StringIO()
+        )
+        for options in [('--users', '0'), ('--shops', '0')]:
+            with self.subTest(options=options):
+                with self.assertRaisesMessage(
+                    CommandError, 'Seed 4 is already loaded'
+                ):
+                    call_command(
+                        'seed_catalogue', '--units', '0', *options,
+                        '--seed', '4'
+                    )
+
+        call_command(
+            'seed_catalogue', '--shops', '1', '--units', '0', '--users', '1',
+            '--seed', '14', stdout=StringIO()
+        )
+        self.assertEqual(Shop.objects.count(), 2)
+
+    def test_rebuild_indexes(self) -> None:
+        def get_indexes() -> list:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT indexdef FROM pg_indexes WHERE tablename = %s '
+                    'ORDER BY indexname',
+                    [Unit._meta.db_table]
+                )
+                return cursor.fetchall()
+
+        indexes = get_indexes()
+        seeder = CatalogueSeeder(3, rebuild_indexes=True)
+        seeder.run(shops=2, units=100)
+
+        self.assertEqual(len(seeder.unit_ids), 100)
+        self.assertEqual(get_indexes(), indexes)
+
+    def test_units_without_shops(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command('seed_catalogue', '--shops', '0', '--units', '1')
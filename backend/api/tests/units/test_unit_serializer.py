@@ -0,0 +1,81 @@
+# sourcery skip: snake-case-functions
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+from units.models import ReservedUnit, Unit
+from units.serializers import ReservedUnitSerializer, UnitSerializer
+
+
+class TestValuesRepresentation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.reserved_units = [ReservedUnitFactory() for _ in range(5)]
+
+    def assertSameJSON(self, serializer_class: type, queryset) -> None:
+        renderer = JSONRenderer()
+        expected = serializer_class(queryset, many=True).data
+        serializer = serializer_class()
+        with self.assertNumQueries(1):
+            data = serializer.to_values_representation(
+                serializer.get_values_queryset(queryset)
+            )
+        self.assertEqual(renderer.render(data), renderer.render(expected))
+
+    def test_units_values_representation_is_same(self) -> None:
+        self.assertSameJSON(UnitSerializer, Unit.objects.all())
+
+    def test_reserved_units_values_representation_is_same(self) -> None:
+        self.assertSameJSON(
+            ReservedUnitSerializer,
+            ReservedUnit.objects.select_related('user', 'unit__shop')
+        )
+
+
+class TestReservedUnitSerializer(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = UserFactory()
+        cls.units = [UnitFactory() for _ in range(5)]
+
+    def test_validated_data_has_loaded_instances(self) -> None:
+        serializer = ReservedUnitSerializer(
+            data={'user_id': self.user.id, 'unit_id': self.units[0].id}
+        )
+        # unit with shop, user and unique together check
+        with self.assertNumQueries(3):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(serializer.validated_data['unit'], self.units[0])
+        self.assertEqual(serializer.validated_data['user'], self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                serializer.validated_data['unit'].shop, self.units[0].shop
+            )
+
+    def test_batch_validation_loads_instances_once(self) -> None:
+        serializer = ReservedUnitSerializer(
+            data=[
+                {'user_id': self.user.id, 'unit_id': unit.id}
+                for unit in self.units
+            ],
+            many=True
+        )
+        # units, users and unique together check per item
+        with self.assertNumQueries(2 + len(self.units)):
+            self.assertTrue(serializer.is_valid())
+
+    def test_batch_validation_unknown_unit(self) -> None:
+        serializer = ReservedUnitSerializer(
+            data=[
+                {'user_id': self.user.id, 'unit_id': self.units[0].id},
+                {'user_id': self.user.id, 'unit_id': 0},
+            ],
+            many=True
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors[0], {})
+        self.assertIn('does not exist', serializer.errors[1]['unit_id'][0])
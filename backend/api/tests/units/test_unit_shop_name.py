@@ -0,0 +1,112 @@
+# sourcery skip: snake-case-functions
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Value
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from api.tests.shops.factories import ShopFactory
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+from shops.models import Shop
+from units.models import Unit
+
+
+class TestUnitShopName(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.shops = [ShopFactory() for _ in range(2)]
+        cls.units = [UnitFactory(shop=shop) for shop in cls.shops * 2]
+
+    def assertShopNamesSynced(self) -> None:
+        for unit in Unit.objects.select_related('shop'):
+            self.assertEqual(unit.shop_name, unit.shop.name)
+
+    def test_unit_created_and_moved_by_save(self) -> None:
+        self.assertShopNamesSynced()
+        unit = self.units[0]
+        unit.shop_id = self.shops[1].id
+        unit.save(update_fields=('shop_id',))
+        self.assertShopNamesSynced()
+
+    def test_shop_renamed_by_save(self) -> None:
+        shop = self.shops[0]
+        shop.name = shop.name.upper()
+        shop.save()
+        self.assertShopNamesSynced()
+
+    def test_shops_renamed_by_update(self) -> None:
+        Shop.objects.filter(id=self.shops[0].id).update(name='Renamed')
+        self.assertShopNamesSynced()
+
+    def test_shops_renamed_by_bulk_update(self) -> None:
+        for idx, shop in enumerate(self.shops):
+            shop.name = f'Renamed {idx}'
+        Shop.objects.bulk_update(self.shops, ['name'])
+        self.assertShopNamesSynced()
+
+    def test_units_moved_by_update_and_bulk_update(self) -> None:
+        Unit.objects.filter(id=self.units[0].id).update(
+            shop_id=self.shops[1].id
+        )
+        Unit.objects.filter(id=self.units[1].id).update(shop=self.shops[0])
+        Unit.objects.filter(id=self.units[3].id).update(
+            shop_id=Value(self.shops[0].id)
+        )
+        self.assertShopNamesSynced()
+
+        units = list(Unit.objects.filter(id__in=[self.units[2].id]))
+        units[0].shop_id = self.shops[1].id
+        Unit.objects.bulk_update(units, ['shop_id'])
+        self.assertShopNamesSynced()
+
+    def test_units_bulk_created(self) -> None:
+        Unit.objects.bulk_create([
+            Unit(shop_id=self.shops[0].id, name='Bulk', price=1),
+            Unit(shop=self.shops[1], name='Bulk', price=1),
+        ])
+        self.assertShopNamesSynced()
+
+    def test_check_command_finds_and_repairs_drift(self) -> None:
+        call_command('check_unit_shop_names', stdout=StringIO())
+
+        # raw update bypasses the sync
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE units_unit SET shop_name = lower(shop_name) '
+                'WHERE id = %s',
+                [self.units[0].id]
+            )
+        with self.assertRaisesMessage(CommandError, str(self.units[0].id)):
+            call_command('check_unit_shop_names', stdout=StringIO())
+
+        stdout = StringIO()
+        call_command('check_unit_shop_names', repair=True, stdout=stdout)
+        self.assertIn('Repaired 1 units', stdout.getvalue())
+        self.assertShopNamesSynced()
+        call_command('check_unit_shop_names', stdout=StringIO())
+
+    @override_settings(UNIT_SHOP_NAME_DENORMALIZED=False)
+    def test_lookup_setting_read_at_runtime(self) -> None:
+        user = UserFactory()
+        ReservedUnitFactory(user=user, unit=self.units[0])
+        self.client.force_login(user)
+        shop_name = self.shops[0].name
+        for url, query in (
+            (reverse('unit-list'), {'shop__name': shop_name}),
+            (reverse('reserved-unit-list'), {'unit__shop__name': shop_name}),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.data['results'])
+            self.assertFalse([
+                query for query in context.captured_queries
+                if '"units_unit"."shop_name"' in query['sql']
+            ])
@@ -0,0 +1,246 @@
+# sourcery skip: snake-case-functions
+from io import StringIO
+from typing import TYPE_CHECKING
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse_lazy
+from rest_framework.test import APITestCase
+
+from api.tests.units.factories import ReservedUnitFactory, UnitFactory
+from api.tests.users.factories import UserFactory
+from units.models import ReservedUnit, Unit, UnitStockShard
+from units.utils import AMOUNT_ERROR_MESSAGE, UnitsUtil
+
+if TYPE_CHECKING:
+    from rest_framework.response import Response
+
+
+def get_slots(unit: Unit) -> list:
+    return list(
+        UnitStockShard.objects.filter(unit=unit)
+        .order_by('slot')
+        .values_list('amount', flat=True)
+    )
+
+
+def get_stock(unit: Unit) -> int:
+    return UnitStockShard.objects.filter(unit=unit).aggregate(
+        stock=Sum('amount')
+    )['stock']
+
+
+class TestUnitStockShards(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.unit = UnitFactory(amount=10)
+        cls.other_unit = UnitFactory(amount=5)
+
+    def test_shard_stock(self) -> None:
+        util = UnitsUtil()
+        self.assertEqual(util.shard_stock([self.unit.id, 0], 4), 1)
+        # savepoint, lock, stock of units and of slots, delete, insert,
+        # one update of all units and savepoint release
+        with self.assertNumQueries(8):
+            util.shard_stock([self.unit.id, self.other_unit.id], 4)
+        util.shard_stock([self.other_unit.id], 0)
+
+        self.assertEqual(get_slots(self.unit), [3, 3, 2, 2])
+        self.unit.refresh_from_db(fields=('amount', 'stock_shards'))
+        self.assertEqual((self.unit.amount, self.unit.stock_shards), (10, 4))
+        self.assertEqual(get_slots(self.other_unit), [])
+
+        # resharded stock is taken from the slots
+        UnitStockShard.objects.filter(unit=self.unit, slot=0).update(amount=0)
+        util.shard_stock([self.unit.id], 2)
+        self.assertEqual(get_slots(self.unit), [4, 3])
+
+        util.shard_stock([self.unit.id], 0)
+        self.assertEqual(get_slots(self.unit), [])
+        self.unit.refresh_from_db(fields=('amount', 'stock_shards'))
+        self.assertEqual((self.unit.amount, self.unit.stock_shards), (7, 0))
+
+    def test_take_sharded_stock(self) -> None:
+        util = UnitsUtil()
+        util.shard_stock([self.unit.id], 2)
+
+        self.assertEqual(util.take_sharded_stock(self.unit.id, 4), 0)
+        self.assertEqual(get_stock(self.unit), 6)
+        # no slot has enough stock, it is taken from both
+        self.assertEqual(util.take_sharded_stock(self.unit.id, 5), 0)
+        self.assertEqual(get_stock(self.unit), 1)
+
+        self.assertEqual(util.take_sharded_stock(self.unit.id, 3), 2)
+        self.assertEqual(get_stock(self.unit), 1)
+
+        self.assertEqual(util.take_sharded_stock(self.unit.id, -2), 0)
+        self.assertEqual(get_stock(self.unit), 3)
+        self.assertIsNone(util.take_sharded_stock(self.other_unit.id, 1))
+
+    def test_reserved_unit_stock_taken_from_slots(self) -> None:
+        UnitsUtil().shard_stock([self.unit.id], 3)
+        unit = Unit.objects.get(id=self.unit.id)
+
+        reserved_unit = ReservedUnitFactory(unit=unit, amount=4)
+        self.assertEqual(get_stock(self.unit), 6)
+
+        reserved_unit.amount = 2
+        reserved_unit.save()
+        self.assertEqual(get_stock(self.unit), 8)
+
+        reserved_unit.delete()
+        self.assertEqual(get_stock(self.unit), 10)
+        # amount is not changed until the stock is folded
+        self.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.unit.amount, 10)
+
+    def test_sharded_after_read(self) -> None:
+        unit = Unit.objects.get(id=self.unit.id)
+        UnitsUtil().shard_stock([self.unit.id], 2)
+
+        UnitsUtil().update_unit_amount(unit, 3)
+        self.assertEqual(get_stock(self.unit), 7)
+        self.assertEqual(unit.stock_shards, 2)
+
+        # and unsharded
+        UnitsUtil().shard_stock([self.unit.id], 0)
+        UnitsUtil().update_unit_amount(unit, 3)
+        self.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.unit.amount, 4)
+
+    def test_fold_sharded_stock(self) -> None:
+        util = UnitsUtil()
+        util.shard_stock([self.unit.id], 2)
+        util.take_sharded_stock(self.unit.id, 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(util.fold_sharded_stock(), 1)
+        self.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.unit.amount, 7)
+        self.assertEqual(util.fold_sharded_stock(), 0)
+
+    def test_commands(self) -> None:
+        out = StringIO()
+        call_command(
+            'shard_unit_stock', self.unit.id, '--slots', '5', stdout=out
+        )
+        self.assertEqual(
+            out.getvalue().strip(), 'Split stock of 1 units into 5 slots.'
+        )
+        self.assertEqual(get_slots(self.unit), [2] * 5)
+
+        UnitsUtil().take_sharded_stock(self.unit.id, 1)
+        out = StringIO()
+        call_command('fold_unit_stock', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Updated amount of 1 units.')
+        self.unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.unit.amount, 9)
+
+        with self.assertRaises(CommandError):
+            call_command('shard_unit_stock', self.unit.id, '--slots', '-1')
+
+
+class TestUnitStockShardsTransaction(TransactionTestCase):
+
+    def test_spread_take_written_while_slots_locked(self) -> None:
+        unit = UnitFactory(amount=10)
+        util = UnitsUtil()
+        util.shard_stock([unit.id], 2)
+        set_shard_amounts = UnitsUtil.set_shard_amounts
+
+        def locked_set_shard_amounts(*args) -> None:
+            # slots are written in the transaction which locked them
+            self.assertTrue(connection.in_atomic_block)
+            set_shard_amounts(*args)
+
+        with mock.patch.object(
+            UnitsUtil,
+            'set_shard_amounts',
+            autospec=True,
+            side_effect=locked_set_shard_amounts
+        ) as patched:
+            self.assertEqual(util.take_sharded_stock(unit.id, 7), 0)
+        patched.assert_called_once()
+        self.assertEqual(get_slots(unit), [0, 3])
+
+
+class TestShardedReservedUnitsView(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = UserFactory()
+        cls.unit = UnitFactory(amount=10)
+        cls.other_unit = UnitFactory(amount=10)
+        UnitsUtil().shard_stock([cls.unit.id], 4)
+
+        cls.reserved_units_list_url = reverse_lazy('reserved-unit-list')
+        cls.reserved_units_clear_url = reverse_lazy('reserved-unit-clear')
+        cls.reserved_units_bulk_url = reverse_lazy('reserved-unit-bulk')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def reserve(self, amount: int) -> 'Response':
+        return self.client.post(
+            self.reserved_units_list_url,
+            data={
+                'user_id': self.user.id,
+                'unit_id': self.unit.id,
+                'amount': amount
+            },
+            format='json'
+        )
+
+    def test__post_sharded_reserved_unit__created(self) -> None:
+        response = self.reserve(3)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_stock(self.unit), 7)
+
+    def test__post_exceed_sharded_reserved_unit__bad_request(self) -> None:
+        response = self.reserve(11)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['amount'][0], f'{AMOUNT_ERROR_MESSAGE} 1'
+        )
+        self.assertEqual(get_stock(self.unit), 10)
+        self.assertFalse(ReservedUnit.objects.exists())
+
+    def test__clear_sharded_reserved_units__success(self) -> None:
+        self.reserve(6)
+        ReservedUnitFactory(user=self.user, unit=self.other_unit, amount=2)
+
+        response = self.client.delete(self.reserved_units_clear_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(get_stock(self.unit), 10)
+        self.other_unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.other_unit.amount, 10)
+
+    def test__post_bulk_sharded_reserved_units__success(self) -> None:
+        response = self.client.post(
+            self.reserved_units_bulk_url,
+            data={
+                'items': [
+                    {'unit_id': self.unit.id, 'amount': 9},
+                    {'unit_id': self.other_unit.id, 'amount': 1},
+                ]
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_stock(self.unit), 1)
+
+        response = self.client.post(
+            self.reserved_units_bulk_url,
+            data={'items': [{'unit_id': self.unit.id, 'amount': 12}]},
+            format='json'
+        )
+        self.assertEqual(
+            response.data['items'][0]['errors']['amount'][0],
+            f'{AMOUNT_ERROR_MESSAGE} 2'
+        )
+        self.assertEqual(get_stock(self.unit), 1)
@@ -1,11 +1,22 @@
 # sourcery skip: snake-case-functions
+import json
 from decimal import Decimal
+from unittest import mock
+from urllib.parse import quote
+
+from django.db import connection
+from django.urls import NoReverseMatch
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.reverse import reverse
 
 from api.tests.units.base import BaseUnitsTest, BaseReservedUnitsTest
+from api.tests.units.factories import UnitFactory
+from api.tests.users.factories import UserFactory
 from units.filters import OrderingByPropertyFilter
 from units.models import ReservedUnit, Unit
 from units.utils import AMOUNT_ERROR_MESSAGE
+from units.views import UnitView
 
 
 class TestUnitsView(BaseUnitsTest):
@@ -37,7 +48,7 @@ class TestUnitsView(BaseUnitsTest):
             f'{self.units_list_url}?search={self.units[0].name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_search_by_name_units_list__success(self) -> None:
         self.client.force_login(self.user)
@@ -45,7 +56,7 @@ class TestUnitsView(BaseUnitsTest):
             f'{self.units_list_url}?search={self.units[1].name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test__get_filtered_by_shop_units_list__success(self) -> None:
         self.client.force_login(self.user)
@@ -53,7 +64,7 @@ class TestUnitsView(BaseUnitsTest):
             f'{self.units_list_url}?shop__name={self.units[0].shop.name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_filtered_by_name_units_list__success(self) -> None:
         self.client.force_login(self.user)
@@ -61,7 +72,7 @@ class TestUnitsView(BaseUnitsTest):
             f'{self.units_list_url}?name={self.units[0].name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_filtered_by_shop_and_unit_units_list__success(self) -> None:
         self.client.force_login(self.user)
@@ -70,17 +81,29 @@ class TestUnitsView(BaseUnitsTest):
             f'{self.units_list_url}?{filters}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test__get_filtered_by_price_for_kg_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        price_for_kg = sorted(unit.price_for_kg for unit in self.units)[1]
+        response = self.client.get(
+            f'{self.units_list_url}?price_for_kg__lte={price_for_kg}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            len(response.data['results']),
+            len([u for u in self.units if u.price_for_kg <= price_for_kg])
+        )
 
     def test__get_units_list__success(self) -> None:
         self.client.force_login(self.user)
         response = self.client.get(self.units_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.units))
+        self.assertEqual(len(response.data['results']), len(self.units))
         # check default ordering
         srt = [
             i['id'] for i in sorted(
-                response.data,
+                response.data['results'],
                 key=lambda x: (
                     x['shop'],
                     x['name'],
@@ -89,7 +112,97 @@ class TestUnitsView(BaseUnitsTest):
             )
         ]
 
-        self.assertEqual(srt, [i['id'] for i in response.data])
+        self.assertEqual(srt, [i['id'] for i in response.data['results']])
+
+    def test__get_paginated_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(f'{self.units_list_url}?page_size=3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], len(self.units))
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+
+    def test__get_cursor_paginated_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(self.units_list_url)
+        expected_ids = [i['id'] for i in response.data['results']]
+
+        ids = []
+        url = f'{self.units_list_url}?cursor=&page_size=1'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 1)
+            ids += [i['id'] for i in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(ids, expected_ids)
+
+    def test__get_cursor_paginated_ordered_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        ordering = '-price_for_kg'
+        response = self.client.get(
+            f'{self.units_list_url}?ordering={ordering}'
+        )
+        expected_ids = [i['id'] for i in response.data['results']]
+
+        response = self.client.get(
+            f'{self.units_list_url}?ordering={ordering}&cursor=&page_size=3'
+        )
+        ids = [i['id'] for i in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [i['id'] for i in response.data['results']]
+
+        self.assertEqual(ids, expected_ids)
+        self.assertIsNone(response.data['next'])
+
+    def test__get_streamed_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(f'{self.units_list_url}?ordering=price')
+
+        # several chunks
+        with mock.patch.object(UnitView, 'stream_chunk_size', 3):
+            streamed_response = self.client.get(
+                f'{self.units_list_url}?ordering=price&stream=json'
+            )
+        self.assertEqual(streamed_response.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed_response.streaming)
+        # the same rows as the paginated list without the envelope
+        self.assertEqual(
+            json.loads(b''.join(streamed_response.streaming_content)),
+            response.json()['results']
+        )
+
+    def test__get_streamed_ndjson_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(self.units_list_url)
+
+        streamed_response = self.client.get(
+            f'{self.units_list_url}?stream=ndjson'
+        )
+        self.assertEqual(streamed_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            streamed_response['Content-Type'], 'application/x-ndjson'
+        )
+        lines = b''.join(streamed_response.streaming_content).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines], response.json()['results']
+        )
+
+    def test__get_streamed_empty_units_list__success(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(f'{self.units_list_url}?name=-&stream=1')
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+    def test__get_invalid_stream_units_list__bad_request(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(f'{self.units_list_url}?stream=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test__get_invalid_cursor_units_list__not_found(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(f'{self.units_list_url}?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test__get_filtered_queryset_without_ordering__success(self) -> None:
         property_filter = OrderingByPropertyFilter()
@@ -119,17 +232,34 @@ class TestUnitsView(BaseUnitsTest):
             f'{self.units_list_url}?ordering={ordering}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.units))
+        self.assertEqual(len(response.data['results']), len(self.units))
 
         srt = [
             i['id'] for i in sorted(
-                response.data,
+                response.data['results'],
                 key=lambda x: (
                     x['price_for_kg']
                 ),
                 reverse=True
             )]
-        self.assertEqual(srt, [i['id'] for i in response.data])
+        self.assertEqual(srt, [i['id'] for i in response.data['results']])
+
+    def test__get_filtered_queryset_ordering_by_property__success(
+        self
+    ) -> None:
+        property_filter = OrderingByPropertyFilter()
+        queryset = property_filter._get_filtered_queryset(
+            Unit.objects.select_related('shop'),
+            ['-price_for_kg'],
+            ['price_for_kg', '-price_for_kg']
+        )
+        # fallback for properties without expression
+        srt = [
+            i.id for i in sorted(
+                queryset, key=lambda x: x.price_for_kg, reverse=True
+            )
+        ]
+        self.assertEqual(srt, [i.id for i in queryset])
 
     def test__get_unit_detail__success(self) -> None:
         self.client.force_login(self.user)
@@ -178,7 +308,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?search={self.reserved_units[0].unit.name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_search_by_name_reserved_units_list__success(
         self
@@ -188,7 +318,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?search={self.reserved_units[1].unit.name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test__get_filtered_by_shop_reserved_units_list__success(self) -> None:
         self.client.force_login(self.user)
@@ -196,7 +326,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?unit__shop__name={self.reserved_units[0].unit.shop.name}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_filtered_by_unit_name_reserved_units_list__success(
         self
@@ -207,7 +337,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?{filters}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_filtered_by_shop_and_unit_name_reserved_units_list__success(
         self
@@ -218,17 +348,19 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?{filters}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test__get_reserved_units_list__success(self) -> None:
         self.client.force_login(self.user)
         response = self.client.get(self.reserved_units_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.reserved_units))
+        self.assertEqual(
+            len(response.data['results']), len(self.reserved_units)
+        )
         # check default ordering
         srt = [
             i['id'] for i in sorted(
-                response.data,
+                response.data['results'],
                 key=lambda x: (
                     x['unit']['shop'],
                     x['unit']['name'],
@@ -237,7 +369,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             )
         ]
 
-        self.assertEqual(srt, [i['id'] for i in response.data])
+        self.assertEqual(srt, [i['id'] for i in response.data['results']])
 
     def test__get_filtered_queryset_without_ordering__success(self) -> None:
         property_filter = OrderingByPropertyFilter()
@@ -273,11 +405,13 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?ordering={ordering}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.reserved_units))
+        self.assertEqual(
+            len(response.data['results']), len(self.reserved_units)
+        )
 
         srt = [
             i['id'] for i in sorted(
-                response.data,
+                response.data['results'],
                 key=lambda x: (
                     x['unit']['price_for_kg']
                 ),
@@ -285,7 +419,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             )
         ]
 
-        self.assertEqual(srt, [i['id'] for i in response.data])
+        self.assertEqual(srt, [i['id'] for i in response.data['results']])
 
     def test__get_reserved_units_list_ordered_by_shop_unit_price_for_kg__success(
         self
@@ -296,10 +430,12 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?ordering={ordering}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.reserved_units))
+        self.assertEqual(
+            len(response.data['results']), len(self.reserved_units)
+        )
         srt = [
             i['id'] for i in sorted(
-                response.data,
+                response.data['results'],
                 key=lambda x: (
                     x['unit']['shop'],
                     x['unit']['name'],
@@ -308,7 +444,7 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             )
         ]
 
-        self.assertEqual(srt, [i['id'] for i in response.data])
+        self.assertEqual(srt, [i['id'] for i in response.data['results']])
 
     def test__get_reserved_units_list_ordered_by_shop_price_for_kg_reversed_success(
         self
@@ -319,9 +455,11 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?ordering={ordering}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.reserved_units))
+        self.assertEqual(
+            len(response.data['results']), len(self.reserved_units)
+        )
 
-        reserved_ids = [i['id'] for i in response.data]
+        reserved_ids = [i['id'] for i in response.data['results']]
         if (
             self.reserved_units[0].unit.price_for_kg
             > self.reserved_units[1].unit.price_for_kg
@@ -345,9 +483,11 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             f'{self.reserved_units_list_url}?ordering={ordering}'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(self.reserved_units))
+        self.assertEqual(
+            len(response.data['results']), len(self.reserved_units)
+        )
 
-        reserved_ids = [i['id'] for i in response.data]
+        reserved_ids = [i['id'] for i in response.data['results']]
         if (
             self.reserved_units[0].unit.price_for_kg
             > self.reserved_units[2].unit.price_for_kg
@@ -366,7 +506,22 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
         self.client.force_login(self.other_reserved_unit.user)
         response = self.client.get(self.reserved_units_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test__get_reserved_unit_detail_object_permission__forbidden(
+        self
+    ) -> None:
+        self.client.force_login(self.user)
+        with mock.patch(
+            'units.permissions.IsOwnerOrReadOnly.has_object_permission',
+            return_value=False
+        ) as has_object_permission:
+            response = self.client.get(self.reserved_unit_detail_url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        obj = has_object_permission.call_args.args[2]
+        self.assertIsInstance(obj, ReservedUnit)
+        self.assertEqual(obj.pk, self.reserved_units[0].id)
 
     def test__get_reserved_unit_detail__success(self) -> None:
         self.client.force_login(self.user)
@@ -581,6 +736,31 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             response.data['amount'][0], f'{AMOUNT_ERROR_MESSAGE} {exceed}'
         )
 
+    def test__patch_reserved_unit_other_unit__moved(self) -> None:
+        self.client.force_login(self.user)
+        reserved_unit = self.reserved_units[0]
+        other_unit = UnitFactory(amount=10)
+        initial_unit_amount = Unit.objects.get(
+            id=reserved_unit.unit_id
+        ).amount
+        response = self.client.patch(
+            self.reserved_unit_detail_url,
+            data={'unit_id': other_unit.id, 'amount': 3},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            ReservedUnit.objects.get(id=reserved_unit.id).unit_id,
+            other_unit.id
+        )
+        self.assertEqual(
+            Unit.objects.get(id=reserved_unit.unit_id).amount,
+            initial_unit_amount + reserved_unit.amount
+        )
+        other_unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(other_unit.amount, 7)
+
     def test__patch_reserved_unit_detail_not_owner__not_found(self) -> None:
         self.client.force_login(self.user)
         response = self.client.patch(
@@ -629,6 +809,22 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
             self.user.app_account.amount, Decimal()
         )
 
+    def test__bye_reserved_units_constant_queries__success(self) -> None:
+        other_user = self.other_reserved_unit.user
+        other_user.app_account.amount = self.other_reserved_unit.total
+        other_user.app_account.save(update_fields=('amount',))
+
+        queries_count = []
+        for user in (self.user, other_user):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.reserved_units_bye_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            queries_count.append(len(queries))
+
+        # 10 reserved units cost the same as 1
+        self.assertEqual(queries_count[0], queries_count[1])
+
     def test__bye_other_reserved_unit_with_zero_app_account__bad_request(
         self
     ) -> None:
@@ -676,6 +872,110 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
                 sum(initial_amounts[reserved_unit.id])
             )
 
+    def test__clear_reserved_units_constant_queries__no_content(self) -> None:
+        queries_count = []
+        for user in (self.user, self.other_reserved_unit.user):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete(self.reserved_units_clear_url)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            queries_count.append(len(queries))
+
+        # 10 reserved units cost the same as 1
+        self.assertEqual(queries_count[0], queries_count[1])
+
+    def test__post_bulk_reserved_units__success(self) -> None:
+        self.client.force_login(self.user)
+        reserved_unit = self.reserved_units[0]
+        reserved_amount = reserved_unit.amount
+        initial_unit_amount = reserved_unit.unit.amount
+        initial_other_unit_amount = self.other_unit.amount
+        exceed = 3
+        response = self.client.post(
+            self.reserved_units_bulk_url,
+            data={
+                'items': [
+                    {'unit_id': self.other_unit.id, 'amount': 2},
+                    {'unit_id': reserved_unit.unit_id, 'amount': 1},
+                    {'unit_id': 0},
+                    {
+                        'unit_id': self.other_reserved_unit.unit_id,
+                        'amount': self.other_reserved_unit.unit.amount + exceed
+                    },
+                    {'amount': 1},
+                    {'unit_id': self.other_unit.id, 'amount': 1},
+                ]
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['items']
+        self.assertEqual(results[0], {
+            'unit_id': self.other_unit.id, 'amount': 2, 'errors': {}
+        })
+        self.assertEqual(results[1]['errors'], {})
+        self.assertIn('does not exist', results[2]['errors']['unit_id'][0])
+        self.assertEqual(
+            results[3]['errors']['amount'][0],
+            f'{AMOUNT_ERROR_MESSAGE} {exceed}'
+        )
+        self.assertIn('unit_id', results[4]['errors'])
+        self.assertIn('duplicated', results[5]['errors']['unit_id'][0])
+
+        reserved_unit.refresh_from_db(fields=('amount',))
+        reserved_unit.unit.refresh_from_db(fields=('amount',))
+        self.other_unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(
+            ReservedUnit.objects.get(
+                user=self.user, unit=self.other_unit
+            ).amount,
+            2
+        )
+        self.assertEqual(
+            self.other_unit.amount, initial_other_unit_amount - 2
+        )
+        self.assertEqual(reserved_unit.amount, 1)
+        self.assertEqual(
+            reserved_unit.unit.amount,
+            initial_unit_amount + reserved_amount - 1
+        )
+        self.assertFalse(
+            ReservedUnit.objects.filter(
+                user=self.user, unit_id=self.other_reserved_unit.unit_id
+            ).exists()
+        )
+
+    def test__post_bulk_atomic_reserved_units__bad_request(self) -> None:
+        self.client.force_login(self.user)
+        initial_other_unit_amount = self.other_unit.amount
+        response = self.client.post(
+            self.reserved_units_bulk_url,
+            data={
+                'items': [
+                    {'unit_id': self.other_unit.id, 'amount': 2},
+                    {'unit_id': 0},
+                ],
+                'atomic': True
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(
+            'does not exist',
+            response.data['items'][1]['errors']['unit_id'][0]
+        )
+        # the same types as of successful response
+        self.assertEqual(response.json()['items'][0], {
+            'unit_id': self.other_unit.id, 'amount': 2, 'errors': {}
+        })
+        self.other_unit.refresh_from_db(fields=('amount',))
+        self.assertEqual(self.other_unit.amount, initial_other_unit_amount)
+        self.assertFalse(
+            ReservedUnit.objects.filter(
+                user=self.user, unit=self.other_unit
+            ).exists()
+        )
+
     def test__get_search_by_not_admin_user_reserved_units_list__forbidden(
         self
     ) -> None:
@@ -692,4 +992,97 @@ class TestReservedUnitsView(BaseReservedUnitsTest):
         self.client.force_login(self.user)
         response = self.client.get(self.reserved_units_search_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 10)
+        self.assertEqual(len(response.data['results']), 10)
+
+        streamed_response = self.client.get(
+            f'{self.reserved_units_search_url}?stream=json'
+        )
+        # the same rows as the paginated list without the envelope
+        self.assertEqual(
+            json.loads(b''.join(streamed_response.streaming_content)),
+            response.json()['results']
+        )
+
+    def test__get_search_by_several_usernames_reserved_units_list__success(
+        self
+    ) -> None:
+        self.client.force_login(UserFactory(is_staff=True))
+        other_user = self.other_reserved_unit.user
+        response = self.client.get(
+            reverse(
+                'reserved-search-list',
+                args=(f'{self.user.username},{other_user.username}',)
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            list(
+                ReservedUnit.objects
+                .filter(user__in=[self.user, other_user])
+                .values_list('id', flat=True)
+            )
+        )
+
+    def test__get_search_by_email_and_phone_reserved_units_list__success(
+        self
+    ) -> None:
+        self.client.force_login(UserFactory(is_staff=True))
+        other_user = self.other_reserved_unit.user
+        for query in [
+            f'email={self.user.email},{other_user.email}',
+            f'phone={quote(self.user.phone)},{quote(other_user.phone)}',
+            f'username={other_user.username}&email={self.user.email}',
+        ]:
+            response = self.client.get(
+                f'{self.reserved_units_search_query_url}?{query}'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                len(response.data['results']), 0 if 'username' in query else 11
+            )
+
+    def test__search_reserved_units_detail__not_routed(self) -> None:
+        for name, args in [
+            ('reserved-search-detail', (self.user.username, 1)),
+            ('reserved-search-query-detail', (1,)),
+        ]:
+            with self.subTest(name=name):
+                with self.assertRaises(NoReverseMatch):
+                    reverse(name, args=args)
+
+    def test__get_search_without_criteria_reserved_units_list__bad_request(
+        self
+    ) -> None:
+        self.client.force_login(UserFactory(is_staff=True))
+        response = self.client.get(self.reserved_units_search_query_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test__get_search_reserved_units_page__success(self) -> None:
+        self.client.force_login(UserFactory(is_staff=True))
+        response = self.client.get(
+            f'{self.reserved_units_search_url}?page_size=4&page=3'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 10)
+        # ordered as reservations are by default
+        reserved_ids = list(
+            ReservedUnit.objects.filter(user=self.user)
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            reserved_ids[8:]
+        )
+
+        response = self.client.get(
+            f'{self.reserved_units_search_url}?page_size=4&cursor='
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        ids = [item['id'] for item in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, reserved_ids)
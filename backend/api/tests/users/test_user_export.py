@@ -0,0 +1,32 @@
+# sourcery skip: snake-case-functions
+import csv
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.tests.users.factories import UserFactory
+from users.models import AppAccount
+
+
+class TestExportAppAccountsCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.users = [UserFactory() for _ in range(3)]
+        AppAccount.objects.filter(user=cls.users[0]).update(
+            amount=Decimal('10.50')
+        )
+
+    def test__export_app_accounts__success(self) -> None:
+        stdout = StringIO()
+        call_command('export_app_accounts', stdout=stdout, stderr=StringIO())
+
+        rows = list(csv.DictReader(StringIO(stdout.getvalue())))
+        self.assertEqual(
+            [row['user'] for row in rows],
+            [user.username for user in self.users]
+        )
+        self.assertEqual(rows[0]['amount'], '10.50')
+        self.assertEqual(rows[1]['amount'], '0.00')
@@ -0,0 +1,34 @@
+# sourcery skip: snake-case-functions
+from api.tests.queries import QueryBudgetMixin
+from api.tests.users.base import BaseUsersTest
+from api.tests.users.factories import UserFactory
+
+
+class TestUsersQueries(QueryBudgetMixin, BaseUsersTest):
+    def setUp(self) -> None:
+        self.client.force_login(self.admin)
+
+    def grow(self) -> None:
+        UserFactory.create_batch(10)
+
+    def test__users_list__query_budget(self) -> None:
+        self.assertQueryBudget(
+            4, lambda: self.client.get(self.users_list_url), self.grow
+        )
+
+    def test__user_detail__query_budget(self) -> None:
+        self.assertQueryBudget(
+            3, lambda: self.client.get(self.user_detail_url), self.grow
+        )
+
+    def test__app_accounts_list__query_budget(self) -> None:
+        self.assertQueryBudget(
+            4, lambda: self.client.get(self.app_accounts_list_url), self.grow
+        )
+
+    def test__app_account_detail__query_budget(self) -> None:
+        self.assertQueryBudget(
+            3,
+            lambda: self.client.get(self.app_account_detail_url),
+            self.grow
+        )
@@ -26,7 +26,7 @@ class TestUsersView(BaseUsersTest):
         self.client.force_login(self.admin)
         response = self.client.get(self.users_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_user_detail__success(self) -> None:
         self.client.force_login(self.admin)
@@ -143,7 +143,7 @@ class TestAccountView(BaseUsersTest):
         self.client.force_login(self.admin)
         response = self.client.get(self.app_accounts_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test__get_account_detail__success(self) -> None:
         self.client.force_login(self.admin)
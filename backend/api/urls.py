@@ -23,8 +23,15 @@ from rest_framework import routers
 from rest_framework.reverse import reverse
 from rest_framework.response import Response
 
-from units.views import ReservedUnitView, ReservedUnitsSearchView, UnitView
-from shops.views import ShopView
+from api.views import metrics
+from units.views import (
+    AsyncReservedUnitView,
+    AsyncUnitView,
+    ReservedUnitView,
+    ReservedUnitsSearchView,
+    UnitView
+)
+from shops.views import AsyncShopView, ShopView
 from users.views import AppAccountView, UserView
 
 if TYPE_CHECKING:
@@ -39,10 +46,21 @@ router.register(
     ReservedUnitsSearchView,
     'reserved-search'
 )
+router.register(
+    r'reserved-search', ReservedUnitsSearchView, 'reserved-search-query'
+)
 router.register(r'shops', ShopView, 'shop')
 router.register(r'users', UserView, 'user')
 router.register(r'app-accounts', AppAccountView, 'app-account')
 
+# read only catalogue served by async views for ASGI deployments
+async_router = routers.SimpleRouter()
+async_router.register(r'units', AsyncUnitView, 'async-unit')
+async_router.register(
+    r'reserved-units', AsyncReservedUnitView, 'async-reserved-unit'
+)
+async_router.register(r'shops', AsyncShopView, 'async-shop')
+
 
 @api_view(['GET'])
 def api_auth(request: 'Request', format: str = None) -> Response:
@@ -55,10 +73,12 @@ def api_auth(request: 'Request', format: str = None) -> Response:
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('api/async/', include(async_router.urls)),
     path(
         'api-auth/',
         include('rest_framework.urls', namespace='rest-framework')
     ),
+    path('metrics', metrics, name='metrics'),
     path('', api_auth)
 ]
 
@@ -0,0 +1,244 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterator, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import classonlymethod
+from django.utils.crypto import constant_time_compare
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api import metrics as api_metrics
+from api.middleware import get_view_name
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+    from django.db.models.query import QuerySet
+    from django.http import HttpRequest, HttpResponseBase
+    from rest_framework.request import Request
+
+
+class ValuesReadMixin:
+    """
+    List through values read path of the serializer (see
+    api.serializers.ValuesSerializerMixin).
+    """
+
+    def get_values_queryset(self) -> 'QuerySet':
+        return self.get_serializer().get_values_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+
+    def serialize_rows(self, rows: 'List[dict]') -> 'List[dict]':
+        # rows are fetched, so the time is of serialization only
+        started = time.perf_counter()
+        data = self.get_serializer().to_values_representation(rows)
+        api_metrics.observe_serialization(self.request, started)
+        return data
+
+    def list(self, request: 'Request', *args, **kwargs) -> Response:
+        queryset = self.get_values_queryset()
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_rows(page))
+        return Response(self.serialize_rows(list(queryset)))
+
+
+class ValuesRetrieveMixin(ValuesReadMixin):
+    """
+    Retrieve through values read path. Object permissions are checked
+    the same way as by get_object, on an instance of the row pk (the
+    serializer must read it) with the other fields deferred, so they
+    are queried only if a permission reads them.
+    """
+
+    def get_row_object(self, queryset: 'QuerySet', row: dict) -> 'Model':
+        pk_name = queryset.model._meta.pk.attname
+        return queryset.model.from_db(queryset.db, [pk_name], [row[pk_name]])
+
+    def retrieve(self, request: 'Request', *args, **kwargs) -> Response:
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_values_queryset()
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(
+            request, self.get_row_object(queryset, row)
+        )
+        return Response(self.serialize_rows([row])[0])
+
+
+class StreamingListMixin(ValuesReadMixin):
+    """
+    List with ?stream=json (or 1) or ?stream=ndjson is streamed from
+    server side cursor in chunks of stream_chunk_size rows, as a JSON
+    array (the same as not paginated list) or as a row per line.
+    Pagination is not applied to streamed lists.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = settings.API_STREAM_CHUNK_SIZE
+    stream_formats = {
+        '1': ('json', 'application/json'),
+        'json': ('json', 'application/json'),
+        'ndjson': ('ndjson', 'application/x-ndjson'),
+    }
+
+    def get_stream_format(self, request: 'Request') -> 'str | None':
+        stream = request.query_params.get(self.stream_query_param)
+        if not stream or stream == '0':
+            return None
+        if stream not in self.stream_formats:
+            raise ValidationError({
+                self.stream_query_param: [
+                    f'Expected one of: {", ".join(self.stream_formats)}'
+                ]
+            })
+        return stream
+
+    def stream_rows(self, stream_format: str) -> 'Iterator[bytes]':
+        renderer = JSONRenderer()
+        rows = self.get_values_queryset().iterator(
+            chunk_size=self.stream_chunk_size
+        )
+        is_json = self.stream_formats[stream_format][0] == 'json'
+
+        if is_json:
+            yield b'['
+        separator = b''
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            data = self.serialize_rows(chunk)
+            if is_json:
+                # rendered chunk without brackets
+                yield separator + renderer.render(data)[1:-1]
+                separator = b','
+            else:
+                yield b''.join(renderer.render(row) + b'\n' for row in data)
+        if is_json:
+            yield b']'
+
+    def list(
+        self, request: 'Request', *args, **kwargs
+    ) -> 'HttpResponseBase':
+        stream_format = self.get_stream_format(request)
+        if stream_format is None:
+            return super().list(request, *args, **kwargs)
+
+        return StreamingHttpResponse(
+            self.stream_rows(stream_format),
+            content_type=self.stream_formats[stream_format][1]
+        )
+
+
+@lru_cache(maxsize=None)
+def get_async_views_executor(threads: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(threads, thread_name_prefix='api-async')
+
+
+def run_with_connections(view: 'Callable') -> 'Callable':
+    """
+    Threads of the async views executor are not closing connections on
+    request_started / request_finished, so the view does it instead.
+    """
+
+    def run(*args, **kwargs) -> 'HttpResponseBase':
+        close_old_connections()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return run
+
+
+def record_slow_queries(view: 'Callable') -> 'Callable':
+    """
+    Connections of the threads async views run in are not wrapped by
+    api.middleware.MetricsMiddleware, so the view records slow queries.
+    """
+
+    def run(
+        request: 'HttpRequest', *args, **kwargs
+    ) -> 'HttpResponseBase':
+        if not settings.METRICS_ENABLED:
+            return view(request, *args, **kwargs)
+        recorder = api_metrics.QueryRecorder(
+            get_view_name(request), request.method
+        )
+        with api_metrics.record_queries(recorder):
+            return view(request, *args, **kwargs)
+    return run
+
+
+class AsyncReadMixin:
+    """
+    Safe methods of the view for ASGI: the whole sync dispatch
+    (authentication, cache, queries and serialization) runs in one hop
+    to a thread of the API_ASYNC_THREADS executor, instead of every
+    query going through the single thread sensitive executor, so the
+    database waits of concurrent requests overlap. API_ASYNC_THREADS = 0
+    runs them in the thread sensitive executor as sync views are.
+    Lists are not streamed (async streaming responses need Django 4.2).
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    @classmethod
+    def get_extra_actions(cls) -> list:
+        # actions of the sync view change data
+        return []
+
+    @classonlymethod
+    def as_view(cls, *args, **kwargs) -> 'Callable':
+        view = super().as_view(*args, **kwargs)
+        recorded = record_slow_queries(view)
+        run = run_with_connections(recorded)
+
+        @wraps(view)
+        async def async_view(
+            request: 'HttpRequest', *args, **kwargs
+        ) -> 'HttpResponseBase':
+            threads = settings.API_ASYNC_THREADS
+            if not threads:
+                return await sync_to_async(recorded)(
+                    request, *args, **kwargs
+                )
+            return await sync_to_async(
+                run,
+                thread_sensitive=False,
+                executor=get_async_views_executor(threads)
+            )(request, *args, **kwargs)
+        return async_view
+
+    def get_stream_format(self, request: 'Request') -> None:
+        stream_query_param = getattr(self, 'stream_query_param', None)
+        if request.query_params.get(stream_query_param, '0') != '0':
+            raise ValidationError({
+                stream_query_param: ['Not supported by async views.']
+            })
+        return None
+
+
+def metrics(request: 'HttpRequest') -> HttpResponse:
+    """
+    Metrics of api.middleware.MetricsMiddleware in Prometheus text
+    format, requires Authorization: Bearer METRICS_TOKEN and is not
+    found without the setting. The registry is per process, so a scrape
+    sees the requests of the worker which served it only: scrape every
+    worker (or run one worker per scraped target).
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    if not constant_time_compare(
+        request.headers.get('Authorization', ''),
+        f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        api_metrics.registry.render(), content_type=api_metrics.CONTENT_TYPE
+    )
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
 application = get_wsgi_application()
+
+# imported after the application set up apps
+from units.reaper import start_reaper  # noqa: E402
+
+start_reaper()
@@ -0,0 +1,177 @@
+"""
+Throughput and latency of the units list (one page of page_size rows)
+at high concurrency: sync views served by WSGI threads, sync views
+under ASGI and async views (/api/async/) under ASGI, which run in
+--async-threads executor threads:
+
+    python -m benchmarks.asgi --concurrency 100 --db-latency-ms 5
+
+--db-latency-ms adds a sleep to every query to model a remote database.
+"""
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List
+
+from benchmarks.base import (
+    create_units, create_user, get_parser, setup, test_database
+)
+
+if TYPE_CHECKING:
+    from users.models import User
+
+
+def add_db_latency(latency: float) -> 'Callable':
+    from django.db.backends.signals import connection_created
+
+    def delay(execute: 'Callable', *args):
+        time.sleep(latency)
+        return execute(*args)
+
+    def receiver(connection, **kwargs) -> None:
+        # the wrappers are kept when the connection is reopened
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(receiver, weak=False)
+    return receiver
+
+
+def report(name: str, elapsed: float, latencies: 'List[float]') -> None:
+    latencies = sorted(latencies)
+    print(
+        f'{name}: {len(latencies) / elapsed:.0f} req/s, '
+        f'p50 {statistics.median(latencies) * 1000:.1f}ms, '
+        f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms'
+    )
+
+
+def run_wsgi(user: 'User', url: str, requests: int, threads: int) -> None:
+    from django.db import connections
+    from django.test import Client
+
+    local = threading.local()
+
+    def get_client() -> 'Client':
+        if not hasattr(local, 'client'):
+            local.client = Client()
+            local.client.force_login(user)
+        return local.client
+
+    def get(_) -> float:
+        started = time.perf_counter()
+        response = get_client().get(url)
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(threads) as pool:
+        # logins and connections are not measured
+        list(pool.map(get, range(threads)))
+        started = time.perf_counter()
+        latencies = list(pool.map(get, range(requests)))
+        report(f'wsgi {threads} threads {url}', time.perf_counter() - started,
+               latencies)
+
+        barrier = threading.Barrier(threads)
+
+        def close(_) -> None:
+            barrier.wait()
+            connections.close_all()
+
+        list(pool.map(close, range(threads)))
+
+
+def close_executor_connections(threads: int) -> None:
+    from django.db import connections
+
+    from api.views import get_async_views_executor
+
+    barrier = threading.Barrier(threads)
+
+    def close() -> None:
+        barrier.wait()
+        connections.close_all()
+
+    executor = get_async_views_executor(threads)
+    for future in [executor.submit(close) for _ in range(threads)]:
+        future.result()
+
+
+def run_asgi(user: 'User', url: str, requests: int, concurrency: int) -> None:
+    from asgiref.sync import sync_to_async
+    from django.db import connections
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    client.force_login(user)
+
+    async def get(client: 'AsyncClient', semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url)
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - started
+
+    async def main() -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+        await get(client, semaphore)
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *[get(client, semaphore) for _ in range(requests)]
+        )
+        report(f'asgi {concurrency} concurrent {url}',
+               time.perf_counter() - started, latencies)
+        await sync_to_async(connections.close_all)()
+
+    asyncio.run(main())
+
+
+def run(
+    rows: int,
+    requests: int,
+    concurrency: int,
+    threads: int,
+    async_threads: int,
+    page_size: int,
+    db_latency: float
+) -> None:
+    from django.db import connections
+    from django.test import override_settings
+
+    create_units(rows)
+    user = create_user()
+    connections.close_all()
+    if db_latency:
+        add_db_latency(db_latency)
+
+    query = f'?page_size={page_size}'
+    run_wsgi(user, f'/api/units/{query}', requests, threads)
+    run_asgi(user, f'/api/units/{query}', requests, concurrency)
+    with override_settings(API_ASYNC_THREADS=async_threads):
+        run_asgi(user, f'/api/async/units/{query}', requests, concurrency)
+    if async_threads:
+        close_executor_connections(async_threads)
+
+
+if __name__ == '__main__':
+    parser = get_parser(__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--async-threads', type=int, default=16)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--db-latency-ms', type=float, default=0)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(
+            args.rows,
+            args.requests,
+            args.concurrency,
+            args.threads,
+            args.async_threads,
+            args.page_size,
+            args.db_latency_ms / 1000
+        )
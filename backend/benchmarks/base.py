@@ -0,0 +1,98 @@
+"""
+Helpers of benchmark scripts, a script runs against a throwaway test
+database created from the configured one:
+
+    python -m benchmarks.serializers --rows 10000
+"""
+import argparse
+import os
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import TYPE_CHECKING, Callable, Iterator, List
+
+import django
+
+if TYPE_CHECKING:
+    from units.models import Unit
+    from users.models import User
+
+
+def setup() -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings_test')
+    django.setup()
+
+
+@contextmanager
+def test_database() -> 'Iterator[None]':
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def get_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    return parser
+
+
+def time_rounds(func: 'Callable', repeat: int) -> 'List[float]':
+    """
+    Wall times of repeat runs in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def measure(func: 'Callable', repeat: int) -> float:
+    """
+    Best wall time of repeat runs in seconds.
+    """
+    return min(time_rounds(func, repeat))
+
+
+def create_units(count: int, shops: int = 100) -> 'List[Unit]':
+    from shops.models import Shop
+    from units.models import Unit
+
+    rnd = random.Random(count)
+    shops = Shop.objects.bulk_create(
+        [Shop(name=f'Benchmark shop {idx}') for idx in range(shops)]
+    )
+    return Unit.objects.bulk_create(
+        [
+            Unit(
+                shop=shops[idx % len(shops)],
+                name=f'Benchmark unit {idx}',
+                weight=Decimal(rnd.randint(1, 5000)) / 100,
+                price=Decimal(rnd.randint(1, 100000)) / 100,
+                amount=rnd.randint(0, 1000),
+            )
+            for idx in range(count)
+        ],
+        batch_size=1000
+    )
+
+
+def create_user(username: str = 'benchmark') -> 'User':
+    from users.models import User
+
+    return User.objects.create(
+        username=username, email=f'{username}@example.com'
+    )
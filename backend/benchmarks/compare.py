@@ -0,0 +1,86 @@
+"""
+Compare best times of two benchmark suite runs of the history, cases
+slower by more than --threshold are regressions and the exit status
+is 1 then:
+
+    python -m benchmarks.compare                 # previous and last run
+    python -m benchmarks.compare before-change -1 --threshold 0.05
+
+Runs are referred to by index (negative from the end), label or commit.
+"""
+import argparse
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.history import DEFAULT_PATH, find_run, load_history
+
+
+def compare(
+    base: 'Dict[str, dict]', target: 'Dict[str, dict]', threshold: float
+) -> 'Tuple[List[str], List[str]]':
+    """
+    Report lines of cases of both runs and names of regressed cases.
+    """
+    lines = []
+    regressions = []
+    for name in sorted(base.keys() | target.keys()):
+        if name not in base or name not in target:
+            lines.append(
+                f'{name}: only in {"target" if name in target else "base"}'
+            )
+            continue
+        # per operation, the ops of a round may differ between runs
+        base_time = base[name]['best'] / base[name]['ops']
+        target_time = target[name]['best'] / target[name]['ops']
+        change = target_time / base_time - 1
+        line = (
+            f'{name}: {base_time * 1e6:.2f}us -> {target_time * 1e6:.2f}us '
+            f'({change:+.1%})'
+        )
+        if change > threshold:
+            regressions.append(name)
+            line += ' REGRESSION'
+        lines.append(line)
+    return lines, regressions
+
+
+def main(argv: 'List[str]') -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base', nargs='?', default='-2')
+    parser.add_argument('target', nargs='?', default='-1')
+    parser.add_argument('--history', default=DEFAULT_PATH)
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Allowed slowdown ratio, 0.1 is 10%%.'
+    )
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    try:
+        base = find_run(history, args.base)
+        target = find_run(history, args.target)
+    except LookupError as err:
+        parser.error(str(err))
+
+    for run in (base, target):
+        print(
+            f'{run.get("label") or "-"} {run.get("commit") or "-"} '
+            f'{run["created_at"]} {run["options"]}'
+        )
+    lines, regressions = compare(
+        base['results'], target['results'], args.threshold
+    )
+    print('\n'.join(lines))
+    if regressions:
+        print(
+            f'{len(regressions)} regressions above {args.threshold:.0%}: '
+            f'{", ".join(regressions)}'
+        )
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,163 @@
+"""
+EXPLAIN ANALYZE of list queries of the units API views on seeded data,
+with the current indexes and at the --baseline migration of units app
+(before the indexes), plans and times are written to --output json.
+
+    python -m benchmarks.explain --rows 200000 --output plans.json
+"""
+import json
+from typing import TYPE_CHECKING
+
+from benchmarks.base import (
+    create_units, create_user, get_parser, setup, test_database
+)
+
+if TYPE_CHECKING:
+    from django.db.models.query import QuerySet
+
+PAGE_SIZE = 50
+
+
+def get_view_queryset(view_class: type, params: dict, user) -> 'QuerySet':
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get('/', params))
+    request.user = user
+    view = view_class(
+        request=request, format_kwarg=None, args=(), kwargs={}
+    )
+    return view.get_values_queryset()[:PAGE_SIZE]
+
+
+def get_cases(user, unit) -> 'dict':
+    from api.pagination import KeysetPagination
+    from units.views import ReservedUnitView, UnitView
+
+    keyset_filter = KeysetPagination().get_position_filter(
+        ['price_for_kg', 'id'], [unit.price_for_kg, unit.id]
+    )
+    return {
+        'units': get_view_queryset(UnitView, {}, user),
+        'units_by_shop': get_view_queryset(
+            UnitView, {'shop__name': unit.shop.name}, user
+        ),
+        'units_by_name': get_view_queryset(
+            UnitView, {'name': unit.name}, user
+        ),
+        'units_by_price_for_kg': get_view_queryset(
+            UnitView,
+            {
+                'price_for_kg__lte': unit.price_for_kg,
+                'ordering': 'price_for_kg'
+            },
+            user
+        ),
+        'units_keyset_by_price_for_kg': get_view_queryset(
+            UnitView, {'ordering': 'price_for_kg'}, user
+        ).model.objects.filter(keyset_filter).order_by(
+            'price_for_kg', 'id'
+        )[:PAGE_SIZE],
+        'units_search': get_view_queryset(
+            UnitView, {'search': unit.name.split()[-1][:3]}, user
+        ),
+        'reserved_units': get_view_queryset(ReservedUnitView, {}, user),
+        'reserved_units_by_shop': get_view_queryset(
+            ReservedUnitView, {'unit__shop__name': unit.shop.name}, user
+        ),
+    }
+
+
+def explain(cases: dict) -> dict:
+    from django.db import DatabaseError, transaction
+
+    results = {}
+    for name, queryset in cases.items():
+        try:
+            with transaction.atomic():
+                plan = json.loads(
+                    queryset.explain(analyze=True, buffers=True, format='json')
+                )[0]
+        except DatabaseError as err:
+            # e.g. column is not created yet at baseline migration
+            results[name] = {'sql': str(queryset.query), 'error': str(err)}
+            continue
+        results[name] = {
+            'sql': str(queryset.query),
+            'execution_time': plan['Execution Time'],
+            'planning_time': plan['Planning Time'],
+            'plan': plan['Plan'],
+        }
+    return results
+
+
+def get_node_types(plan: dict) -> 'set':
+    nodes = {plan['Node Type']}
+    for child in plan.get('Plans', []):
+        nodes |= get_node_types(child)
+    return nodes
+
+
+def format_result(result: dict) -> str:
+    if 'error' in result:
+        return result['error'].splitlines()[0]
+    return (
+        f'{result["execution_time"]:.2f}ms '
+        f'{sorted(get_node_types(result["plan"]))}'
+    )
+
+
+def run(rows: int, baseline: str, output: 'str | None') -> None:
+    from django.core.management import call_command
+    from django.db import connection
+
+    from units.models import ReservedUnit
+
+    units = create_units(rows, shops=max(rows // 100, 1))
+    users = [create_user(f'benchmark {idx}') for idx in range(100)]
+    ReservedUnit.objects.bulk_create(
+        [
+            ReservedUnit(user=user, unit=units[(idx * 7919) % len(units)])
+            for idx, user in enumerate(users * max(rows // 1000, 1))
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    user, unit = users[0], units[len(units) // 2]
+
+    def analyze() -> dict:
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return explain(get_cases(user, unit))
+
+    results = {name: {'after': result} for name, result in analyze().items()}
+    if baseline:
+        app_label, migration = baseline.split('.')
+        call_command('migrate', app_label, migration, verbosity=0)
+        for name, result in analyze().items():
+            results[name]['before'] = result
+
+    for name, result in results.items():
+        print(f'{name}: ' + ', '.join(
+            f'{state} {format_result(result[state])}'
+            for state in ('before', 'after') if state in result
+        ))
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    parser = get_parser(__doc__)
+    parser.set_defaults(rows=100000)
+    # queries using columns added after the baseline fail there, run the
+    # harness with the settings not using them to compare (or without
+    # baseline, --baseline '')
+    parser.add_argument(
+        '--baseline', default='units.0005_unit_name_search_idx'
+    )
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.rows, args.baseline, args.output)
@@ -0,0 +1,67 @@
+"""
+JSON history of benchmark suite runs, a list of runs ordered by time:
+
+    [{"label": ..., "commit": ..., "created_at": ..., "python": ...,
+      "django": ..., "options": {...},
+      "results": {case: {"best": s, "median": s, "ops": n}}}, ...]
+
+Times are seconds per round of ops operations.
+"""
+import json
+import os
+import subprocess
+from typing import List, Optional
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'history.json')
+
+
+def load_history(path: str) -> 'List[dict]':
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def append_run(path: str, run: dict) -> None:
+    history = load_history(path)
+    history.append(run)
+    # written next to the history and renamed, so an interrupted write
+    # does not lose the previous runs
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(history, file, indent=2)
+        file.write('\n')
+    os.replace(temp_path, path)
+
+
+def get_commit() -> 'Optional[str]':
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            check=True,
+            text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_run(history: 'List[dict]', ref: str) -> dict:
+    """
+    Run by index in the history (negative from the end), label or
+    commit prefix, the latest one if several runs match.
+    """
+    try:
+        return history[int(ref)]
+    except ValueError:
+        pass
+    except IndexError as err:
+        raise LookupError(f'There is no run {ref}') from err
+
+    for run in reversed(history):
+        if run.get('label') == ref or (
+            run.get('commit') or ''
+        ).startswith(ref):
+            return run
+    raise LookupError(f'There is no run {ref}')
@@ -0,0 +1,44 @@
+"""
+Throughput of import_units command on generated csv file, the file is
+imported twice to measure inserts and then updates of the same units.
+"""
+import csv
+import os
+import random
+import tempfile
+
+from benchmarks.base import get_parser, setup, test_database
+
+
+def write_csv(path: str, rows: int, shops: int = 1000) -> None:
+    rnd = random.Random(rows)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(('shop', 'name', 'weight', 'price', 'amount'))
+        for idx in range(rows):
+            writer.writerow((
+                f'Import shop {idx % shops}',
+                f'Import unit {idx}',
+                f'{rnd.randint(1, 5000) / 100:.2f}',
+                f'{rnd.randint(1, 100000) / 100:.2f}',
+                rnd.randint(0, 1000),
+            ))
+
+
+def run(rows: int, repeat: int) -> None:
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'units.csv')
+        write_csv(path, rows)
+        for _ in range(max(repeat, 2)):
+            call_command('import_units', path)
+
+
+if __name__ == '__main__':
+    parser = get_parser(__doc__)
+    parser.set_defaults(rows=100000, repeat=2)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.rows, args.repeat)
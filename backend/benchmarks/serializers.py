@@ -0,0 +1,68 @@
+"""
+Throughput of model serializers against the values read path on long
+unit and reserved unit lists, the rendered JSON must be the same.
+"""
+from benchmarks.base import (
+    create_units, create_user, get_parser, measure, setup, test_database
+)
+
+
+def run(rows: int, repeat: int) -> None:
+    from rest_framework.renderers import JSONRenderer
+
+    from units.models import ReservedUnit, Unit
+    from units.serializers import ReservedUnitSerializer, UnitSerializer
+
+    units = create_units(rows)
+    user = create_user()
+    # stock is not taken by bulk_create, it is not needed here
+    ReservedUnit.objects.bulk_create(
+        [ReservedUnit(user=user, unit=unit, amount=1) for unit in units],
+        batch_size=1000
+    )
+
+    renderer = JSONRenderer()
+    # ordered by pk to not measure sorting by text columns
+    cases = (
+        (UnitSerializer, Unit.objects.select_related('shop').order_by('id')),
+        (
+            ReservedUnitSerializer,
+            ReservedUnit.objects
+            .select_related('user', 'unit__shop')
+            .order_by('id')
+        ),
+    )
+    for serializer_class, queryset in cases:
+        def serialize() -> bytes:
+            return renderer.render(
+                serializer_class(queryset.all(), many=True).data
+            )
+
+        def serialize_values() -> bytes:
+            serializer = serializer_class()
+            return renderer.render(
+                serializer.to_values_representation(
+                    serializer.get_values_queryset(queryset.all())
+                )
+            )
+
+        if serialize() != serialize_values():
+            raise AssertionError(
+                f'{serializer_class.__name__}: JSON is not the same'
+            )
+
+        model_time = measure(serialize, repeat)
+        values_time = measure(serialize_values, repeat)
+        print(
+            f'{serializer_class.__name__}: {rows} rows, '
+            f'model {rows / model_time:.0f} rows/s, '
+            f'values {rows / values_time:.0f} rows/s, '
+            f'x{model_time / values_time:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    args = get_parser(__doc__).parse_args()
+    setup()
+    with test_database():
+        run(args.rows, args.repeat)
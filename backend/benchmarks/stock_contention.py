@@ -0,0 +1,79 @@
+"""
+Throughput of concurrent stock takes of a single hot unit, with the
+unit row and with its stock split into slots (shard_unit_stock):
+
+    python -m benchmarks.stock_contention --threads 32 --slots 1 8 32
+
+Every take runs in its own transaction held for --hold-ms after the
+UPDATE, as the rest of a reservation request would hold it.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from benchmarks.base import create_units, get_parser, setup, test_database
+
+
+def run_takes(unit_id: int, takes: int, threads: int, hold: float) -> float:
+    from django.db import connections, transaction
+
+    from units.models import Unit
+    from units.utils import UnitsUtil
+
+    util = UnitsUtil()
+
+    def take(_) -> None:
+        with transaction.atomic():
+            unit = Unit.objects.only('id', 'stock_shards').get(id=unit_id)
+            util.update_unit_amount(unit, 1)
+            time.sleep(hold)
+
+    with ThreadPoolExecutor(threads) as pool:
+        # connections are not measured
+        list(pool.map(take, range(threads)))
+        started = time.perf_counter()
+        list(pool.map(take, range(takes)))
+        elapsed = time.perf_counter() - started
+
+        barrier = threading.Barrier(threads)
+
+        def close(_) -> None:
+            barrier.wait()
+            connections.close_all()
+
+        list(pool.map(close, range(threads)))
+    return elapsed
+
+
+def run(takes: int, threads: int, slots_list: 'List[int]', hold: float):
+    from django.db import connections
+
+    from units.models import Unit
+    from units.utils import UnitsUtil
+
+    unit = create_units(1, shops=1)[0]
+    connections.close_all()
+    for slots in slots_list:
+        UnitsUtil().shard_stock([unit.id], 0)
+        Unit.objects.filter(id=unit.id).update(amount=takes * 2)
+        # 1 slot is the plain unit row
+        if slots > 1:
+            UnitsUtil().shard_stock([unit.id], slots)
+        elapsed = run_takes(unit.id, takes, threads, hold)
+        print(
+            f'{slots} slots, {threads} threads: '
+            f'{takes / elapsed:.0f} takes/s'
+        )
+
+
+if __name__ == '__main__':
+    parser = get_parser(__doc__)
+    parser.add_argument('--takes', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--slots', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--hold-ms', type=float, default=1)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.takes, args.threads, args.slots, args.hold_ms / 1000)
@@ -0,0 +1,49 @@
+"""
+Peak Python memory of the units list built in memory against the
+streamed one (?stream=json), the peak of streamed list should not
+grow with the number of rows.
+"""
+import tracemalloc
+
+from benchmarks.base import (
+    create_units, create_user, get_parser, measure, setup, test_database
+)
+
+
+def run(rows: int, repeat: int) -> None:
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from units.views import UnitView
+
+    create_units(rows)
+    user = create_user()
+    view = UnitView.as_view({'get': 'list'})
+    factory = APIRequestFactory()
+
+    def get(query: str) -> int:
+        request = factory.get(f'/api/units/{query}')
+        force_authenticate(request, user)
+        response = view(request)
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.render().content)
+
+    for name, query in (
+        ('list', '?ordering=id'), ('stream', '?ordering=id&stream=1')
+    ):
+        tracemalloc.start()
+        size = get(query)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        elapsed = measure(lambda: get(query), repeat)
+        print(
+            f'{name}: {rows} rows, {size / 2 ** 20:.1f} MiB, '
+            f'peak {peak / 2 ** 20:.1f} MiB, {rows / elapsed:.0f} rows/s'
+        )
+
+
+if __name__ == '__main__':
+    args = get_parser(__doc__).parse_args()
+    setup()
+    with test_database():
+        run(args.rows, args.repeat)
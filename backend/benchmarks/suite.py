@@ -0,0 +1,308 @@
+"""
+Micro-benchmarks of serializers, ordering filter, pricing and the
+reservation hot paths, each run is appended to the --history file
+(compare runs with python -m benchmarks.compare):
+
+    python -m benchmarks.suite --rows 10000 --label before-change
+    python -m benchmarks.suite -k ordering --sizes 1000 10000 100000
+
+Cases which write roll their round back, so every round starts from
+the same data.
+"""
+import platform
+import statistics
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+import django
+
+from benchmarks.base import (
+    create_units, create_user, get_parser, setup, test_database, time_rounds
+)
+from benchmarks.history import DEFAULT_PATH, append_run, get_commit
+
+if TYPE_CHECKING:
+    from users.models import User
+
+PAGE_SIZE = 50
+# CASE of the ordering fallback has a branch per row
+FALLBACK_MAX_ROWS = 10000
+SAVES_PER_ROUND = 100
+BUYER_RESERVATIONS = 20
+
+# name -> setup(data) returning the measured function and its ops
+CASES: 'Dict[str, Callable[[SuiteData], Tuple[Callable, int]]]' = {}
+
+
+def case(name: str) -> 'Callable':
+    def register(setup_case: 'Callable') -> 'Callable':
+        CASES[name] = setup_case
+        return setup_case
+    return register
+
+
+def rolled_back(func: 'Callable') -> 'Callable':
+    from django.db import transaction
+
+    def run() -> None:
+        with transaction.atomic():
+            func()
+            transaction.set_rollback(True)
+    return run
+
+
+class SuiteData:
+    """
+    Units (the most of rows and sizes), reservations of a user for
+    rows units and of a buyer for a few units.
+    """
+
+    def __init__(self, rows: int, sizes: 'List[int]'):
+        from units.models import ReservedUnit, Unit
+
+        self.rows = rows
+        self.units: 'List[Unit]' = create_units(max(rows, *sizes))
+        Unit.objects.update(amount=10 ** 6)
+        self.user: 'User' = create_user()
+        # stock is not taken by bulk_create, it is not needed here
+        ReservedUnit.objects.bulk_create(
+            [
+                ReservedUnit(user=self.user, unit=unit, amount=1)
+                for unit in self.units[:rows]
+            ],
+            batch_size=1000
+        )
+        self.buyer: 'User' = create_user('buyer')
+        ReservedUnit.objects.bulk_create([
+            ReservedUnit(user=self.buyer, unit=unit, amount=1)
+            for unit in self.units[:BUYER_RESERVATIONS]
+        ])
+        self.buyer.app_account.amount = 10 ** 9
+        self.buyer.app_account.save(update_fields=('amount',))
+
+
+def serializer_case(
+    serializer_name: str, values: bool
+) -> 'Callable[[SuiteData], Tuple[Callable, int]]':
+    def setup_case(data: SuiteData) -> 'Tuple[Callable, int]':
+        from rest_framework.renderers import JSONRenderer
+
+        from units import serializers
+        from units.models import ReservedUnit, Unit
+
+        serializer_class = getattr(serializers, serializer_name)
+        # ordered by pk to not measure sorting by text columns
+        if serializer_class is serializers.UnitSerializer:
+            queryset = Unit.objects.select_related('shop').filter(
+                id__lte=data.units[data.rows - 1].id
+            )
+        else:
+            queryset = ReservedUnit.objects.select_related(
+                'user', 'unit__shop'
+            ).filter(user=data.user)
+        queryset = queryset.order_by('id')
+        renderer = JSONRenderer()
+
+        def serialize() -> bytes:
+            return renderer.render(
+                serializer_class(queryset.all(), many=True).data
+            )
+
+        def serialize_values() -> bytes:
+            serializer = serializer_class()
+            return renderer.render(
+                serializer.to_values_representation(
+                    serializer.get_values_queryset(queryset.all())
+                )
+            )
+
+        return serialize_values if values else serialize, data.rows
+    return setup_case
+
+
+for serializer_name in ('UnitSerializer', 'ReservedUnitSerializer'):
+    for values in (False, True):
+        CASES[
+            f'{serializer_name}[{"values" if values else "model"}]'
+        ] = serializer_case(serializer_name, values)
+
+
+def ordering_case(
+    size: int, stored: bool
+) -> 'Callable[[SuiteData], Tuple[Callable, int]]':
+    def setup_case(data: SuiteData) -> 'Tuple[Callable, int]':
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from units.filters import OrderingByPropertyFilter
+        from units.models import Unit
+        from units.views import UnitView
+
+        queryset = Unit.objects.select_related('shop').filter(
+            id__lte=data.units[size - 1].id
+        )
+        property_filter = OrderingByPropertyFilter()
+        request = Request(
+            APIRequestFactory().get('/', {'ordering': '-price_for_kg'})
+        )
+        view = UnitView(request=request, format_kwarg=None)
+
+        def order() -> list:
+            if stored:
+                # price_for_kg column
+                ordered = property_filter.filter_queryset(
+                    request, queryset.all(), view
+                )
+            else:
+                # properties without database expression
+                ordered = property_filter._get_filtered_queryset(
+                    queryset.all(),
+                    ['-price_for_kg'],
+                    ['price_for_kg', '-price_for_kg']
+                )
+            return list(ordered[:PAGE_SIZE])
+
+        return order, 1
+    return setup_case
+
+
+def register_ordering_cases(sizes: 'List[int]') -> None:
+    for size in sizes:
+        CASES[f'OrderingByPropertyFilter[stored,{size}]'] = (
+            ordering_case(size, True)
+        )
+        if size <= FALLBACK_MAX_ROWS:
+            CASES[f'OrderingByPropertyFilter[fallback,{size}]'] = (
+                ordering_case(size, False)
+            )
+
+
+@case('calculate_price_for_kg')
+def price_for_kg_case(data: SuiteData) -> 'Tuple[Callable, int]':
+    from units.models import calculate_price_for_kg
+
+    pairs = [(unit.price, unit.weight) for unit in data.units[:data.rows]]
+
+    def calculate() -> list:
+        return [
+            calculate_price_for_kg(price, weight) for price, weight in pairs
+        ]
+
+    return calculate, len(pairs)
+
+
+@case('ReservedUnit.total')
+def total_case(data: SuiteData) -> 'Tuple[Callable, int]':
+    from units.models import ReservedUnit
+
+    reserved_units = list(
+        ReservedUnit.objects.select_related('unit').filter(user=data.user)
+    )
+
+    def total() -> list:
+        return [reserved_unit.total for reserved_unit in reserved_units]
+
+    return total, len(reserved_units)
+
+
+@case('ReservedUnit.save')
+def reservation_save_case(data: SuiteData) -> 'Tuple[Callable, int]':
+    from units.models import ReservedUnit, Unit
+
+    # units not reserved by the buyer, saved through the signals
+    units = list(Unit.objects.filter(
+        id__in=[unit.id for unit in data.units[-SAVES_PER_ROUND:]]
+    ))
+
+    def save() -> None:
+        for unit in units:
+            ReservedUnit(user=data.buyer, unit=unit, amount=2).save()
+
+    return rolled_back(save), len(units)
+
+
+def request_case(
+    method: str, url_name: str
+) -> 'Callable[[SuiteData], Tuple[Callable, int]]':
+    def setup_case(data: SuiteData) -> 'Tuple[Callable, int]':
+        from rest_framework.reverse import reverse
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(data.buyer)
+        url = reverse(url_name)
+
+        def request() -> None:
+            response = getattr(client, method)(url)
+            assert response.status_code < 300, response.status_code
+
+        return rolled_back(request), 1
+    return setup_case
+
+
+CASES['buy'] = request_case('post', 'reserved-unit-buy')
+CASES['clear'] = request_case('delete', 'reserved-unit-clear')
+
+
+def run(
+    rows: int,
+    sizes: 'List[int]',
+    repeat: int,
+    keyword: str
+) -> 'Dict[str, dict]':
+    register_ordering_cases(sizes)
+    names = [name for name in CASES if keyword.lower() in name.lower()]
+    data = SuiteData(rows, sizes)
+    results = {}
+    for name in names:
+        func, ops = CASES[name](data)
+        # first round warms up caches and connections
+        func()
+        times = time_rounds(func, repeat)
+        results[name] = {
+            'best': min(times),
+            'median': statistics.median(times),
+            'ops': ops,
+        }
+        print(
+            f'{name}: {min(times) * 1000:.2f}ms, '
+            f'{ops / min(times):.4g} ops/s'
+        )
+    return results
+
+
+if __name__ == '__main__':
+    parser = get_parser(__doc__)
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[1000, 10000, 100000],
+        help='Rows of ordering cases.'
+    )
+    parser.add_argument(
+        '-k', dest='keyword', default='', help='Run cases with the text.'
+    )
+    parser.add_argument('--history', default=DEFAULT_PATH)
+    parser.add_argument('--label', help='Name of the run to compare by.')
+    parser.add_argument(
+        '--no-save', action='store_true', help='Do not write the history.'
+    )
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        results = run(args.rows, args.sizes, args.repeat, args.keyword)
+
+    if not args.no_save:
+        append_run(args.history, {
+            'label': args.label,
+            'commit': get_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {
+                'rows': args.rows, 'sizes': args.sizes, 'repeat': args.repeat
+            },
+            'results': results,
+        })
+        print(f'Saved to {args.history}')
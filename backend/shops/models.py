@@ -1,11 +1,73 @@
+from typing import Iterable, Sequence
+
 from django.contrib.postgres.fields import CICharField
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import (
+    SHOPS_VERSION, UNITS_ALL_VERSION, UNITS_VERSION, bump_versions
+)
+from shops.signals import shops_renamed
 
 # Create your models here.
 
 
+class ShopQuerySet(models.QuerySet):
+    """
+    Notify about renames bypassing Shop.save, units keep shop name.
+    """
+
+    def _send_renamed(self, shop_ids: 'Iterable[int]') -> None:
+        shop_ids = list(shop_ids)
+        shops_renamed.send(
+            sender=self.model, shop_ids=shop_ids, using=self.db
+        )
+        bump_versions(
+            SHOPS_VERSION,
+            UNITS_VERSION,
+            UNITS_ALL_VERSION,
+            *[f'shop:{shop_id}' for shop_id in shop_ids]
+        )
+
+    def update(self, **kwargs) -> int:
+        if 'name' not in kwargs:
+            return super().update(**kwargs)
+
+        shop_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        self._send_renamed(shop_ids)
+        return updated
+
+    update.alters_data = True
+
+    def bulk_update(
+        self, objs: 'Iterable[Shop]', fields: 'Sequence[str]', *args, **kwargs
+    ) -> int:
+        objs = list(objs)
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        if 'name' in fields:
+            self._send_renamed(obj.pk for obj in objs)
+        return updated
+
+
 class Shop(models.Model):
     name = CICharField(max_length=128, unique=True)
 
+    objects = ShopQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.name
+
+
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def update_shop_cache_hook(
+    sender: Shop, instance: Shop, using: str, created: bool = False, **kwargs
+) -> None:
+    bump_versions(
+        SHOPS_VERSION,
+        f'shop:{instance.id}',
+        # units are shown with shop name
+        *([] if created else [UNITS_VERSION, UNITS_ALL_VERSION])
+    )
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# sent with shop_ids and using when shops are renamed bypassing Shop.save
+shops_renamed = Signal()
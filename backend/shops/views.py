@@ -1,6 +1,8 @@
 from rest_framework import mixins
 from rest_framework import permissions
 from rest_framework import viewsets
+from api.cache import CachedResponseMixin, SHOPS_VERSION
+from api.views import AsyncReadMixin
 from shops.models import Shop
 from shops.serializers import ShopSerializer
 
@@ -8,7 +10,16 @@ from shops.serializers import ShopSerializer
 
 
 class ShopView(
-    mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+    CachedResponseMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet
 ):
     serializer_class = ShopSerializer
-    queryset = Shop.objects.all()
+    cache_versions = (SHOPS_VERSION,)
+    cache_object_version = 'shop'
+    queryset = Shop.objects.order_by('id')
+
+
+class AsyncShopView(AsyncReadMixin, ShopView):
+    pass
@@ -1,8 +1,18 @@
-from operator import attrgetter
-from typing import TYPE_CHECKING, List
+import re
+from functools import reduce
+from operator import and_, attrgetter, or_
+from typing import TYPE_CHECKING, List, Optional
 
-from django.db.models import Case, When
-from rest_framework.filters import OrderingFilter
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db.models import Case, F, FloatField, Q, When
+from django.db.models.functions import Cast
+from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
+
+from units.models import ReservedUnit, Unit, get_shop_name_lookup
 
 if TYPE_CHECKING:
     from django.db.models.query import QuerySet
@@ -11,7 +21,71 @@ if TYPE_CHECKING:
     from units.views import UnitView
 
 
+PRICE_FOR_KG_LOOKUPS = ['exact', 'lt', 'lte', 'gt', 'gte']
+
+
+class ShopNameFilterSetMixin:
+    """
+    Shop name filter by the lookup of the current settings.
+    """
+    shop_name_filter: str
+    shop_name_prefix = ''
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.filters[self.shop_name_filter].field_name = (
+            get_shop_name_lookup(self.shop_name_prefix)
+        )
+
+
+class UnitFilterSet(ShopNameFilterSetMixin, filters.FilterSet):
+    shop__name = filters.CharFilter(field_name='shop__name')
+    shop_name_filter = 'shop__name'
+
+    class Meta:
+        model = Unit
+        fields = {
+            'name': ['exact'],
+            'price_for_kg': PRICE_FOR_KG_LOOKUPS,
+        }
+
+
+class ReservedUnitFilterSet(ShopNameFilterSetMixin, filters.FilterSet):
+    unit__shop__name = filters.CharFilter(field_name='unit__shop__name')
+    shop_name_filter = 'unit__shop__name'
+    shop_name_prefix = 'unit__'
+
+    class Meta:
+        model = ReservedUnit
+        fields = {
+            'unit__name': ['exact'],
+            'unit__price_for_kg': PRICE_FOR_KG_LOOKUPS,
+        }
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    pass
+
+
+class ReservedUnitSearchFilterSet(filters.FilterSet):
+    """
+    Reservations of users by comma separated usernames, emails or
+    phones, all of them are indexed user columns.
+    """
+    username = CharInFilter(field_name='user__username')
+    email = CharInFilter(field_name='user__email')
+    phone = CharInFilter(field_name='user__phone')
+
+    class Meta:
+        model = ReservedUnit
+        fields = []
+
+
 class OrderingByPropertyFilter(OrderingFilter):
+    """
+    Ordering by model properties (property_ordering_fields) and by
+    public names of other fields (ordering_aliases of the view).
+    """
 
     def get_property_ordering_fields(self, view: 'UnitView') -> 'list':
         property_ordering = getattr(
@@ -25,11 +99,14 @@ class OrderingByPropertyFilter(OrderingFilter):
     def get_property_order_expression(
         self, order: str, queryset: 'QuerySet'
     ) -> 'Case':
-        desc = '-' in order
-        order = order.replace('-', '').replace('__', '.')
+        desc = order.startswith('-')
+        field = order.lstrip('-')
 
         queryset_sorted = sorted(
-            [(item.id, attrgetter(order)(item)) for item in queryset],
+            [
+                (item.id, attrgetter(field.replace('__', '.'))(item))
+                for item in queryset
+            ],
             key=lambda x: x[1],
             reverse=desc
         )
@@ -39,6 +116,17 @@ class OrderingByPropertyFilter(OrderingFilter):
             *[When(pk=pk, then=pos) for pos, pk in enumerate(index_list)]
         )
 
+    def get_aliased_ordering(
+        self, ordering: 'List', view: 'UnitView'
+    ) -> 'List':
+        aliases = getattr(view, 'ordering_aliases', {})
+        return [
+            '-' * order.startswith('-')
+            + aliases.get(order.lstrip('-'), order.lstrip('-'))
+            if isinstance(order, str) else order
+            for order in ordering
+        ]
+
     def _get_filtered_queryset(
         self,
         queryset: 'QuerySet',
@@ -61,8 +149,87 @@ class OrderingByPropertyFilter(OrderingFilter):
         self, request: 'Request', queryset: 'QuerySet', view: 'UnitView'
     ) -> 'QuerySet':
         ordering = self.get_ordering(request, queryset, view)
+        if ordering:
+            ordering = self.get_aliased_ordering(ordering, view)
         property_ordering = self.get_property_ordering_fields(view)
 
         return self._get_filtered_queryset(
             queryset, ordering, property_ordering
         )
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Search fields with '@' prefix are searched by prefix (typeahead)
+    full text query: to_tsvector(search_config, fields) is the same
+    expression as of GIN index on the fields. Results are ordered by
+    rank when ordering is not requested.
+    """
+    search_config = 'simple'
+    rank_alias = 'search_rank'
+    word_pattern = re.compile(r'\w+')
+
+    def get_search_vector(self, fields: 'List[str]') -> SearchVector:
+        return SearchVector(*fields, config=self.search_config)
+
+    def get_search_query(self, term: str) -> 'Optional[SearchQuery]':
+        words = self.word_pattern.findall(term)
+        if not words:
+            return None
+        # words have no quotes and operators, so raw query is safe
+        return SearchQuery(
+            ' & '.join(f"'{word}':*" for word in words),
+            search_type='raw',
+            config=self.search_config
+        )
+
+    def filter_queryset(
+        self, request: 'Request', queryset: 'QuerySet', view: 'UnitView'
+    ) -> 'QuerySet':
+        search_fields = [
+            str(field)
+            for field in self.get_search_fields(view, request) or []
+        ]
+        search_terms = self.get_search_terms(request)
+        text_fields = [
+            field[1:] for field in search_fields if field.startswith('@')
+        ]
+        if not text_fields or not search_terms:
+            return super().filter_queryset(request, queryset, view)
+
+        orm_lookups = [
+            self.construct_search(field)
+            for field in search_fields if not field.startswith('@')
+        ]
+        queryset = queryset.alias(
+            search_vector=self.get_search_vector(text_fields)
+        )
+
+        conditions = []
+        queries = []
+        for term in search_terms:
+            query = self.get_search_query(term)
+            condition = reduce(
+                or_,
+                [Q(**{lookup: term}) for lookup in orm_lookups],
+                Q(search_vector=query) if query is not None else Q(pk=None)
+            )
+            conditions.append(condition)
+            if query is not None:
+                queries.append(query)
+        queryset = queryset.filter(reduce(and_, conditions))
+
+        if queries and api_settings.ORDERING_PARAM not in request.query_params:
+            # annotated (not aliased) and ordered by name, so the rank is
+            # selected into values rows and keyset cursors; double
+            # precision, as real is not compared exactly with the cursor
+            queryset = queryset.annotate(**{
+                self.rank_alias: Cast(
+                    SearchRank(F('search_vector'), reduce(and_, queries)),
+                    FloatField()
+                )
+            }).order_by(
+                f'-{self.rank_alias}',
+                *(queryset.query.order_by or queryset.model._meta.ordering)
+            )
+        return queryset
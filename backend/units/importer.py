@@ -0,0 +1,283 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import (
+    IO, TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional,
+    Tuple
+)
+
+from django.db import connections, transaction
+
+from api.cache import (
+    SHOPS_VERSION, UNITS_ALL_VERSION, UNITS_VERSION, bump_versions
+)
+from shops.models import Shop
+from units.models import Unit
+
+if TYPE_CHECKING:
+    from django.db.backends.utils import CursorWrapper
+
+FORMATS = ('csv', 'ndjson')
+
+
+def read_rows(
+    file: 'IO[str]', file_format: str
+) -> 'Iterator[Tuple[int, dict]]':
+    """
+    Rows of csv (with header) or ndjson file with their line numbers,
+    not parsed lines are returned with __all__ error.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_num, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as err:
+            row = {'__all__': f'Invalid JSON: {err}'}
+        if not isinstance(row, dict):
+            row = {'__all__': 'Object is expected'}
+        yield line_num, row
+
+
+class UnitsImporter:
+    """
+    Upsert units on (name, weight, shop) unique key by batches: shops
+    are resolved or created by case insensitive name, rows are loaded
+    into temporary staging table with COPY and moved to units table
+    with INSERT ... ON CONFLICT DO UPDATE.
+    """
+    staging_table = 'units_import_staging'
+    columns = ('name', 'weight', 'price', 'amount', 'shop_id')
+
+    def __init__(
+        self,
+        using: str = 'default',
+        batch_size: int = 10000,
+        on_rejected: 'Optional[Callable[[int, dict, dict], None]]' = None
+    ):
+        self.using = using
+        self.batch_size = batch_size
+        # called with line number, row and errors of rejected row
+        self.on_rejected = on_rejected
+        # lower name -> id
+        self.shops: 'Dict[str, int]' = {}
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.created_shops = 0
+        # exclusive upper bounds of decimal columns
+        self.max_values = {}
+        for field_name in ('weight', 'price'):
+            field = Unit._meta.get_field(field_name)
+            self.max_values[field_name] = Decimal(10) ** (
+                field.max_digits - field.decimal_places
+            )
+
+    @property
+    def imported(self) -> int:
+        return self.inserted + self.updated
+
+    def parse_decimal(self, row: dict, field_name: str) -> Decimal:
+        value = row.get(field_name)
+        if value in (None, ''):
+            return Unit._meta.get_field(field_name).default
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation as err:
+            raise ValueError('A valid number is required.') from err
+        if not value.is_finite() or value.as_tuple().exponent < -2:
+            raise ValueError(
+                'Ensure that there are no more than 2 decimal places.'
+            )
+        if not Decimal('0.01') <= value < self.max_values[field_name]:
+            raise ValueError('Ensure this value is in the allowed range.')
+        return value
+
+    def parse_row(self, row: dict) -> 'Tuple[tuple, Dict[str, str]]':
+        """
+        Values of staging columns (shop name instead of shop id) and
+        errors of the row.
+        """
+        errors = {}
+        if '__all__' in row:
+            return (), {'__all__': row['__all__']}
+
+        values = {}
+        for field_name in ('shop', 'name'):
+            value = str(row.get(field_name) or '').strip()
+            if not value:
+                errors[field_name] = 'This field is required.'
+            elif len(value) > 128:
+                errors[field_name] = (
+                    'Ensure this field has no more than 128 characters.'
+                )
+            values[field_name] = value
+
+        for field_name in ('weight', 'price'):
+            try:
+                values[field_name] = self.parse_decimal(row, field_name)
+            except ValueError as err:
+                errors[field_name] = str(err)
+
+        amount = row.get('amount')
+        try:
+            values['amount'] = (
+                Unit._meta.get_field('amount').default
+                if amount in (None, '') else int(amount)
+            )
+            if not 0 <= values['amount'] <= 2147483647:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['amount'] = 'A valid positive integer is required.'
+
+        if errors:
+            return (), errors
+        return (
+            values['name'],
+            values['weight'],
+            values['price'],
+            values['amount'],
+            values['shop'],
+        ), {}
+
+    def lookup_shops(self, names: 'Iterable[str]') -> None:
+        # name is citext, so lookups are case insensitive
+        self.shops.update(
+            (name.lower(), shop_id)
+            for name, shop_id in Shop.objects.using(self.using).filter(
+                name__in=names
+            ).values_list('name', 'id')
+        )
+
+    def resolve_shops(self, names: 'Iterable[str]') -> None:
+        missing = {
+            name.lower(): name for name in names
+            if name.lower() not in self.shops
+        }
+        if not missing:
+            return
+
+        self.lookup_shops(missing.values())
+        new_names = [
+            name for key, name in missing.items() if key not in self.shops
+        ]
+        if not new_names:
+            return
+
+        # shop may be created by concurrent import, only inserted rows
+        # are returned and counted
+        connection = connections[self.using]
+        table = connection.ops.quote_name(Shop._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (name) SELECT unnest(%s::text[]) '
+                'ON CONFLICT DO NOTHING RETURNING name, id',
+                [new_names]
+            )
+            created = cursor.fetchall()
+        self.created_shops += len(created)
+        self.shops.update((name.lower(), shop_id) for name, shop_id in created)
+        if len(created) < len(new_names):
+            self.lookup_shops(
+                name for name in new_names if name.lower() not in self.shops
+            )
+
+    def create_staging_table(self, cursor: 'CursorWrapper') -> None:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} ('
+            'name text, weight numeric, price numeric, amount integer, '
+            'shop_id bigint)'
+        )
+
+    def copy_rows(self, cursor: 'CursorWrapper', rows: 'List[tuple]') -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f'COPY {self.staging_table} ({", ".join(self.columns)}) '
+            'FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+    def upsert_staged(self, cursor: 'CursorWrapper') -> 'Tuple[int, int]':
+        table = Unit._meta.db_table
+        shops_table = Shop._meta.db_table
+        # same rounding as calculate_price_for_kg, stock of sharded
+        # units is kept in their slots (shard_unit_stock to reset it)
+        cursor.execute(
+            f'INSERT INTO {table} '
+            '(name, weight, price, amount, shop_id, price_for_kg, shop_name, '
+            'stock_shards) '
+            'SELECT staged.name, weight, price, amount, shop_id, '
+            'round(price / weight, 2), shops.name, 0 '
+            f'FROM {self.staging_table} AS staged '
+            f'JOIN {shops_table} AS shops ON shops.id = staged.shop_id '
+            'ON CONFLICT (name, weight, shop_id) DO UPDATE SET '
+            'price = EXCLUDED.price, amount = CASE '
+            f'WHEN {table}.stock_shards > 0 THEN {table}.amount '
+            'ELSE EXCLUDED.amount END, '
+            'price_for_kg = EXCLUDED.price_for_kg '
+            'RETURNING xmax = 0'
+        )
+        results = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'TRUNCATE {self.staging_table}')
+        inserted = sum(results)
+        return inserted, len(results) - inserted
+
+    def import_batch(self, batch: 'List[Tuple[int, dict]]') -> None:
+        rows = {}
+        for line_num, row in batch:
+            values, errors = self.parse_row(row)
+            if errors:
+                self.rejected += 1
+                if self.on_rejected is not None:
+                    self.on_rejected(line_num, row, errors)
+                continue
+            name, weight, _, _, shop = values
+            # row can not be upserted twice by one statement, last wins
+            rows[(name.lower(), weight, shop.lower())] = values
+        if not rows:
+            return
+
+        with transaction.atomic(using=self.using):
+            self.resolve_shops(values[-1] for values in rows.values())
+            with connections[self.using].cursor() as cursor:
+                self.create_staging_table(cursor)
+                self.copy_rows(
+                    cursor,
+                    [
+                        (*values[:-1], self.shops[values[-1].lower()])
+                        for values in rows.values()
+                    ]
+                )
+                inserted, updated = self.upsert_staged(cursor)
+        self.inserted += inserted
+        self.updated += updated
+
+    def run(self, rows: 'Iterable[Tuple[int, dict]]') -> None:
+        rows = iter(rows)
+        try:
+            while batch := list(islice(rows, self.batch_size)):
+                self.read += len(batch)
+                self.import_batch(batch)
+
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {self.staging_table}')
+        finally:
+            # batches are committed one by one, the ones before a failed
+            # batch are imported too
+            if self.imported:
+                bump_versions(
+                    UNITS_VERSION,
+                    UNITS_ALL_VERSION,
+                    *([SHOPS_VERSION] if self.created_shops else [])
+                )
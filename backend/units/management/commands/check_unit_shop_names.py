@@ -0,0 +1,43 @@
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from units.utils import UnitsUtil
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Find units which denormalized shop_name differs from name of '
+        'their shop, fails if there are any unless --repair is given.'
+    )
+    # ids of drifted units listed in the output
+    max_reported_ids = 20
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Copy shop names to the drifted units.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options) -> None:
+        util = UnitsUtil()
+        using = options['database']
+        if options['repair']:
+            repaired = util.sync_shop_names(using=using)
+            self.stdout.write(f'Repaired {repaired} units.')
+            return
+
+        unit_ids = util.get_shop_name_drift(using=using)
+        if unit_ids:
+            ids = ', '.join(map(str, unit_ids[:self.max_reported_ids]))
+            raise CommandError(
+                f'{len(unit_ids)} units have stale shop name: {ids}'
+                + ('...' if len(unit_ids) > self.max_reported_ids else '')
+            )
+        self.stdout.write('Shop names of units are in sync.')
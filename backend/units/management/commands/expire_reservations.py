@@ -0,0 +1,65 @@
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from units.reaper import ReservationReaper
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete reservations not changed for TTL seconds and return '
+        'their stock to units, by batches which skip locked rows, so '
+        'several commands can run in parallel.'
+    )
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument(
+            '--ttl',
+            type=int,
+            default=settings.RESERVATION_TTL,
+            help='Seconds, RESERVATION_TTL setting by default.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.RESERVATION_REAPER_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after the number of batches, all by default.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running and expire reservations every interval '
+                 'seconds.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options) -> None:
+        if options['ttl'] <= 0:
+            raise CommandError('TTL is not set (--ttl or RESERVATION_TTL).')
+        if options['batch_size'] <= 0:
+            raise CommandError('Batch size must be positive.')
+
+        reaper = ReservationReaper(
+            options['ttl'],
+            options['batch_size'],
+            options['max_batches'],
+            options['database']
+        )
+        if options['interval']:
+            reaper.run_forever(options['interval'])
+            return
+
+        reaper.run_once()
+        self.stdout.write(
+            f'Expired {reaper.expired} reservations in {reaper.batches} '
+            f'batches, returned stock to {reaper.updated_units} units.'
+        )
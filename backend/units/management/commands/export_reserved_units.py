@@ -0,0 +1,41 @@
+from typing import TYPE_CHECKING
+
+from api.exports import ExportCommand
+from units.models import ReservedUnit
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+    from django.db.models.query import QuerySet
+
+
+class Command(ExportCommand):
+    help = 'Export reserved units as csv or ndjson.'
+    export_fields = {
+        'id': 'id',
+        'user_id': 'user_id',
+        'user': 'user__username',
+        'unit_id': 'unit_id',
+        'shop': 'unit__shop__name',
+        'unit': 'unit__name',
+        'amount': 'amount',
+    }
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--shop',
+            action='append',
+            help='Export reservations of units of the shop only.'
+        )
+        parser.add_argument(
+            '--user', action='append', help='Export reservations of the user.'
+        )
+
+    def get_queryset(self, options: dict) -> 'QuerySet':
+        queryset = ReservedUnit.objects.all()
+        if options['shop']:
+            queryset = queryset.filter(unit__shop__name__in=options['shop'])
+        if options['user']:
+            queryset = queryset.filter(user__username__in=options['user'])
+        return queryset
@@ -0,0 +1,34 @@
+from typing import TYPE_CHECKING
+
+from api.exports import ExportCommand
+from units.models import Unit
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+    from django.db.models.query import QuerySet
+
+
+class Command(ExportCommand):
+    help = 'Export units as csv or ndjson.'
+    export_fields = {
+        'id': 'id',
+        'shop': 'shop__name',
+        'name': 'name',
+        'weight': 'weight',
+        'price': 'price',
+        'amount': 'amount',
+        'price_for_kg': 'price_for_kg',
+    }
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--shop', action='append', help='Export units of the shop only.'
+        )
+
+    def get_queryset(self, options: dict) -> 'QuerySet':
+        queryset = Unit.objects.all()
+        if options['shop']:
+            queryset = queryset.filter(shop__name__in=options['shop'])
+        return queryset
@@ -0,0 +1,41 @@
+import time
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections
+
+from units.utils import UnitsUtil
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Set amount of units with sharded stock (shard_unit_stock) to '
+        'the sum of their slots.'
+    )
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running and fold the stock every interval seconds.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options) -> None:
+        util = UnitsUtil()
+        if not options['interval']:
+            count = util.fold_sharded_stock(options['database'])
+            self.stdout.write(f'Updated amount of {count} units.')
+            return
+
+        while True:
+            try:
+                util.fold_sharded_stock(options['database'])
+            except DatabaseError as err:
+                self.stderr.write(f'Stock is not folded: {err}')
+            finally:
+                close_old_connections()
+            time.sleep(options['interval'])
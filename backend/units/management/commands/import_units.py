@@ -0,0 +1,99 @@
+import json
+import sys
+import time
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, IO, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from units.importer import FORMATS, UnitsImporter, read_rows
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Import units from csv (shop,name,weight,price,amount header) or '
+        'ndjson files, units are upserted on (name, weight, shop) and '
+        'shops are created by name if needed.'
+    )
+    # rejected rows written to stderr, all of them go to --rejects file
+    max_reported_rejects = 100
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument(
+            'paths', nargs='+', help='Files to import, - for stdin.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format, detected by extension by default.'
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--rejects', help='Write rejected rows as ndjson to the file.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def get_format(self, path: str, file_format: 'Optional[str]') -> str:
+        if file_format:
+            return file_format
+        extension = path.rsplit('.', 1)[-1].lower()
+        if extension in ('json', 'jsonl'):
+            return 'ndjson'
+        if extension not in FORMATS:
+            raise CommandError(f'Format of {path} is unknown, use --format')
+        return extension
+
+    def open_file(self, stack: ExitStack, path: str, mode: str) -> 'IO[str]':
+        if path == '-':
+            return sys.stdin
+        try:
+            return stack.enter_context(open(
+                path,
+                mode,
+                encoding='utf-8-sig' if mode == 'r' else 'utf-8',
+                newline=''
+            ))
+        except OSError as err:
+            raise CommandError(err) from err
+
+    def handle(self, *args, **options) -> None:
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            rejects = (
+                self.open_file(stack, options['rejects'], 'w')
+                if options['rejects'] else None
+            )
+            path = None
+
+            def on_rejected(line_num: int, row: dict, errors: dict) -> None:
+                if importer.rejected <= self.max_reported_rejects:
+                    self.stderr.write(f'{path}:{line_num}: {errors}')
+                if rejects is not None:
+                    rejects.write(json.dumps({
+                        'path': path,
+                        'line': line_num,
+                        'row': row,
+                        'errors': errors,
+                    }, default=str) + '\n')
+
+            importer = UnitsImporter(
+                options['database'], options['batch_size'], on_rejected
+            )
+            for path in options['paths']:
+                file_format = self.get_format(path, options['format'])
+                importer.run(
+                    read_rows(self.open_file(stack, path, 'r'), file_format)
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Read {importer.read} rows in {elapsed:.1f}s '
+            f'({importer.read / elapsed:.0f} rows/s): '
+            f'{importer.inserted} inserted, {importer.updated} updated, '
+            f'{importer.rejected} rejected, '
+            f'{importer.created_shops} shops created.'
+        )
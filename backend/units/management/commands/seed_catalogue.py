@@ -0,0 +1,82 @@
+import time
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from units.seeding import CatalogueSeeder
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed shops, units, users with app accounts and reservations '
+        'generated from --seed (the same seed gives the same catalogue), '
+        'popularity of shops, units and users follows Zipf distribution. '
+        'Rows are added with COPY to the existing ones, seeds must differ '
+        'to seed the same database several times.'
+    )
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument('--shops', type=int, default=100)
+        parser.add_argument('--units', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--reservations',
+            type=int,
+            default=0,
+            help='Maximum number, duplicated (user, unit) pairs of the '
+                 'most popular ones are dropped.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Zipf exponent, 0 for uniform popularity.'
+        )
+        parser.add_argument('--batch-size', type=int, default=100000)
+        parser.add_argument(
+            '--rebuild-indexes',
+            action='store_true',
+            help='Drop indexes before COPY and create them after, faster '
+                 'for big seeds, the tables are not readable meanwhile.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options) -> None:
+        counts = {
+            name: options[name]
+            for name in ('shops', 'units', 'users', 'reservations')
+        }
+        if any(count < 0 for count in counts.values()):
+            raise CommandError('Counts must not be negative.')
+        if counts['units'] and not counts['shops']:
+            raise CommandError('Units can not be seeded without shops.')
+        if options['batch_size'] <= 0:
+            raise CommandError('Batch size must be positive.')
+        if options['skew'] < 0:
+            raise CommandError('Skew must not be negative.')
+
+        started = time.perf_counter()
+        seeder = CatalogueSeeder(
+            options['seed'],
+            options['database'],
+            options['batch_size'],
+            options['skew'],
+            options['rebuild_indexes']
+        )
+        if seeder.is_seeded(bool(counts['shops']), bool(counts['users'])):
+            raise CommandError(
+                f'Seed {options["seed"]} is already loaded (its shop names '
+                f'and usernames are taken), use another --seed.'
+            )
+        seeder.run(**counts)
+        self.stdout.write(
+            f'Seeded {len(seeder.shop_ids)} shops, '
+            f'{len(seeder.unit_ids)} units, {len(seeder.user_ids)} users, '
+            f'{seeder.reservations} reservations in '
+            f'{time.perf_counter() - started:.1f}s.'
+        )
@@ -0,0 +1,36 @@
+from typing import TYPE_CHECKING
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from units.utils import UnitsUtil
+
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Split stock of hot units into slots, so concurrent reservations '
+        'of a unit take from different rows. Amount of sharded units is '
+        'updated by fold_unit_stock, --slots 0 folds the stock back.'
+    )
+
+    def add_arguments(self, parser: 'ArgumentParser') -> None:
+        parser.add_argument('unit_ids', nargs='+', type=int)
+        parser.add_argument('--slots', type=int, default=8)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options) -> None:
+        if not 0 <= options['slots'] <= 1024:
+            raise CommandError('Slots must be from 0 to 1024.')
+
+        count = UnitsUtil().shard_stock(
+            options['unit_ids'], options['slots'], options['database']
+        )
+        if options['slots']:
+            self.stdout.write(
+                f'Split stock of {count} units into {options["slots"]} slots.'
+            )
+        else:
+            self.stdout.write(f'Folded stock slots of {count} units.')
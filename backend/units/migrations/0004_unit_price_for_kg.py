@@ -0,0 +1,42 @@
+# Generated by Django 4.1.5 on 2026-10-18 10:00
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models.functions import Round
+
+
+def backfill_price_for_kg(apps, schema_editor):
+    Unit = apps.get_model('units', 'Unit')
+    Unit.objects.update(
+        price_for_kg=Round(
+            models.ExpressionWrapper(
+                models.F('price') / models.F('weight'),
+                output_field=models.DecimalField()
+            ),
+            2
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('units', '0003_alter_unit_price_alter_unit_weight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='price_for_kg',
+            field=models.DecimalField(decimal_places=2, default=Decimal('1'), editable=False, max_digits=18),
+        ),
+        migrations.RunPython(
+            backfill_price_for_kg, migrations.RunPython.noop
+        ),
+        # index is built once after backfill
+        migrations.AlterField(
+            model_name='unit',
+            name='price_for_kg',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('1'), editable=False, max_digits=18),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.5 on 2026-10-18 18:45
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # index is built without locking writes to the units table
+    atomic = False
+
+    dependencies = [
+        ('units', '0004_unit_price_for_kg'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='unit',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    'name', config='simple'
+                ),
+                name='units_unit_name_search_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.1.5 on 2026-10-18 18:46
+
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # new indexes are built without locking writes, then the single
+    # column indexes covered by them are dropped
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shops', '0002_alter_shop_name'),
+        ('units', '0005_unit_name_search_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='unit',
+            index=models.Index(
+                fields=['shop', 'name', 'price'],
+                name='units_shop_name_price_idx'
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='unit',
+            index=models.Index(
+                fields=['price_for_kg', 'id'],
+                name='units_price_for_kg_id_idx'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='reservedunit',
+            name='user',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='reserved_units',
+                to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='price_for_kg',
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal('1'),
+                editable=False,
+                max_digits=18
+            ),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='shop',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='units',
+                to='shops.shop'
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.1.5 on 2026-10-18 18:49
+
+import django.contrib.postgres.fields.citext
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def backfill_shop_name(apps, schema_editor):
+    Unit = apps.get_model('units', 'Unit')
+    Shop = apps.get_model('shops', 'Shop')
+    Unit.objects.update(
+        shop_name=models.Subquery(
+            Shop.objects.filter(pk=models.OuterRef('shop_id')).values('name')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    # index is built without locking writes to the units table
+    atomic = False
+
+    dependencies = [
+        ('shops', '0002_alter_shop_name'),
+        ('units', '0006_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='shop_name',
+            field=django.contrib.postgres.fields.citext.CICharField(default='', editable=False, max_length=128),
+        ),
+        migrations.RunPython(
+            backfill_shop_name, migrations.RunPython.noop, atomic=True
+        ),
+        AddIndexConcurrently(
+            model_name='unit',
+            index=models.Index(
+                fields=['shop_name', 'name', 'price', 'id'],
+                name='units_shop_name_order_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.5 on 2026-10-18 19:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    # index is built without locking writes to the reservations table
+    atomic = False
+
+    dependencies = [
+        ('units', '0007_unit_shop_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservedunit',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='reservedunit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        AddIndexConcurrently(
+            model_name='reservedunit',
+            index=models.Index(
+                fields=['updated_at'], name='units_reserved_updated_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.5 on 2026-10-18 19:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('units', '0008_reservedunit_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='stock_shards',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='UnitStockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('amount', models.PositiveIntegerField(default=0)),
+                ('unit', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='units.unit')),
+            ],
+            options={
+                'unique_together': {('unit', 'slot')},
+            },
+        ),
+    ]
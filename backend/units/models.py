@@ -1,25 +1,163 @@
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, Optional, Sequence, Union
 
 from django.contrib.postgres.fields import CICharField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models.functions import Round
 from django.dispatch import receiver
 from rest_framework.exceptions import ValidationError as RestValidationError
 from rest_framework.serializers import as_serializer_error
 
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from api.cache import (
+    UNITS_ALL_VERSION,
+    UNITS_VERSION,
+    bump_unit_versions,
+    bump_versions,
+    get_shop_units_version
+)
 from shops.models import Shop
+from shops.signals import shops_renamed
 from users.models import User
-from units.utils import AMOUNT_ERROR_MESSAGE, UnitsUtil
+from units.utils import UnitsUtil
 
 # Create your models here.
 
 
+def get_shop_name_lookup(prefix: str = '') -> str:
+    """
+    Lookup of unit shop name in API querysets, the setting is read on
+    use, so it can be changed at runtime.
+    """
+    if settings.UNIT_SHOP_NAME_DENORMALIZED:
+        return f'{prefix}shop_name'
+    return f'{prefix}shop__name'
+
+
+def calculate_price_for_kg(price: Decimal, weight: Decimal) -> Decimal:
+    # ROUND_HALF_UP is the same rounding as postgres round(numeric, 2)
+    return (Decimal(price) / Decimal(weight)).quantize(
+        Decimal('0.01'), rounding=ROUND_HALF_UP
+    )
+
+
+class UnitQuerySet(models.QuerySet):
+    """
+    Keep stored price_for_kg and shop_name in sync for the writes
+    bypassing Unit.save.
+    """
+
+    def _set_price_for_kg(self, units: 'Iterable[Unit]') -> 'List[Unit]':
+        units = list(units)
+        for unit in units:
+            unit.price_for_kg = calculate_price_for_kg(unit.price, unit.weight)
+        return units
+
+    def _set_shop_name(self, units: 'Iterable[Unit]') -> 'List[Unit]':
+        units = list(units)
+        not_cached = {
+            unit.shop_id for unit in units
+            if not Unit.shop.is_cached(unit)
+        }
+        names = dict(
+            Shop.objects.using(self.db)
+            .filter(pk__in=not_cached)
+            .values_list('pk', 'name')
+        ) if not_cached else {}
+        for unit in units:
+            unit.shop_name = (
+                unit.shop.name if Unit.shop.is_cached(unit)
+                else names.get(unit.shop_id, '')
+            )
+        return units
+
+    def bulk_create(self, objs: 'Iterable[Unit]', *args, **kwargs) -> list:
+        objs = super().bulk_create(
+            self._set_shop_name(self._set_price_for_kg(objs)),
+            *args,
+            **kwargs
+        )
+        bump_versions(
+            UNITS_VERSION,
+            *{get_shop_units_version(obj.shop_id) for obj in objs},
+            *([UNITS_ALL_VERSION] if kwargs.get('update_conflicts') else [])
+        )
+        return objs
+
+    def bulk_update(
+        self, objs: 'Iterable[Unit]', fields: 'Sequence[str]', *args, **kwargs
+    ) -> int:
+        if {'price', 'weight'} & set(fields):
+            objs = self._set_price_for_kg(objs)
+            fields = [*fields, 'price_for_kg']
+        if {'shop', 'shop_id'} & set(fields):
+            objs = self._set_shop_name(objs)
+            fields = [*fields, 'shop_name']
+        objs = list(objs)
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        bump_unit_versions((obj.id, obj.shop_id) for obj in objs)
+        if 'shop_name' in fields:
+            # lists of the old shops are not known
+            bump_versions(UNITS_ALL_VERSION)
+        return updated
+
+    def update(self, **kwargs) -> int:
+        if {'price', 'weight'} & kwargs.keys():
+            # new values are used because SET expressions see the old row
+            price, weight = (
+                self._as_expression(kwargs.get(field, models.F(field)))
+                for field in ('price', 'weight')
+            )
+            kwargs['price_for_kg'] = Round(
+                models.ExpressionWrapper(
+                    price / weight, output_field=models.DecimalField()
+                ),
+                2
+            )
+        unit_ids = None
+        if {'shop', 'shop_id'} & kwargs.keys() and 'shop_name' not in kwargs:
+            shop = kwargs.get('shop', kwargs.get('shop_id'))
+            if isinstance(shop, Shop):
+                kwargs['shop_name'] = shop.name
+            elif not hasattr(shop, 'resolve_expression'):
+                kwargs['shop_name'] = models.Subquery(
+                    Shop.objects.filter(pk=shop).values('name')[:1]
+                )
+            else:
+                # new shop is known after update only
+                unit_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        if unit_ids is not None:
+            UnitsUtil().sync_shop_names(using=self.db, unit_ids=unit_ids)
+        bump_versions(UNITS_VERSION, UNITS_ALL_VERSION)
+        return updated
+
+    update.alters_data = True
+
+    @staticmethod
+    def _as_expression(
+        value: 'Union[Decimal, models.Expression]'
+    ) -> 'models.Expression':
+        if hasattr(value, 'resolve_expression'):
+            return value
+        return models.Value(Decimal(value), output_field=models.DecimalField())
+
+
 class Unit(models.Model):
     shop = models.ForeignKey(
-        Shop, related_name='units', on_delete=models.CASCADE
+        Shop,
+        related_name='units',
+        on_delete=models.CASCADE,
+        # units_shop_name_price_idx starts with shop_id
+        db_index=False
     )
+    # copy of shop name to filter and order units without join
+    shop_name = CICharField(max_length=128, default='', editable=False)
     name = CICharField(max_length=128)
     weight = models.DecimalField(
         max_digits=8,
@@ -36,22 +174,106 @@ class Unit(models.Model):
     amount = models.PositiveIntegerField(
         default=1
     )
+    # number of UnitStockShard slots the stock is split into, amount of
+    # sharded unit is their sum folded by fold_unit_stock
+    stock_shards = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
+    price_for_kg = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal(1),
+        editable=False
+    )
+
+    # shop of the stored row, None if it is not known
+    stored_shop_id = None
+
+    objects = UnitQuerySet.as_manager()
 
     class Meta:
         ordering = ['shop__name', 'name', 'price']
         unique_together = ['name', 'weight', 'shop_id']
+        indexes = [
+            # default order and shop name filter
+            models.Index(
+                fields=['shop_name', 'name', 'price', 'id'],
+                name='units_shop_name_order_idx'
+            ),
+            # units of a shop in default order
+            models.Index(
+                fields=['shop', 'name', 'price'],
+                name='units_shop_name_price_idx'
+            ),
+            # price_for_kg filters and keyset pages ordered by it
+            models.Index(
+                fields=['price_for_kg', 'id'],
+                name='units_price_for_kg_id_idx'
+            ),
+            # expression of FullTextSearchFilter search
+            GinIndex(
+                SearchVector('name', config='simple'),
+                name='units_unit_name_search_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name} [{self.shop}]'
 
-    @property
-    def price_for_kg(self) -> 'Decimal':
-        return round((Decimal(1) / self.weight) * self.price, 2)
+    @classmethod
+    def from_db(cls, db: str, field_names: list, values: list) -> 'Unit':
+        instance = super().from_db(db, field_names, values)
+        if 'shop_id' in field_names:
+            instance.stored_shop_id = instance.shop_id
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        self.price_for_kg = calculate_price_for_kg(self.price, self.weight)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'shop', 'shop_id'} & set(update_fields):
+            self.shop_name = self.shop.name
+
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'price', 'weight'} & update_fields:
+                update_fields.add('price_for_kg')
+            if {'shop', 'shop_id'} & update_fields:
+                update_fields.add('shop_name')
+            kwargs['update_fields'] = update_fields
+
+        super().save(*args, **kwargs)
+
+
+class UnitStockShard(models.Model):
+    """
+    Slot of the stock of a hot unit, reservations take from a random
+    slot, so they do not wait for each other on the single unit row.
+    """
+    unit = models.ForeignKey(
+        Unit,
+        related_name='shards',
+        on_delete=models.CASCADE,
+        # unique (unit_id, slot) index starts with unit_id
+        db_index=False
+    )
+    slot = models.PositiveSmallIntegerField()
+    amount = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['unit', 'slot']
+
+    def __str__(self):
+        return f'{self.unit_id}:{self.slot}'
 
 
 class ReservedUnit(models.Model):
     user = models.ForeignKey(
-        User, related_name='reserved_units', on_delete=models.CASCADE
+        User,
+        related_name='reserved_units',
+        on_delete=models.CASCADE,
+        # unique (user_id, unit_id) index starts with user_id
+        db_index=False
     )
     unit = models.ForeignKey(
         Unit, related_name='reserved_units', on_delete=models.CASCADE
@@ -60,31 +282,108 @@ class ReservedUnit(models.Model):
         default=1,
         validators=[MinValueValidator(1)]
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # refreshed on every change, reservations expire RESERVATION_TTL
+    # seconds after it
+    updated_at = models.DateTimeField(auto_now=True)
 
     is_cleaned = False
+    # stock to take from the unit on save, set by clean
+    amount_delta = 0
+    # stock to give back to the stored unit when the unit is changed
+    returned_amount = 0
+    # amount stored in the database, used instead of re-querying, None
+    # until it is read if amount was deferred when the row was loaded
+    stored_amount = 0
+    # unit of the stored row, the same way as stored_amount
+    stored_unit_id = None
 
     class Meta:
         ordering = ['unit__shop__name', 'unit__name', 'unit__price']
         unique_together = ['user_id', 'unit_id']
+        indexes = [
+            # expired reservations of the reaper
+            models.Index(
+                fields=['updated_at'], name='units_reserved_updated_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.unit} ({self.user})'
 
+    @classmethod
+    def from_db(
+        cls, db: str, field_names: list, values: list
+    ) -> 'ReservedUnit':
+        instance = super().from_db(db, field_names, values)
+        instance.stored_amount = (
+            instance.amount if 'amount' in field_names else None
+        )
+        instance.stored_unit_id = (
+            instance.unit_id if 'unit_id' in field_names else None
+        )
+        return instance
+
+    def refresh_from_db(self, using: str = None, fields: list = None) -> None:
+        super().refresh_from_db(using, fields)
+        deferred_fields = self.get_deferred_fields()
+        if (
+            fields is None or 'amount' in fields
+        ) and 'amount' not in deferred_fields:
+            self.stored_amount = self.amount
+        if (
+            fields is None or {'unit', 'unit_id'} & set(fields)
+        ) and 'unit_id' not in deferred_fields:
+            self.stored_unit_id = self.unit_id
+
+    def get_stored_amount(self) -> int:
+        if self.stored_amount is None:
+            # deferred amount may be changed already, so it is read apart
+            self.stored_amount = (
+                type(self)._base_manager.using(self._state.db)
+                .filter(pk=self.pk)
+                .values_list('amount', flat=True)
+                .first()
+            ) or 0
+        return self.stored_amount
+
+    def get_stored_unit_id(self) -> 'Optional[int]':
+        if self.stored_unit_id is None:
+            self.stored_unit_id = (
+                type(self)._base_manager.using(self._state.db)
+                .filter(pk=self.pk)
+                .values_list('unit_id', flat=True)
+                .first()
+            )
+        return self.stored_unit_id
+
     @property
     def total(self) -> 'Decimal':
         return round(self.unit.price * Decimal(self.amount), 2)
 
+    def save(self, *args, **kwargs) -> None:
+        # stock taken in pre_save is given back if the row is not saved
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     def _process_update_unit_amount(self):
-        try:
-            UnitsUtil().update_unit_amount(self.unit, self.unit.amount)
-        except RestValidationError as err:
-            raise ValidationError(
-                {
-                    'amount':
-                        f'{AMOUNT_ERROR_MESSAGE} {abs(self.unit.amount)}'
-                },
-                code='limit_value'
-            ) from err
+        using = self._state.db or 'default'
+        updates = [(self.unit, self.amount_delta)]
+        if self.returned_amount:
+            stored_unit = (
+                Unit.objects.using(using)
+                .only('id', 'shop_id', 'stock_shards')
+                .filter(id=self.stored_unit_id)
+                .first()
+            )
+            if stored_unit is not None:
+                updates.append((stored_unit, -self.returned_amount))
+        # units are locked in id order as everywhere else
+        for unit, delta in sorted(updates, key=lambda update: update[0].id):
+            UnitsUtil().update_unit_amount(unit, delta, using)
 
     def validate_unique(self, *args, **kwargs) -> None:
         super().validate_unique(*args, **kwargs)
@@ -93,17 +392,46 @@ class ReservedUnit(models.Model):
     def clean(self, is_deleted: bool = False) -> None:
         self.is_cleaned = True
 
-        old_reserved = ReservedUnit.objects.filter(
-            id=self.id
-        ).first()
+        stored_amount = self.get_stored_amount()
+        self.returned_amount = 0
+        if not self._state.adding and (
+            self.unit_id != self.get_stored_unit_id()
+        ):
+            # moved reservation gives its stock back to the stored unit
+            # and takes the whole amount from the new one
+            self.returned_amount = stored_amount
+            stored_amount = 0
+        self.amount_delta = (0 if is_deleted else self.amount) - stored_amount
 
-        if is_deleted:
-            self.unit.amount += self.amount
+
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+def update_unit_cache_hook(
+    sender: Unit, instance: Unit, using: str, created: bool = False, **kwargs
+) -> None:
+    bump_unit_versions([(instance.id, instance.shop_id)])
+    if not created and instance.stored_shop_id != instance.shop_id:
+        # unit is moved from the stored shop
+        if instance.stored_shop_id is None:
+            bump_versions(UNITS_ALL_VERSION)
         else:
-            self.unit.amount -= (
-                self.amount - old_reserved.amount
-                if old_reserved else self.amount
-            )
+            bump_versions(get_shop_units_version(instance.stored_shop_id))
+    instance.stored_shop_id = instance.shop_id
+
+
+@receiver(post_save, sender=Shop)
+def update_shop_name_hook(
+    sender: Shop, instance: Shop, using: str, created: bool, **kwargs
+) -> None:
+    if not created:
+        UnitsUtil().sync_shop_names([instance.id], using)
+
+
+@receiver(shops_renamed, sender=Shop)
+def shops_renamed_hook(
+    sender: Shop, shop_ids: 'List[int]', using: str, **kwargs
+) -> None:
+    UnitsUtil().sync_shop_names(shop_ids, using)
 
 
 @receiver(pre_save, sender=ReservedUnit)
@@ -119,6 +447,23 @@ def update_reserved_hook(
             raise RestValidationError(
                 detail=as_serializer_error(err)
             ) from err
+    # stock is applied, next save of the same instance is cleaned again
+    instance.is_cleaned = False
+
+
+@receiver(post_save, sender=ReservedUnit)
+def reserved_saved_hook(
+    sender: ReservedUnit, instance: ReservedUnit, using: str, **kwargs
+) -> None:
+    # not before the row is written, a failed save rolls the stock back
+    instance.stored_amount = (
+        instance.get_stored_amount()
+        - instance.returned_amount
+        + instance.amount_delta
+    )
+    instance.stored_unit_id = instance.unit_id
+    instance.amount_delta = 0
+    instance.returned_amount = 0
 
 
 @receiver(post_delete, sender=ReservedUnit)
@@ -129,6 +474,9 @@ def delete_reserved_hook(
     if not instance.is_cleaned:
         instance.clean(True)
         instance._process_update_unit_amount()
+    instance.stored_amount = 0
+    instance.amount_delta = 0
+    instance.returned_amount = 0
 
         # probably this exception is useless
         # try:
@@ -139,3 +487,4 @@ def delete_reserved_hook(
         #     raise RestValidationError(
         #         detail=as_serializer_error(err)
         #     ) from err
+    instance.is_cleaned = False
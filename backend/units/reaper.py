@@ -0,0 +1,98 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections
+from django.utils import timezone
+
+from units.utils import UnitsUtil
+
+logger = logging.getLogger('units.reaper')
+
+
+class ReservationReaper:
+    """
+    Expire reservations not changed for ttl seconds by batches of
+    batch_size until there is no full batch left (or max_batches are
+    done), see UnitsUtil.expire_reservations.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        batch_size: int = 500,
+        max_batches: 'Optional[int]' = None,
+        using: str = DEFAULT_DB_ALIAS
+    ):
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.using = using
+        self.batches = 0
+        self.expired = 0
+        self.updated_units = 0
+
+    def run_once(self) -> 'Tuple[int, int]':
+        """
+        Expired reservations and updated units of this run.
+        """
+        util = UnitsUtil()
+        expired_before = timezone.now() - timedelta(seconds=self.ttl)
+        expired = updated_units = batches = 0
+        while self.max_batches is None or batches < self.max_batches:
+            batch_expired, batch_updated = util.expire_reservations(
+                expired_before, self.batch_size, self.using
+            )
+            if not batch_expired:
+                break
+            batches += 1
+            expired += batch_expired
+            updated_units += batch_updated
+            if batch_expired < self.batch_size:
+                break
+
+        self.batches += batches
+        self.expired += expired
+        self.updated_units += updated_units
+        return expired, updated_units
+
+    def run_forever(
+        self, interval: float, stop: 'Optional[threading.Event]' = None
+    ) -> None:
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                expired, _ = self.run_once()
+                if expired:
+                    logger.info('Expired %d reservations', expired)
+            except DatabaseError:
+                logger.exception('Reservations are not expired')
+            finally:
+                close_old_connections()
+            stop.wait(interval)
+
+
+def start_reaper() -> 'Optional[threading.Thread]':
+    """
+    Start in-process reaper thread if RESERVATION_TTL and
+    RESERVATION_REAPER_INTERVAL are set, called by the WSGI and ASGI
+    entry points.
+    """
+    if not (
+        settings.RESERVATION_TTL and settings.RESERVATION_REAPER_INTERVAL
+    ):
+        return None
+
+    reaper = ReservationReaper(
+        settings.RESERVATION_TTL, settings.RESERVATION_REAPER_BATCH_SIZE
+    )
+    thread = threading.Thread(
+        target=reaper.run_forever,
+        args=(settings.RESERVATION_REAPER_INTERVAL,),
+        name='reservation-reaper',
+        daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,368 @@
+import csv
+import io
+import math
+import random
+import re
+from array import array
+from datetime import timedelta
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Sequence
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+from api.cache import (
+    SHOPS_VERSION, UNITS_ALL_VERSION, UNITS_VERSION, bump_versions
+)
+from shops.models import Shop
+from units.models import ReservedUnit, Unit
+from users.models import AppAccount, User
+
+if TYPE_CHECKING:
+    from django.db.backends.utils import CursorWrapper
+    from django.db.models import Model
+
+ADJECTIVES = (
+    'Fresh', 'Organic', 'Classic', 'Premium', 'Golden', 'Green', 'Smoked',
+    'Spicy', 'Sweet', 'Salted', 'Wild', 'Farm', 'Roasted', 'Crispy', 'Red',
+    'Mild', 'Dark', 'Light', 'Home', 'Royal',
+)
+PRODUCTS = (
+    'Apples', 'Bananas', 'Bread', 'Butter', 'Carrots', 'Cheese', 'Chicken',
+    'Coffee', 'Cookies', 'Cucumbers', 'Flour', 'Grapes', 'Ham', 'Honey',
+    'Lemons', 'Milk', 'Noodles', 'Oats', 'Olives', 'Onions', 'Oranges',
+    'Pasta', 'Peppers', 'Potatoes', 'Rice', 'Salmon', 'Sausages', 'Sugar',
+    'Tea', 'Tomatoes', 'Tuna', 'Yogurt',
+)
+SHOP_NOUNS = (
+    'Market', 'Grocery', 'Store', 'Deli', 'Pantry', 'Corner', 'Bazaar',
+    'Farm Shop', 'Food Hall', 'Supermarket',
+)
+FIRST_NAMES = (
+    'Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie',
+    'Avery', 'Quinn', 'Robin', 'Kim',
+)
+LAST_NAMES = (
+    'Smith', 'Brown', 'Lee', 'Garcia', 'Miller', 'Davis', 'Wilson', 'Moore',
+    'Clark', 'Lewis', 'Young', 'King',
+)
+# weights (in 0.01 kg) of the most of units, the rest is random
+PACK_WEIGHTS = (5, 10, 20, 25, 33, 50, 75, 100, 150, 200, 250, 500, 1000)
+
+
+def format_cents(value: int) -> str:
+    return f'{value // 100}.{value % 100:02d}'
+
+
+class CatalogueSeeder:
+    """
+    Generate shops, units, users with their app accounts and
+    reservations from seed, so the same seed gives the same rows, and
+    load them with COPY by batches. Shops and units popularity follows
+    Zipf distribution with skew exponent: few shops have most of the
+    units and few units and users have most of the reservations. Rows
+    get explicit ids after the current maximum (the tables are locked
+    while they are loaded) and id sequences are reset after, so rows
+    are related by ids without reading them back. Signals are not sent,
+    app accounts are created here instead of create_account_hook.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        using: str = 'default',
+        batch_size: int = 100000,
+        skew: float = 1.1,
+        rebuild_indexes: bool = False
+    ):
+        self.seed = seed
+        self.using = using
+        self.batch_size = batch_size
+        self.skew = skew
+        # drop indexes not backing constraints before COPY and create
+        # them after, faster for big loads but tables are not readable
+        self.rebuild_indexes = rebuild_indexes
+        self.random = random.Random(seed)
+        self.now = timezone.now()
+        self.shop_ids: 'Sequence[int]' = range(0)
+        self.unit_ids: 'Sequence[int]' = range(0)
+        self.user_ids: 'Sequence[int]' = range(0)
+        # stock of generated units left for reservations, by unit index
+        self.unit_amounts = array('q')
+        self.reservations = 0
+
+    def zipf_index(self, count: int, stride: int = 1) -> int:
+        """
+        Random index below count, index of rank r is r * stride modulo
+        count, so popular rows are spread over the ids.
+        """
+        uniform = self.random.random()
+        if self.skew == 1:
+            rank = count ** uniform
+        else:
+            exponent = 1 - self.skew
+            rank = (
+                (count ** exponent - 1) * uniform + 1
+            ) ** (1 / exponent)
+        return (min(int(rank), count) - 1) * stride % count
+
+    def get_stride(self, count: int) -> int:
+        # coprime with count, so ranks are mapped to distinct indexes
+        stride = int(count * 0.618) | 1
+        while math.gcd(stride, count) != 1:
+            stride += 2
+        return stride
+
+    def generate_shops(self, count: int) -> 'Iterator[tuple]':
+        for idx in range(count):
+            yield (
+                f'{self.random.choice(ADJECTIVES)} '
+                f'{self.random.choice(SHOP_NOUNS)} {self.seed}-{idx}',
+            )
+
+    def generate_units(
+        self, count: int, shop_names: 'Sequence[str]'
+    ) -> 'Iterator[tuple]':
+        """
+        Names are unique by unit number, so (name, weight, shop) is
+        unique too. Price is weight times log-normal price for kg.
+        """
+        rnd = self.random
+        stride = self.get_stride(len(shop_names))
+        for idx in range(count):
+            shop_idx = self.zipf_index(len(shop_names), stride)
+            if rnd.random() < 0.7:
+                weight = rnd.choice(PACK_WEIGHTS)
+            else:
+                weight = rnd.randint(1, 5000)
+            price_for_kg = math.exp(rnd.gauss(2.3, 1.0))
+            price = min(
+                max(round(price_for_kg * weight), 1), 10 ** 14 - 1
+            )
+            amount = 0 if rnd.random() < 0.1 else int(rnd.expovariate(0.02))
+            self.unit_amounts.append(amount)
+            yield (
+                f'{rnd.choice(ADJECTIVES)} {rnd.choice(PRODUCTS)} {idx}',
+                format_cents(weight),
+                format_cents(price),
+                amount,
+                self.shop_ids[shop_idx],
+                shop_names[shop_idx],
+                # same rounding as calculate_price_for_kg
+                format_cents((price * 200 + weight) // (weight * 2)),
+                0,
+            )
+
+    def generate_users(self, count: int) -> 'Iterator[tuple]':
+        rnd = self.random
+        for idx in range(count):
+            username = f'user{self.seed}_{idx}'
+            yield (
+                # unusable password
+                '!',
+                False,
+                username,
+                rnd.choice(FIRST_NAMES),
+                rnd.choice(LAST_NAMES),
+                f'{username}@example.com',
+                False,
+                True,
+                self.now - timedelta(days=rnd.randint(0, 1000)),
+                f'+1555{rnd.randint(0, 9999999):07d}',
+            )
+
+    def generate_accounts(self) -> 'Iterator[tuple]':
+        for user_id in self.user_ids:
+            yield user_id, format_cents(self.random.randint(0, 100000))
+
+    def generate_reservations(self, count: int) -> 'Iterator[tuple]':
+        """
+        Up to count distinct (user, unit) reservations, duplicated
+        draws of the popular pairs and draws of units out of stock are
+        retried a limited number of times. Reserved amounts do not
+        exceed the stock of generated units, they are taken from it by
+        subtract_reserved_amounts after the rows are loaded.
+        """
+        rnd = self.random
+        users_count, units_count = len(self.user_ids), len(self.unit_ids)
+        if not users_count or not units_count:
+            return
+        users_stride = self.get_stride(users_count)
+        units_stride = self.get_stride(units_count)
+        seen = set()
+        attempts = count * 10
+        while len(seen) < count and attempts:
+            attempts -= 1
+            user_idx = self.zipf_index(users_count, users_stride)
+            unit_idx = self.zipf_index(units_count, units_stride)
+            key = user_idx * units_count + unit_idx
+            if key in seen or not self.unit_amounts[unit_idx]:
+                continue
+            seen.add(key)
+            amount = min(
+                1 + int(rnd.expovariate(1)), 10, self.unit_amounts[unit_idx]
+            )
+            self.unit_amounts[unit_idx] -= amount
+            updated_at = self.now - timedelta(
+                seconds=rnd.randint(0, 7 * 24 * 3600)
+            )
+            yield (
+                self.user_ids[user_idx],
+                self.unit_ids[unit_idx],
+                amount,
+                updated_at - timedelta(seconds=rnd.randint(0, 3600)),
+                updated_at,
+            )
+
+    def copy_rows(
+        self,
+        model: 'Model',
+        columns: 'Sequence[str]',
+        rows: 'Iterable[tuple]'
+    ) -> range:
+        """
+        Load rows with ids after the current maximum, ids are returned.
+        """
+        connection = connections[self.using]
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(name).column)
+            for name in ('id', *columns)
+        )
+        copy_sql = f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)'
+        reset_sqls = connection.ops.sequence_reset_sql(no_style(), [model])
+        count = 0
+        rows = iter(rows)
+        with transaction.atomic(using=self.using):
+            with connection.cursor() as cursor:
+                # reads are allowed, ids can not be taken by other writes
+                cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+                cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}')
+                first_id = cursor.fetchone()[0]
+                indexes = self.drop_indexes(cursor, table)
+                while batch := list(islice(rows, self.batch_size)):
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(
+                        (first_id + count + idx, *row)
+                        for idx, row in enumerate(batch)
+                    )
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+                    count += len(batch)
+                if indexes:
+                    # pending foreign key checks do not allow CREATE INDEX
+                    cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+                    for sql in indexes:
+                        cursor.execute(sql)
+                    cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+                for sql in reset_sqls:
+                    cursor.execute(sql)
+                cursor.execute(f'ANALYZE {table}')
+        return range(first_id, first_id + count)
+
+    def drop_indexes(self, cursor: 'CursorWrapper', table: str) -> 'List[str]':
+        """
+        Drop indexes of the table not backing constraints if they are
+        rebuilt, their definitions are returned.
+        """
+        if not self.rebuild_indexes:
+            return []
+        cursor.execute(
+            'SELECT indexrelid::regclass::text, '
+            'pg_get_indexdef(indexrelid) FROM pg_index '
+            'WHERE indrelid = %s::regclass AND NOT EXISTS ('
+            'SELECT 1 FROM pg_constraint WHERE conindid = indexrelid)',
+            [table]
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {name}')
+        return [definition for _, definition in indexes]
+
+    def subtract_reserved_amounts(self, reserved_ids: range) -> None:
+        """
+        Take amounts of the loaded reservations from stock of their
+        units with one grouped update.
+        """
+        if not reserved_ids:
+            return
+        connection = connections[self.using]
+        quote_name = connection.ops.quote_name
+        units_table = quote_name(Unit._meta.db_table)
+        amount = quote_name(Unit._meta.get_field('amount').column)
+        reserved_amount = quote_name(
+            ReservedUnit._meta.get_field('amount').column
+        )
+        unit_id = quote_name(ReservedUnit._meta.get_field('unit').column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {units_table} '
+                f'SET {amount} = {units_table}.{amount} - reserved.amount '
+                f'FROM (SELECT {unit_id} AS unit_id, '
+                f'SUM({reserved_amount}) AS amount '
+                f'FROM {quote_name(ReservedUnit._meta.db_table)} '
+                f'WHERE id BETWEEN %s AND %s GROUP BY {unit_id}) reserved '
+                f'WHERE {units_table}.id = reserved.unit_id',
+                [reserved_ids[0], reserved_ids[-1]]
+            )
+
+    def is_seeded(self, shops: bool = True, users: bool = True) -> bool:
+        """
+        Shop names and usernames include the seed and are unique, so
+        the seed can not be loaded again if rows of it exist.
+        """
+        seed = re.escape(str(self.seed))
+        return (
+            shops and Shop.objects.using(self.using).filter(
+                name__regex=rf' {seed}-[0-9]+$'
+            ).exists()
+        ) or (
+            users and User.objects.using(self.using).filter(
+                username__startswith=f'user{self.seed}_'
+            ).exists()
+        )
+
+    def seed_shops(self, count: int) -> 'Sequence[str]':
+        rows = list(self.generate_shops(count))
+        self.shop_ids = self.copy_rows(Shop, ('name',), rows)
+        return [name for name, in rows]
+
+    def run(
+        self,
+        shops: int,
+        units: int,
+        users: int = 0,
+        reservations: int = 0
+    ) -> None:
+        shop_names = self.seed_shops(shops)
+        if shop_names:
+            self.unit_ids = self.copy_rows(
+                Unit,
+                (
+                    'name', 'weight', 'price', 'amount', 'shop',
+                    'shop_name', 'price_for_kg', 'stock_shards'
+                ),
+                self.generate_units(units, shop_names)
+            )
+        self.user_ids = self.copy_rows(
+            User,
+            (
+                'password', 'is_superuser', 'username', 'first_name',
+                'last_name', 'email', 'is_staff', 'is_active',
+                'date_joined', 'phone'
+            ),
+            self.generate_users(users)
+        )
+        self.copy_rows(
+            AppAccount, ('user', 'amount'), self.generate_accounts()
+        )
+        with transaction.atomic(using=self.using):
+            reserved_ids = self.copy_rows(
+                ReservedUnit,
+                ('user', 'unit', 'amount', 'created_at', 'updated_at'),
+                self.generate_reservations(reservations)
+            )
+            self.subtract_reserved_amounts(reserved_ids)
+        self.reservations = len(reserved_ids)
+        bump_versions(SHOPS_VERSION, UNITS_VERSION, UNITS_ALL_VERSION)
@@ -1,12 +1,21 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+from django.db.models import DecimalField, ExpressionWrapper, F
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from units.models import ReservedUnit, Unit
+from api.serializers import ValuesSerializerMixin
+from units.models import ReservedUnit, Unit, get_shop_name_lookup
 from users.models import User
 
+if TYPE_CHECKING:
+    from django.db.models import Model
+    from django.db.models.query import QuerySet
+
 
-class UnitSerializer(serializers.ModelSerializer):
-    shop = serializers.ReadOnlyField(source='shop.name')
+class UnitSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
+    # keep the number representation of former property
+    price_for_kg = serializers.ReadOnlyField()
 
     class Meta:
         model = Unit
@@ -14,23 +23,105 @@ class UnitSerializer(serializers.ModelSerializer):
             'id', 'shop', 'name', 'weight', 'price', 'amount', 'price_for_kg'
         )
 
+    def get_fields(self) -> 'Dict[str, serializers.Field]':
+        # shop name source by the current settings
+        fields = super().get_fields()
+        fields['shop'] = serializers.ReadOnlyField(
+            source=get_shop_name_lookup().replace('__', '.')
+        )
+        return fields
+
+
+class ReservedUnitListSerializer(serializers.ListSerializer):
 
-class ReservedUnitSerializer(serializers.ModelSerializer):
+    def to_internal_value(self, data: 'List[dict]') -> 'List[dict]':
+        # load units and users of the whole batch with one query each
+        if isinstance(data, list):
+            for field in ('unit_id', 'user_id'):
+                self.child.get_cached_instances(field, [
+                    item.get(field)
+                    for item in data if isinstance(item, dict)
+                ])
+        return super().to_internal_value(data)
+
+
+class ReservedUnitSerializer(
+    ValuesSerializerMixin, serializers.ModelSerializer
+):
     user_id = serializers.IntegerField(write_only=True)
     user = serializers.ReadOnlyField(source='user.username', read_only=True)
     unit_id = serializers.IntegerField(write_only=True)
     unit = UnitSerializer(read_only=True)
 
+    # request scoped caches of validated instances kept in context
+    cached_querysets = {
+        'unit_id': lambda: Unit.objects.select_related('shop'),
+        'user_id': lambda: User.objects.all(),
+    }
+    values_expressions = {
+        'total': ExpressionWrapper(
+            F('unit__price') * F('amount'), output_field=DecimalField()
+        ),
+    }
+
     class Meta:
         model = ReservedUnit
-        fields = ('id', 'user', 'user_id', 'unit', 'unit_id', 'amount', 'total')
+        fields = (
+            'id', 'user', 'user_id', 'unit', 'unit_id', 'amount', 'total'
+        )
+        list_serializer_class = ReservedUnitListSerializer
+
+    def get_cached_instances(
+        self, field: str, ids: 'Iterable'
+    ) -> 'Dict[int, Model]':
+        cache = self.context.setdefault(f'{field}_cache', {})
+        missing = set()
+        for value in ids:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                continue
+            if value not in cache:
+                missing.add(value)
+
+        if missing:
+            queryset: 'QuerySet' = self.cached_querysets[field]()
+            cache.update(dict.fromkeys(missing))
+            cache.update(queryset.in_bulk(missing))
+        return cache
+
+    def get_cached_instance(self, field: str, value: int) -> 'Model':
+        return self.get_cached_instances(field, [value])[value]
 
     def validate_unit_id(self, value: int) -> int:
-        if value not in Unit.objects.values_list('id', flat=True):
+        if self.get_cached_instance('unit_id', value) is None:
             raise ValidationError('Unit does not exist')
         return value
 
     def validate_user_id(self, value: int) -> int:
-        if value not in User.objects.values_list('id', flat=True):
+        if self.get_cached_instance('user_id', value) is None:
             raise ValidationError('User does not exist')
         return value
+
+    def validate(self, attrs: dict) -> dict:
+        attrs = super().validate(attrs)
+        # hand loaded instances to save path instead of ids
+        for field, related_field in (('unit_id', 'unit'), ('user_id', 'user')):
+            if field in attrs:
+                attrs[related_field] = self.get_cached_instance(
+                    field, attrs.pop(field)
+                )
+        return attrs
+
+
+class ReservedUnitBulkItemSerializer(serializers.Serializer):
+    unit_id = serializers.IntegerField()
+    amount = serializers.IntegerField(min_value=1, default=1)
+
+
+class ReservedUnitBulkSerializer(serializers.Serializer):
+    # items are validated one by one to report errors per line
+    items = serializers.ListField(
+        child=serializers.JSONField(), allow_empty=False, max_length=1000
+    )
+    atomic = serializers.BooleanField(default=False)
@@ -1,22 +1,604 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connections, transaction
+from django.db.models import Sum
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from api.cache import bump_unit_versions
 
 if TYPE_CHECKING:
+    from datetime import datetime
+
+    from django.db.models.query import QuerySet
+
     from units.models import Unit
 
 
 AMOUNT_ERROR_MESSAGE = 'The limit have been exceeded by'
 
+# select_for_update options of RESERVATION_LOCK_MODE
+LOCK_MODES = {
+    'off': None,
+    'wait': {},
+    'nowait': {'nowait': True},
+    'skip_locked': {'skip_locked': True},
+}
+
+
+class UnitLockedError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Unit is locked by another request, try again later.'
+    default_code = 'locked'
+
 
 class UnitsUtil:
+    """
+    Rows are always locked in the same order to avoid deadlocks:
+    reserved units, then units by id, then app account.
+    Locks are held until the end of the outer transaction.
+    """
+
+    def get_lock_options(self) -> 'Optional[dict]':
+        return LOCK_MODES[settings.RESERVATION_LOCK_MODE]
+
+    def is_fast_fail_lock(self) -> bool:
+        return bool(self.get_lock_options())
+
+    def lock_reserved_units(self, queryset: 'QuerySet') -> 'List[int]':
+        """
+        Lock reserved units of queryset and return their ids, the changes
+        must be done by the ids: the queryset run again sees reservations
+        committed after the lock too. Skip locked mode is not applied
+        here because skipped reservations would be lost silently.
+        """
+        queryset = queryset.order_by('unit_id').values_list('id', flat=True)
+        options = self.get_lock_options()
+        if options is None:
+            return list(queryset)
+
+        nowait = bool(options)
+        try:
+            with transaction.atomic(using=queryset.db):
+                return list(
+                    queryset.select_for_update(of=('self',), nowait=nowait)
+                )
+        except OperationalError as err:
+            raise UnitLockedError() from err
+
+    def lock_units(
+        self, unit_ids: 'Iterable[int]', using: str = 'default'
+    ) -> 'List[int]':
+        from units.models import Unit
+
+        unit_ids = sorted(set(unit_ids))
+        options = self.get_lock_options()
+        if options is None or not unit_ids:
+            return unit_ids
+
+        try:
+            with transaction.atomic(using=using):
+                locked_ids = list(
+                    Unit.objects.using(using)
+                    .filter(id__in=unit_ids)
+                    .order_by('id')
+                    .select_for_update(**options)
+                    .values_list('id', flat=True)
+                )
+        except OperationalError as err:
+            raise UnitLockedError() from err
+
+        if options.get('skip_locked') and len(locked_ids) < len(unit_ids):
+            # skipped rows are either locked or deleted
+            skipped = Unit.objects.using(using).filter(
+                id__in=set(unit_ids) - set(locked_ids)
+            )
+            if skipped.exists():
+                raise UnitLockedError()
+        return locked_ids
+
+    def get_amount_error(self, exceed: int) -> ValidationError:
+        return ValidationError(
+            {'amount': f'{AMOUNT_ERROR_MESSAGE} {abs(exceed)}'},
+            code='limit_value'
+        )
+
+    def update_unit_amount(
+        self, instance: 'Unit', delta: int, using: str = 'default'
+    ) -> None:
+        """
+        Take delta (give back if negative) from the unit stock with
+        single conditional UPDATE, the row count tells if there was
+        enough stock. Instance amount is set to the stored value.
+        Stock of sharded units is taken from their slots instead.
+        """
+        if not delta:
+            return
+
+        if instance.stock_shards:
+            exceeded = self.take_sharded_stock(instance.id, delta, using)
+            if exceeded is not None:
+                if exceeded:
+                    raise self.get_amount_error(exceeded)
+                return
+            # not sharded anymore
+            instance.stock_shards = 0
+
+        # UPDATE waits for the row lock itself, explicit lock is only
+        # needed to fail fast
+        if self.is_fast_fail_lock():
+            self.lock_units([instance.id], using)
+
+        connection = connections[using]
+        table = connection.ops.quote_name(instance._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET amount = amount - %s '
+                'WHERE id = %s AND amount >= %s AND stock_shards = 0 '
+                'RETURNING amount',
+                [delta, instance.id, delta]
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            unit = (
+                type(instance).objects.using(using)
+                .filter(id=instance.id)
+                .values('amount', 'stock_shards')
+                .first()
+            )
+            if unit and unit['stock_shards']:
+                # sharded after the instance was read
+                instance.stock_shards = unit['stock_shards']
+                exceeded = self.take_sharded_stock(instance.id, delta, using)
+                if exceeded == 0:
+                    return
+                raise self.get_amount_error(exceeded or delta)
+            if delta < 0:
+                # unit is deleted, nothing to give back to
+                return
+            raise self.get_amount_error(
+                delta - (unit['amount'] if unit else 0)
+            )
+
+        instance.amount = row[0]
+        bump_unit_versions([(instance.id, instance.shop_id)])
+
+    def take_sharded_stock(
+        self, unit_id: int, delta: int, using: str = 'default'
+    ) -> 'Optional[int]':
+        """
+        Take delta (give back if negative) from a random stock slot of
+        sharded unit with enough stock, slots locked by other
+        transactions are skipped first and waited for if all of them
+        are locked. If there is no such slot all slots are locked in
+        slot order and delta is spread over them.
+        Nothing is taken if the stock is not enough, the exceeded amount
+        is returned then (None if the unit has no slots anymore).
+        Unit amount is left to fold_sharded_stock.
+        """
+        from units.models import UnitStockShard
+
+        connection = connections[using]
+        table = connection.ops.quote_name(UnitStockShard._meta.db_table)
+        options = self.get_lock_options() or {}
+        try:
+            # a slot with enough stock is waited for if all of them are
+            # locked, the slot locked by a take that failed is released
+            # by the savepoint rollback, so the locks of all slots below
+            # are not taken while one of them is held
+            waiting_lock = 'FOR UPDATE NOWAIT' if options else ''
+            for lock in ('FOR UPDATE SKIP LOCKED', waiting_lock):
+                savepoint = transaction.savepoint(using)
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'UPDATE {table} SET amount = amount - %s '
+                            f'WHERE id = (SELECT id FROM {table} '
+                            'WHERE unit_id = %s AND amount >= %s '
+                            f'ORDER BY random() LIMIT 1 {lock}) '
+                            'AND amount >= %s RETURNING id',
+                            [delta, unit_id, delta, delta]
+                        )
+                        taken = cursor.fetchone() is not None
+                except OperationalError:
+                    transaction.savepoint_rollback(savepoint, using)
+                    raise
+                if taken:
+                    transaction.savepoint_commit(savepoint, using)
+                    return 0
+                transaction.savepoint_rollback(savepoint, using)
+
+            # slots are written before the locks are released, the
+            # atomic block is the only transaction without outer one
+            with transaction.atomic(using=using):
+                slots = list(
+                    UnitStockShard.objects.using(using)
+                    .filter(unit_id=unit_id)
+                    .order_by('slot')
+                    .select_for_update(nowait=bool(options))
+                    .values_list('id', 'amount')
+                )
+                if not slots:
+                    return None
+                total = sum(amount for _, amount in slots)
+                if delta > total:
+                    return delta - total
+                self.set_shard_amounts(
+                    self.spread_shard_delta(slots, delta), using
+                )
+                return 0
+        except OperationalError as err:
+            raise UnitLockedError() from err
+
+    def spread_shard_delta(
+        self, slots: 'List[Tuple[int, int]]', delta: int
+    ) -> 'Dict[int, int]':
+        """
+        New amounts by slot id of (slot id, amount) pairs in slot order:
+        delta is taken from the first slots, given back to the first one.
+        """
+        if delta < 0:
+            return {slots[0][0]: slots[0][1] - delta}
+        amounts = {}
+        left = delta
+        for slot_id, amount in slots:
+            taken = min(amount, left)
+            if taken:
+                amounts[slot_id] = amount - taken
+                left -= taken
+        return amounts
+
+    def set_shard_amounts(
+        self, amounts: 'Dict[int, int]', using: str = 'default'
+    ) -> None:
+        from units.models import UnitStockShard
+
+        connection = connections[using]
+        table = connection.ops.quote_name(UnitStockShard._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET amount = amounts.amount '
+                'FROM unnest(%s::bigint[], %s::integer[]) '
+                'AS amounts(id, amount) '
+                f'WHERE {table}.id = amounts.id',
+                [list(amounts), list(amounts.values())]
+            )
 
-    def update_unit_amount(self, instance: 'Unit', amount: int) -> None:
-        from units.serializers import UnitSerializer
-        data = UnitSerializer(instance).data
-        data.pop('id')
-        data['amount'] = amount
-        unit_serializer = UnitSerializer(
-            instance,
-            data=data
-        )
-        unit_serializer.is_valid(raise_exception=True)
-        unit_serializer.save()
+    def shard_stock(
+        self, unit_ids: 'Iterable[int]', slots: int, using: str = 'default'
+    ) -> int:
+        """
+        Split stock of the units into slots (folded back into the unit
+        amount with 0 slots). Units and their slots are locked, so
+        reservations of the units wait for it. Number of units is
+        returned.
+        """
+        from units.models import Unit, UnitStockShard
+
+        with transaction.atomic(using=using):
+            units = list(
+                Unit.objects.using(using)
+                .filter(id__in=unit_ids)
+                .order_by('id')
+                # reservations holding slot locks check their foreign key
+                # with KEY SHARE lock of the unit
+                .select_for_update(no_key=True)
+                .values_list('id', 'stock_shards', 'shop_id')
+            )
+            ids = [unit_id for unit_id, _, _ in units]
+            shards = UnitStockShard.objects.using(using).filter(
+                unit_id__in=ids
+            )
+            stock = {
+                unit_id: amount for unit_id, amount in
+                Unit.objects.using(using).filter(
+                    id__in=[
+                        unit_id for unit_id, count, _ in units if not count
+                    ]
+                ).values_list('id', 'amount')
+            }
+            stock.update(self.get_stock(
+                [unit_id for unit_id, count, _ in units if count], using,
+                lock=True
+            ))
+            shards._raw_delete(using)
+
+            UnitStockShard.objects.using(using).bulk_create([
+                UnitStockShard(
+                    unit_id=unit_id,
+                    slot=slot,
+                    # remainder goes to the first slots
+                    amount=(
+                        stock.get(unit_id, 0) // slots
+                        + (slot < stock.get(unit_id, 0) % slots)
+                    )
+                )
+                for unit_id in ids
+                for slot in range(slots)
+            ])
+            connection = connections[using]
+            table = connection.ops.quote_name(Unit._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET amount = stock.amount, '
+                    'stock_shards = %s '
+                    'FROM unnest(%s::bigint[], %s::integer[]) '
+                    'AS stock(id, amount) '
+                    f'WHERE {table}.id = stock.id',
+                    [slots, ids, [stock.get(unit_id, 0) for unit_id in ids]]
+                )
+        bump_unit_versions(
+            (unit_id, shop_id) for unit_id, _, shop_id in units
+        )
+        return len(ids)
+
+    def get_stock(
+        self,
+        unit_ids: 'Iterable[int]',
+        using: str = 'default',
+        lock: bool = False
+    ) -> 'Dict[int, int]':
+        """
+        Exact stock of sharded units by summing their slots.
+        """
+        from units.models import UnitStockShard
+
+        shards = UnitStockShard.objects.using(using).filter(
+            unit_id__in=unit_ids
+        )
+        if lock:
+            shards = shards.order_by('unit_id', 'slot').select_for_update()
+            rows = list(shards.values_list('unit_id', 'amount'))
+        else:
+            rows = shards.values_list('unit_id', 'amount')
+        stock = {}
+        for unit_id, amount in rows:
+            stock[unit_id] = stock.get(unit_id, 0) + amount
+        return stock
+
+    def fold_sharded_stock(self, using: str = 'default') -> int:
+        """
+        Set amount of sharded units to the sum of their slots with
+        single UPDATE, number of changed units is returned.
+        """
+        from units.models import Unit, UnitStockShard
+
+        connection = connections[using]
+        table = connection.ops.quote_name(Unit._meta.db_table)
+        shards_table = connection.ops.quote_name(
+            UnitStockShard._meta.db_table
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET amount = stock.amount FROM ('
+                f'SELECT unit_id, SUM(amount) AS amount FROM {shards_table} '
+                'GROUP BY unit_id) AS stock '
+                f'WHERE {table}.id = stock.unit_id '
+                f'AND {table}.stock_shards > 0 '
+                f'AND {table}.amount <> stock.amount '
+                f'RETURNING {table}.id, {table}.shop_id'
+            )
+            updated = cursor.fetchall()
+        bump_unit_versions(updated)
+        return len(updated)
+
+    def update_units_amount(
+        self, deltas: 'Dict[int, int]', using: str = 'default'
+    ) -> 'Dict[int, int]':
+        """
+        Take deltas by unit id from the stock of units with single
+        conditional UPDATE, units without enough stock are left intact
+        and returned with exceeded amount.
+        """
+        from units.models import Unit
+
+        unit_ids = sorted(
+            unit_id for unit_id, delta in deltas.items() if delta
+        )
+        if not unit_ids:
+            return {}
+
+        connection = connections[using]
+        table = connection.ops.quote_name(Unit._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET amount = {table}.amount - deltas.delta '
+                'FROM unnest(%s::bigint[], %s::integer[]) '
+                'AS deltas(id, delta) '
+                f'WHERE {table}.id = deltas.id '
+                f'AND {table}.amount >= deltas.delta '
+                f'AND {table}.stock_shards = 0 '
+                f'RETURNING {table}.id, {table}.shop_id',
+                [unit_ids, [deltas[unit_id] for unit_id in unit_ids]]
+            )
+            updated = cursor.fetchall()
+        bump_unit_versions(updated)
+        updated_ids = {unit_id for unit_id, _ in updated}
+
+        failed_ids = set(unit_ids) - updated_ids
+        if not failed_ids:
+            return {}
+        units = {
+            unit['id']: unit for unit in
+            Unit.objects.using(using)
+            .filter(id__in=failed_ids)
+            .values('id', 'amount', 'stock_shards')
+        }
+        exceeded = {}
+        for unit_id in sorted(failed_ids):
+            unit = units.get(unit_id)
+            if unit is None:
+                exceeded[unit_id] = deltas[unit_id]
+            elif unit['stock_shards']:
+                taken = self.take_sharded_stock(
+                    unit_id, deltas[unit_id], using
+                )
+                exceeded[unit_id] = (
+                    deltas[unit_id] if taken is None else taken
+                )
+            else:
+                exceeded[unit_id] = deltas[unit_id] - unit['amount']
+        return {
+            unit_id: amount for unit_id, amount in exceeded.items() if amount
+        }
+
+    def return_reserved_amount(self, queryset: 'QuerySet') -> int:
+        """
+        Give back stock of all reserved units of queryset with single
+        statement updating units (or a slot of sharded units) joined to
+        reserved amounts grouped by unit.
+        """
+        from units.models import Unit, UnitStockShard
+
+        reserved = (
+            queryset.order_by()
+            .values('unit_id')
+            .annotate(reserved_amount=Sum('amount'))
+        )
+        sql, params = reserved.query.sql_with_params()
+
+        connection = connections[queryset.db]
+        table = connection.ops.quote_name(Unit._meta.db_table)
+        shards_table = connection.ops.quote_name(
+            UnitStockShard._meta.db_table
+        )
+        with connection.cursor() as cursor:
+            # stock of sharded units goes to a random slot of each
+            cursor.execute(
+                f'WITH reserved AS ({sql}), units_updated AS ('
+                f'UPDATE {table} SET amount = {table}.amount + '
+                'reserved.reserved_amount FROM reserved '
+                f'WHERE {table}.id = reserved.unit_id '
+                f'AND {table}.stock_shards = 0 '
+                f'RETURNING {table}.id, {table}.shop_id'
+                '), shards_updated AS ('
+                f'UPDATE {shards_table} SET amount = {shards_table}.amount + '
+                'slots.reserved_amount FROM ('
+                'SELECT reserved.unit_id, reserved.reserved_amount, '
+                'units.shop_id, floor(random() * units.stock_shards) AS slot '
+                f'FROM reserved JOIN {table} AS units '
+                'ON units.id = reserved.unit_id WHERE units.stock_shards > 0'
+                f') AS slots WHERE {shards_table}.unit_id = slots.unit_id '
+                f'AND {shards_table}.slot = slots.slot '
+                'RETURNING slots.unit_id, slots.shop_id'
+                ') SELECT id, shop_id FROM units_updated '
+                'UNION ALL SELECT unit_id, shop_id FROM shards_updated',
+                params
+            )
+            updated = cursor.fetchall()
+        bump_unit_versions(updated)
+        return len(updated)
+
+    def expire_reservations(
+        self,
+        expired_before: 'datetime',
+        batch_size: int,
+        using: str = 'default'
+    ) -> 'Tuple[int, int]':
+        """
+        Delete one batch of reservations not changed since
+        expired_before and give their stock back with single grouped
+        UPDATE. Reservations locked by other transactions (requests or
+        other reapers) are skipped, so reapers can run in parallel.
+        Number of expired reservations and of updated units is returned.
+        """
+        from units.models import ReservedUnit, Unit
+
+        with transaction.atomic(using=using):
+            reserved_ids = list(
+                ReservedUnit.objects.using(using)
+                .filter(updated_at__lt=expired_before)
+                .order_by('updated_at')
+                .select_for_update(skip_locked=True)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not reserved_ids:
+                return 0, 0
+
+            queryset = ReservedUnit.objects.using(using).filter(
+                id__in=reserved_ids
+            )
+            # units are locked in id order like by the requests
+            list(
+                Unit.objects.using(using)
+                .filter(id__in=queryset.values('unit_id'))
+                .order_by('id')
+                .select_for_update()
+                .values_list('id', flat=True)
+            )
+            updated = self.return_reserved_amount(queryset)
+            queryset._raw_delete(using)
+        return len(reserved_ids), updated
+
+    def get_shop_name_drift_sql(
+        self,
+        shop_ids: 'Optional[Iterable[int]]',
+        using: str,
+        unit_ids: 'Optional[Iterable[int]]' = None
+    ) -> 'Tuple[str, str, str, list]':
+        """
+        Tables and condition of units which shop_name differs from name
+        of the shop, compared as text to find changes of case as well.
+        """
+        from shops.models import Shop
+        from units.models import Unit
+
+        quote_name = connections[using].ops.quote_name
+        table = quote_name(Unit._meta.db_table)
+        shops_table = quote_name(Shop._meta.db_table)
+        condition = (
+            f'{table}.shop_id = {shops_table}.id AND '
+            f'{table}.shop_name::text IS DISTINCT FROM '
+            f'{shops_table}.name::text'
+        )
+        params = []
+        if shop_ids is not None:
+            condition += f' AND {shops_table}.id = ANY(%s)'
+            params.append(list(shop_ids))
+        if unit_ids is not None:
+            condition += f' AND {table}.id = ANY(%s)'
+            params.append(list(unit_ids))
+        return table, shops_table, condition, params
+
+    def get_shop_name_drift(
+        self,
+        shop_ids: 'Optional[Iterable[int]]' = None,
+        using: str = 'default'
+    ) -> 'List[int]':
+        table, shops_table, condition, params = self.get_shop_name_drift_sql(
+            shop_ids, using
+        )
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT {table}.id FROM {table}, {shops_table} '
+                f'WHERE {condition} ORDER BY {table}.id',
+                params
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def sync_shop_names(
+        self,
+        shop_ids: 'Optional[Iterable[int]]' = None,
+        using: str = 'default',
+        unit_ids: 'Optional[Iterable[int]]' = None
+    ) -> int:
+        """
+        Copy names of shops to denormalized shop_name of their units (all
+        or of shop_ids / unit_ids), only drifted rows are written.
+        """
+        table, shops_table, condition, params = self.get_shop_name_drift_sql(
+            shop_ids, using, unit_ids
+        )
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET shop_name = {shops_table}.name '
+                f'FROM {shops_table} WHERE {condition} '
+                f'RETURNING {table}.id, {table}.shop_id',
+                params
+            )
+            updated = cursor.fetchall()
+        bump_unit_versions(updated)
+        return len(updated)
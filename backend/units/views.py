@@ -1,7 +1,9 @@
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, List
 
-from django.db.transaction import atomic
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.transaction import atomic, set_rollback
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import mixins
@@ -9,17 +11,41 @@ from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.filters import SearchFilter
-from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.permissions import (
+    SAFE_METHODS, IsAdminUser, IsAuthenticated
+)
 from rest_framework.response import Response
 from rest_framework.serializers import as_serializer_error
 
-from units.filters import OrderingByPropertyFilter
+from api.cache import (
+    CachedResponseMixin,
+    SHOPS_VERSION,
+    UNITS_ALL_VERSION,
+    UNITS_VERSION,
+    get_shop_units_version
+)
+from api.pagination import KeysetOrPageNumberPagination
+from api.views import (
+    AsyncReadMixin, StreamingListMixin, ValuesRetrieveMixin
+)
+from units.filters import (
+    FullTextSearchFilter,
+    OrderingByPropertyFilter,
+    ReservedUnitFilterSet,
+    ReservedUnitSearchFilterSet,
+    UnitFilterSet
+)
 from units.permissions import IsOwnerOrReadOnly
-from units.serializers import ReservedUnitSerializer, UnitSerializer
-from units.models import ReservedUnit, Unit
-from units.utils import AMOUNT_ERROR_MESSAGE
-from users.serializers import AppAccountSerializer
+from units.serializers import (
+    ReservedUnitBulkItemSerializer,
+    ReservedUnitBulkSerializer,
+    ReservedUnitSerializer,
+    UnitSerializer
+)
+from shops.models import Shop
+from units.models import ReservedUnit, Unit, get_shop_name_lookup
+from units.utils import UnitsUtil
+from users.models import AppAccount
 
 
 if TYPE_CHECKING:
@@ -30,38 +56,80 @@ if TYPE_CHECKING:
 
 
 class UnitView(
-    mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+    CachedResponseMixin,
+    StreamingListMixin,
+    ValuesRetrieveMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet
 ):
     serializer_class = UnitSerializer
+    cache_versions = (UNITS_VERSION,)
+    cache_object_versions = (UNITS_ALL_VERSION,)
+    cache_object_version = 'unit'
     queryset = (
         Unit.objects.select_related('shop')
     )
+    pagination_class = KeysetOrPageNumberPagination
     filter_backends = [
-        DjangoFilterBackend, OrderingByPropertyFilter, SearchFilter
+        DjangoFilterBackend, OrderingByPropertyFilter, FullTextSearchFilter
     ]
-    filterset_fields = ['shop__name', 'name']
+    filterset_class = UnitFilterSet
     ordering_fields = ['shop__name', 'name', 'price', 'price_for_kg']
-    property_ordering_fields = ['price_for_kg']
-    ordering = ['shop__name', 'name', 'price']
-    search_fields = ['name', '=price']
+    search_fields = ['@name', '=price']
 
+    @property
+    def ordering_aliases(self) -> 'Dict[str, str]':
+        return {'shop__name': get_shop_name_lookup()}
 
-class ReservedUnitView(viewsets.ModelViewSet):
+    @property
+    def ordering(self) -> 'List[str]':
+        return [get_shop_name_lookup(), 'name', 'price']
+
+    def get_list_cache_version_keys(self) -> 'List[str]':
+        """
+        Lists filtered by shop name are invalidated by changes of units
+        of the shop only.
+        """
+        shop_name = self.request.query_params.get('shop__name')
+        if not shop_name:
+            return super().get_list_cache_version_keys()
+        shop_id = Shop.objects.filter(name=shop_name).values_list(
+            'id', flat=True
+        ).first()
+        if shop_id is None:
+            # empty until a shop with the name is created or renamed
+            return [SHOPS_VERSION]
+        return [UNITS_ALL_VERSION, get_shop_units_version(shop_id)]
+
+
+class AsyncUnitView(AsyncReadMixin, UnitView):
+    pass
+
+
+class ReservedUnitView(ValuesRetrieveMixin, viewsets.ModelViewSet):
     serializer_class = ReservedUnitSerializer
 
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     filter_backends = [
-        DjangoFilterBackend, OrderingByPropertyFilter, SearchFilter
+        DjangoFilterBackend, OrderingByPropertyFilter, FullTextSearchFilter
     ]
-    filterset_fields = ['unit__shop__name', 'unit__name']
+    filterset_class = ReservedUnitFilterSet
     ordering_fields = [
         'unit__shop__name', 'unit__name', 'unit__price', 'unit__price_for_kg'
     ]
-    property_ordering_fields = ['unit__price_for_kg']
-    ordering = ['unit__shop__name', 'unit__name', 'unit__price']
-    search_fields = ['unit__name', '=unit__price']
+    search_fields = ['@unit__name', '=unit__price']
     http_method_names = ['get', 'head', 'options', 'post', 'patch', 'delete']
 
+    @property
+    def ordering_aliases(self) -> 'Dict[str, str]':
+        return {'unit__shop__name': get_shop_name_lookup('unit__')}
+
+    @property
+    def ordering(self) -> 'List[str]':
+        return [
+            get_shop_name_lookup('unit__'), 'unit__name', 'unit__price'
+        ]
+
     def get_queryset(self) -> 'QuerySet':
         return (
             ReservedUnit.objects
@@ -69,46 +137,82 @@ class ReservedUnitView(viewsets.ModelViewSet):
             .select_related('user', 'unit__shop')
         )
 
+    def get_object(self) -> ReservedUnit:
+        if self.request.method not in SAFE_METHODS:
+            # lock before reading to get not stale reserved amount
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            UnitsUtil().lock_reserved_units(
+                ReservedUnit.objects.filter(
+                    user_id=self.request.user.id,
+                    **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+                )
+            )
+        return super().get_object()
+
+    @atomic
+    def create(self, request: 'Request', *args, **kwargs) -> Response:
+        return super().create(request, *args, **kwargs)
+
+    @atomic
+    def update(self, request: 'Request', *args, **kwargs) -> Response:
+        return super().update(request, *args, **kwargs)
+
     @atomic
-    def __process_buying(
-        self, request: 'Request', queryset: 'QuerySet', total: Decimal
-    ) -> None:
-        amount = request.user.app_account.amount - total
-        app_acount_serializer = AppAccountSerializer(
-            request.user.app_account,
-            data={'amount': amount}
+    def destroy(self, request: 'Request', *args, **kwargs) -> Response:
+        return super().destroy(request, *args, **kwargs)
+
+    @atomic
+    def __process_buying(self, request: 'Request') -> Decimal:
+        util = UnitsUtil()
+        queryset = ReservedUnit.objects.filter(
+            id__in=util.lock_reserved_units(
+                ReservedUnit.objects.filter(user_id=request.user.id)
+            )
         )
-        try:
-            app_acount_serializer.is_valid(raise_exception=True)
-        except ValidationError as err:
-            err.detail = {'amount': f'{AMOUNT_ERROR_MESSAGE} {abs(amount)}'}
-            raise ValidationError(
-                detail=as_serializer_error(err)
-            ) from err
+        total = queryset.aggregate(
+            total=Coalesce(
+                Sum(F('amount') * F('unit__price')),
+                Value(Decimal()),
+                output_field=DecimalField()
+            )
+        )['total']
 
-        app_acount_serializer.save()
+        # conditional update keeps account amount not negative
+        updated = AppAccount.objects.filter(
+            user_id=request.user.id, amount__gte=total
+        ).update(amount=F('amount') - total)
+        if not updated:
+            amount = AppAccount.objects.filter(
+                user_id=request.user.id
+            ).values_list('amount', flat=True).first()
+            raise ValidationError(
+                detail=as_serializer_error(
+                    util.get_amount_error(amount - total)
+                )
+            )
 
         queryset._raw_delete(queryset.db)
+        return total
 
     @action(detail=False, methods=['post'])
     def buy(self, request: 'Request') -> Response:
-        queryset = self.get_queryset()
-        total = Decimal(sum(reserved_unit.total for reserved_unit in queryset))
-
-        self.__process_buying(request, queryset, total)
+        total = self.__process_buying(request)
         return Response(
             data={'total': total}, status=status.HTTP_200_OK
         )
 
     @atomic
     def __process_clear(self) -> None:
-        queryset = self.get_queryset()
-        to_update_units = []
-        for reserved_unit in queryset:
-            to_update_units.append(reserved_unit.unit)
-            reserved_unit.unit.amount += reserved_unit.amount
-
-        Unit.objects.bulk_update(to_update_units, fields=('amount',))
+        util = UnitsUtil()
+        queryset = ReservedUnit.objects.filter(
+            id__in=util.lock_reserved_units(
+                ReservedUnit.objects.filter(user_id=self.request.user.id)
+            )
+        )
+        util.lock_units(
+            queryset.values_list('unit_id', flat=True), queryset.db
+        )
+        util.return_reserved_amount(queryset)
 
         queryset._raw_delete(queryset.db)
 
@@ -118,11 +222,143 @@ class ReservedUnitView(viewsets.ModelViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @atomic
+    def __process_bulk(self, items: 'List', all_or_nothing: bool) -> 'List':
+        util = UnitsUtil()
+        results = []
+        amounts = {}
+        for item in items:
+            item_serializer = ReservedUnitBulkItemSerializer(data=item)
+            if not item_serializer.is_valid():
+                results.append({'errors': item_serializer.errors})
+                continue
+            unit_id = item_serializer.validated_data['unit_id']
+            results.append({'unit_id': unit_id, 'errors': {}})
+            if unit_id in amounts:
+                results[-1]['errors'] = {'unit_id': ['Unit is duplicated']}
+                continue
+            amounts[unit_id] = item_serializer.validated_data['amount']
 
-class ReservedUnitsSearchView(mixins.ListModelMixin, viewsets.GenericViewSet):
+        existing_ids = set(
+            Unit.objects.filter(id__in=amounts).values_list('id', flat=True)
+        )
+        reserved = ReservedUnit.objects.filter(
+            user_id=self.request.user.id, unit_id__in=existing_ids
+        )
+        util.lock_reserved_units(reserved)
+        reserved_amounts = dict(reserved.values_list('unit_id', 'amount'))
+        util.lock_units(existing_ids, reserved.db)
+
+        exceeded = util.update_units_amount(
+            {
+                unit_id: amounts[unit_id] - reserved_amounts.get(unit_id, 0)
+                for unit_id in existing_ids
+            },
+            reserved.db
+        )
+
+        for result in results:
+            unit_id = result.get('unit_id')
+            if result['errors'] or unit_id is None:
+                continue
+            if unit_id not in existing_ids:
+                result['errors'] = {'unit_id': ['Unit does not exist']}
+            elif unit_id in exceeded:
+                result['errors'] = as_serializer_error(
+                    util.get_amount_error(exceeded[unit_id])
+                )
+            else:
+                result['amount'] = amounts[unit_id]
+
+        if all_or_nothing and any(result['errors'] for result in results):
+            # results keep their values and error codes, unlike the
+            # detail of ValidationError
+            set_rollback(True)
+            return results
+
+        ReservedUnit.objects.bulk_create(
+            [
+                ReservedUnit(
+                    user_id=self.request.user.id,
+                    unit_id=result['unit_id'],
+                    amount=result['amount']
+                )
+                for result in results if not result['errors']
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'unit'],
+            update_fields=['amount', 'updated_at']
+        )
+        return results
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request: 'Request') -> Response:
+        """
+        Reserve list of units {unit_id, amount}, amount of already
+        reserved unit is replaced. Failed lines are reported in errors,
+        with atomic set nothing is reserved if any line is failed.
+        """
+        serializer = ReservedUnitBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = self.__process_bulk(
+            serializer.validated_data['items'],
+            serializer.validated_data['atomic']
+        )
+        failed = serializer.validated_data['atomic'] and any(
+            result['errors'] for result in results
+        )
+        return Response(
+            data={'items': results},
+            status=(
+                status.HTTP_400_BAD_REQUEST if failed else status.HTTP_200_OK
+            )
+        )
+
+
+class AsyncReservedUnitView(AsyncReadMixin, ReservedUnitView):
+    pass
+
+
+class ReservedUnitsSearchView(
+    StreamingListMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    """
+    Reservations of users found by comma separated usernames of the url
+    or by username, email or phone query parameters (one of them is
+    required without username in the url).
+    """
     serializer_class = ReservedUnitSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetOrPageNumberPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ReservedUnitSearchFilterSet
 
     def get_queryset(self) -> 'QuerySet':
+        queryset = (
+            ReservedUnit.objects
+            .select_related('user', 'unit__shop')
+            # Meta ordering with the shop name lookup of values rows, so
+            # keyset cursors find it there
+            .order_by(
+                get_shop_name_lookup('unit__'), 'unit__name', 'unit__price'
+            )
+        )
         username = self.kwargs.get('username')
-        return ReservedUnit.objects.filter(user__username=username)
+        if username is not None:
+            queryset = queryset.filter(
+                user__username__in=username.split(',')
+            )
+        return queryset
+
+    def filter_queryset(self, queryset: 'QuerySet') -> 'QuerySet':
+        search_params = self.filterset_class.base_filters
+        if 'username' not in self.kwargs and not any(
+            self.request.query_params.get(param) for param in search_params
+        ):
+            raise ValidationError({
+                'non_field_errors': [
+                    f'One of {", ".join(search_params)} is required.'
+                ]
+            })
+        return super().filter_queryset(queryset)
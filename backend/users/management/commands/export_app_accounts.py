@@ -0,0 +1,20 @@
+from typing import TYPE_CHECKING
+
+from api.exports import ExportCommand
+from users.models import AppAccount
+
+if TYPE_CHECKING:
+    from django.db.models.query import QuerySet
+
+
+class Command(ExportCommand):
+    help = 'Export app accounts as csv or ndjson.'
+    export_fields = {
+        'id': 'id',
+        'user_id': 'user_id',
+        'user': 'user__username',
+        'amount': 'amount',
+    }
+
+    def get_queryset(self, options: dict) -> 'QuerySet':
+        return AppAccount.objects.all()
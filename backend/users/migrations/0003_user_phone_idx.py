@@ -0,0 +1,20 @@
+# Generated by Django 4.1.5 on 2026-10-18 19:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # index is built without locking writes to the users table
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_alter_user_phone_appaccount'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(fields=['phone'], name='users_user_phone_idx'),
+        ),
+    ]
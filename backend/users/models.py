@@ -18,6 +18,10 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # admin reservations search by phone
+            models.Index(fields=['phone'], name='users_user_phone_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.username
@@ -8,7 +8,7 @@ from users.models import AppAccount, User
 
 
 class UserView(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('app_account').order_by('id')
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
     http_method_names = ['get', 'head', 'options', 'post', 'patch', 'delete']
@@ -20,7 +20,7 @@ class AppAccountView(
     mixins.ListModelMixin,
     viewsets.GenericViewSet
 ):
-    queryset = AppAccount.objects.all()
+    queryset = AppAccount.objects.order_by('id')
     serializer_class = AppAccountSerializer
     permission_classes = [IsAdminUser]
     http_method_names = ['get', 'head', 'options', 'patch']